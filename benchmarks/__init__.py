@@ -0,0 +1,20 @@
+"""
+Benchmarks for the promotion pipeline: synthetic File A / File B generator and
+per-stage timings written as JSON (see run_benchmarks).
+"""
+
+from benchmarks.synthetic_data import (
+    as_raw_text,
+    generate_file_a,
+    generate_file_b,
+    make_sites,
+    write_input_files,
+)
+
+__all__ = [
+    "as_raw_text",
+    "generate_file_a",
+    "generate_file_b",
+    "make_sites",
+    "write_input_files",
+]
@@ -0,0 +1,236 @@
+"""
+Time every pipeline stage on synthetic data and write the results as JSON.
+
+Usage:
+  python -m benchmarks.run_benchmarks
+  python -m benchmarks.run_benchmarks --sizes 10000 100000 --repeat 3 --output bench.json
+  python -m benchmarks.run_benchmarks --sizes 2000000 --skip-excel --deep-copy
+
+Stages: read_input_files, prepare_file_a, prepare_file_b, merge_data,
+calculate_demand, generate_summary, export_to_excel. The XLSX stages
+(read_input_files, export_to_excel) are skipped for sizes above the Excel
+sheet row limit, or for every size with --skip-excel; prepare_file_a then
+gets the generated frame as text, as read_excel(dtype=str) would return it.
+
+Every stage also records the process peak RSS when it ends (peak_rss_mb). The peak
+never goes down within a process, so compare memory between runs: e.g. the default
+copy-free pipeline against --deep-copy (Config.COPY_FREE_PIPELINE = False).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import (
+    EXCEL_MAX_ROWS,
+    as_raw_text,
+    generate_file_a,
+    generate_file_b,
+    write_input_files,
+)
+from promo_calculator import (
+    Config,
+    calculate_demand,
+    export_to_excel,
+    generate_summary,
+    merge_data,
+    prepare_file_a,
+    prepare_file_b,
+    read_input_files,
+)
+from stage_profiler import peak_rss_bytes
+
+# Bump when the JSON layout changes
+RESULTS_FORMAT_VERSION = 2
+
+DEFAULT_SIZES: List[int] = [10_000, 100_000, 2_000_000]
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+STAGES: List[str] = [
+    "read_input_files",
+    "prepare_file_a",
+    "prepare_file_b",
+    "merge_data",
+    "calculate_demand",
+    "generate_summary",
+    "export_to_excel",
+]
+
+
+def _shape(result: Any) -> Dict[str, int]:
+    """Rows / columns of a stage result (first DataFrame of a tuple)."""
+    frame = result[0] if isinstance(result, tuple) else result
+    if isinstance(frame, pd.DataFrame):
+        return {"rows": int(frame.shape[0]), "columns": int(frame.shape[1])}
+    return {"rows": 0, "columns": 0}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    peak = peak_rss_bytes()
+    return None if peak is None else round(peak / (1024 * 1024), 1)
+
+
+def time_stage(func: Callable[[], Any], repeat: int = 1):
+    """
+    Run func repeat times; return (last result, timing dict with best and all wall times
+    and the process peak RSS in MB after the runs).
+    """
+    seconds = []
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+    return result, {"seconds": min(seconds), "runs": seconds, "peak_rss_mb": _peak_rss_mb()}
+
+
+def benchmark_size(
+    n_rows: int,
+    config: Config,
+    work_dir: Path,
+    repeat: int = 1,
+    lead_time: int = 2,
+    skip_excel: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Generate File A / File B with about n_rows File A rows and time each stage."""
+    start = time.perf_counter()
+    raw_a = generate_file_a(n_rows, seed=seed, config=config)
+    raw_b1, raw_b2 = generate_file_b(raw_a, seed=seed, config=config)
+    generate_seconds = time.perf_counter() - start
+
+    excel_skip_reason: Optional[str] = None
+    if skip_excel:
+        excel_skip_reason = "--skip-excel"
+    elif len(raw_a) + 1 > EXCEL_MAX_ROWS:
+        excel_skip_reason = f"{len(raw_a)} rows exceed the Excel sheet limit"
+
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, func: Callable[[], Any]):
+        result, timing = time_stage(func, repeat)
+        stages[name] = {**timing, **_shape(result), "skipped": None}
+        print(f"  {name:<18} {timing['seconds']:9.3f}s  peak RSS {timing['peak_rss_mb']} MB")
+        return result
+
+    write_seconds = None
+    if excel_skip_reason is None:
+        start = time.perf_counter()
+        file_a, file_b = write_input_files(work_dir, raw_a, raw_b1, raw_b2)
+        write_seconds = time.perf_counter() - start
+        df_a_raw, df_b1_raw, df_b2_raw = record(
+            "read_input_files", lambda: read_input_files(file_a, file_b, config)
+        )
+    else:
+        stages["read_input_files"] = {"skipped": excel_skip_reason}
+        df_a_raw, df_b1_raw, df_b2_raw = as_raw_text(raw_a), as_raw_text(raw_b1), as_raw_text(raw_b2)
+    del raw_a, raw_b1, raw_b2
+
+    df_a, _ = record("prepare_file_a", lambda: prepare_file_a(df_a_raw, config))
+    df_b1, df_b2, _ = record("prepare_file_b", lambda: prepare_file_b(df_b1_raw, df_b2_raw, config))
+    merged, _ = record("merge_data", lambda: merge_data(df_a, df_b1, df_b2, config))
+    detail = record("calculate_demand", lambda: calculate_demand(merged, config, lead_time=lead_time))
+    summary = record("generate_summary", lambda: generate_summary(detail, config))
+
+    if excel_skip_reason is None:
+        output_path = work_dir / "benchmark_output.xlsx"
+        record(
+            "export_to_excel",
+            lambda: export_to_excel(detail, summary, df_a, df_b1, df_b2, output_path),
+        )
+    else:
+        stages["export_to_excel"] = {"skipped": excel_skip_reason}
+
+    return {
+        "requested_rows": n_rows,
+        "file_a_rows": int(len(df_a_raw)),
+        "generate_seconds": generate_seconds,
+        "write_inputs_seconds": write_seconds,
+        "stages": stages,
+        "total_seconds": sum(s.get("seconds", 0.0) for s in stages.values()),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(
+    sizes: List[int],
+    output: Path,
+    repeat: int = 1,
+    lead_time: int = 2,
+    skip_excel: bool = False,
+    config: Optional[Config] = None,
+) -> Dict[str, Any]:
+    """Benchmark every size and write the results JSON to output."""
+    cfg = config or Config()
+    # Measure parsing, not cache hits
+    cfg.INPUT_CACHE_DIR = None
+
+    report: Dict[str, Any] = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "config": {
+            "DISPATCH_ENGINE": cfg.DISPATCH_ENGINE,
+            "EXCEL_ENGINE": cfg.EXCEL_ENGINE,
+            "COMPACT_DTYPES": cfg.COMPACT_DTYPES,
+            "PROJECT_FILE_A_COLUMNS": cfg.PROJECT_FILE_A_COLUMNS,
+            "PARALLEL_READ": cfg.PARALLEL_READ,
+            "COPY_FREE_PIPELINE": cfg.COPY_FREE_PIPELINE,
+            "lead_time": lead_time,
+            "repeat": repeat,
+        },
+        "results": [],
+    }
+
+    for n_rows in sizes:
+        print(f"Benchmark: {n_rows} rows")
+        with tempfile.TemporaryDirectory() as tmp:
+            report["results"].append(
+                benchmark_size(n_rows, cfg, Path(tmp), repeat, lead_time, skip_excel)
+            )
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to: {output}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the promotion pipeline stages")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="File A row counts")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage (best time is reported)")
+    parser.add_argument("--lead-time", type=int, default=2)
+    parser.add_argument("--skip-excel", action="store_true", help="skip the XLSX read/export stages")
+    parser.add_argument("--parallel-read", action="store_true", help="set Config.PARALLEL_READ")
+    parser.add_argument(
+        "--deep-copy", action="store_true", help="set Config.COPY_FREE_PIPELINE = False (full copy per stage)"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="results JSON path")
+    args = parser.parse_args(argv)
+
+    output = args.output
+    if output is None:
+        output = DEFAULT_RESULTS_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d%H%M')}.json"
+    config = Config()
+    config.PARALLEL_READ = args.parallel_read
+    config.COPY_FREE_PIPELINE = not args.deep_copy
+    run_benchmarks(args.sizes, output, args.repeat, args.lead_time, args.skip_excel, config)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,166 @@
+"""
+Synthetic File A / File B generator for benchmarks.
+
+Frames use the raw Excel headers from Config (COL_A_* / COL_B1_* / COL_B2_*) so they
+can be written to XLSX and read back through read_input_files, or passed straight
+to prepare_file_a / prepare_file_b after as_raw_text().
+
+Site mix: D001 (DC), HB87, H-prefix stores (HA/HB/HC/HD), other HK stores and
+Macau stores; RP Type is a RF / ND mix.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import ARTICLE_INFO_FIELDS, Config
+
+# Excel worksheet row limit (including the header row)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def make_sites(n_sites: int) -> List[str]:
+    """D001 + HB87 followed by H-prefix, other HK and Macau store codes (n_sites >= 2)."""
+    if n_sites < 2:
+        raise ValueError("n_sites must be at least 2 (D001 and HB87)")
+    sites = ["D001", "HB87"]
+    prefixes = ["HA", "HB", "HC", "HD", "ME", "MA"]
+    i = 0
+    while len(sites) < n_sites:
+        prefix = prefixes[i % len(prefixes)]
+        code = f"{prefix}{i // len(prefixes) + 1:02d}"
+        if code != "HB87":
+            sites.append(code)
+        i += 1
+    return sites
+
+
+def generate_file_a(
+    n_rows: int,
+    n_sites: int = 60,
+    seed: int = 0,
+    duplicate_ratio: float = 0.01,
+    blank_launch_ratio: float = 0.05,
+    config: Optional[Config] = None,
+) -> pd.DataFrame:
+    """
+    File A with about n_rows rows: every SKU stocked at every site, plus
+    duplicate_ratio extra (Article, Site) rows and blank Launch Dates for
+    blank_launch_ratio of the SKUs.
+    """
+    cfg = config or Config()
+    rng = np.random.default_rng(seed)
+    sites = np.array(make_sites(n_sites))
+    n_dup = int(n_rows * duplicate_ratio)
+    n_skus = max(1, (n_rows - n_dup) // len(sites))
+    n_base = n_skus * len(sites)
+
+    articles = np.array([f"{100000000 + i}" for i in range(n_skus)])
+    sku_idx = np.repeat(np.arange(n_skus), len(sites))
+    site_idx = np.tile(np.arange(len(sites)), n_skus)
+    dup_rows = rng.integers(0, n_base, n_dup)
+    sku_idx = np.concatenate([sku_idx, sku_idx[dup_rows]])
+    site_idx = np.concatenate([site_idx, site_idx[dup_rows]])
+    n = len(sku_idx)
+
+    # SKU-level attributes: MOQ, supply source, launch date
+    sku_moq = rng.choice([1, 3, 6, 12, 24, 48], n_skus)
+    sku_supply = rng.choice([1, 2, 4], n_skus, p=[0.2, 0.7, 0.1])
+    launch = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000, n_skus), unit="D")
+    sku_launch = np.asarray(launch.strftime("%Y%m%d"), dtype=object)
+    sku_launch[rng.random(n_skus) < blank_launch_ratio] = None
+
+    site_codes = sites[site_idx]
+    is_dc = site_codes == "D001"
+    net_stock = rng.integers(0, 60, n)
+    net_stock[is_dc] = rng.integers(0, 5000, int(is_dc.sum()))
+
+    df = pd.DataFrame({
+        cfg.COL_A_ARTICLE: articles[sku_idx],
+        cfg.COL_A_SITE: site_codes,
+        cfg.COL_A_RP_TYPE: rng.choice(["RF", "ND"], n, p=[0.8, 0.2]),
+        cfg.COL_A_NET_STOCK: net_stock,
+        cfg.COL_A_PENDING: rng.integers(0, 10, n),
+        cfg.COL_A_SAFETY: rng.integers(0, 40, n),
+        cfg.COL_A_LAST_MONTH_SOLD: rng.integers(0, 120, n),
+        cfg.COL_A_MOQ: sku_moq[sku_idx],
+        cfg.COL_A_SUPPLY_SOURCE: sku_supply[sku_idx],
+        cfg.COL_A_LAUNCH_DATE: sku_launch[sku_idx],
+        cfg.COL_A_IN_QLTY: np.where(is_dc, rng.integers(0, 20, n), 0),
+        cfg.COL_A_BLOCKED: np.where(is_dc, rng.integers(0, 5, n), 0),
+    })
+    for field in ARTICLE_INFO_FIELDS:
+        df[field] = (f"{field} " + pd.Series(articles)).to_numpy()[sku_idx]
+    return df
+
+
+def generate_file_b(
+    df_a: pd.DataFrame,
+    n_groups: int = 20,
+    promo_ratio: float = 0.3,
+    seed: int = 0,
+    config: Optional[Config] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    File B for a generated File A:
+    - Sheet 1: promo_ratio of the Articles spread over n_groups promotion groups
+      (HK / MO / ALL target types, optional cover days and promotion days)
+    - Sheet 2: target % for every non-DC site
+    """
+    cfg = config or Config()
+    rng = np.random.default_rng(seed + 1)
+    articles = pd.unique(df_a[cfg.COL_A_ARTICLE])
+    n_promo = max(1, int(len(articles) * promo_ratio))
+    promo_articles = rng.choice(articles, n_promo, replace=False)
+
+    df_b1 = pd.DataFrame({
+        cfg.COL_B1_GROUP_NO: rng.integers(1, n_groups + 1, n_promo),
+        cfg.COL_B1_ARTICLE: promo_articles,
+        cfg.COL_B1_SKU_TARGET: rng.choice([0, 50, 200, 1000, 5000], n_promo),
+        cfg.COL_B1_TARGET_TYPE: rng.choice(["HK", "MO", "ALL"], n_promo, p=[0.6, 0.1, 0.3]),
+        cfg.COL_B1_PROMO_DAYS: rng.choice([0, 3, 7, 14, 30], n_promo),
+        cfg.COL_B1_TARGET_COVER_DAYS: rng.choice([0, 7, 14], n_promo),
+    })
+
+    sites = [s for s in pd.unique(df_a[cfg.COL_A_SITE]) if s != cfg.DC_SITE_CODE]
+    is_macau = np.array([s.startswith("MA") for s in sites])
+    weight = rng.random(len(sites))
+    weight_hk = np.where(is_macau, 0.0, weight)
+    weight_mo = np.where(is_macau, weight, 0.0)
+    df_b2 = pd.DataFrame({
+        cfg.COL_B2_SITE: sites,
+        cfg.COL_B2_HK: np.round(weight_hk / max(weight_hk.sum(), 1e-9), 4),
+        cfg.COL_B2_MO: np.round(weight_mo / max(weight_mo.sum(), 1e-9), 4),
+        cfg.COL_B2_ALL: np.round(weight / weight.sum(), 4),
+    })
+    return df_b1, df_b2
+
+
+def as_raw_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame as read_excel(dtype=str) would return it: values as text, blanks as NaN."""
+    out = df.copy()
+    for col in out.columns:
+        values = out[col]
+        out[col] = values.astype(str).where(values.notna(), np.nan)
+    return out
+
+
+def write_input_files(
+    folder: Path,
+    df_a: pd.DataFrame,
+    df_b1: pd.DataFrame,
+    df_b2: pd.DataFrame,
+) -> Tuple[Path, Path]:
+    """Write File A ("Sheet1") and File B ("Sheet 1" / "Sheet 2") workbooks into folder."""
+    if len(df_a) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"File A has {len(df_a)} rows; an Excel sheet holds at most {EXCEL_MAX_ROWS - 1}")
+    folder = Path(folder)
+    file_a = folder / "Promotion Target File A.xlsx"
+    file_b = folder / "Promotion Target File B.xlsx"
+    df_a.to_excel(file_a, sheet_name="Sheet1", index=False)
+    with pd.ExcelWriter(file_b) as writer:
+        df_b1.to_excel(writer, sheet_name="Sheet 1", index=False)
+        df_b2.to_excel(writer, sheet_name="Sheet 2", index=False)
+    return file_a, file_b
@@ -0,0 +1,137 @@
+"""
+On-disk cache of parsed input workbooks.
+
+Parsing XLSX is the slowest step of a run, so each parsed sheet is stored as a
+Parquet file keyed by the SHA-256 of the workbook bytes plus a fingerprint of
+the Config column mapping. Re-running with a different lead time, or with only
+File B corrected, reuses the already-parsed File A.
+
+The cache directory is bounded in size; least recently used entries (by file
+modification time, refreshed on every hit) are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+# Bump when the parsed frame layout changes so stale entries are never reused
+CACHE_FORMAT_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_digest(source: Any) -> str:
+    """
+    SHA-256 of a workbook given as a path, raw bytes or a binary file-like object.
+    File-like objects are rewound to their original position afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif hasattr(source, "read"):
+        position = source.tell()
+        for chunk in iter(lambda: source.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        source.seek(position)
+    else:
+        with open(source, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_fingerprint(config: Any, **extra: Any) -> str:
+    """
+    Short hash of everything that changes how a workbook is parsed:
+    all Config.COL_* column names, File A projection, reader engine, File A sheet / header
+    probing, archive member patterns, plus extra keyword values.
+    """
+    settings: Dict[str, Any] = {
+        name: getattr(config, name)
+        for name in dir(config)
+        if name.startswith("COL_")
+    }
+    settings["PROJECT_FILE_A_COLUMNS"] = getattr(config, "PROJECT_FILE_A_COLUMNS", False)
+    settings["EXCEL_ENGINE"] = getattr(config, "EXCEL_ENGINE", "auto")
+    settings["FILE_A_SHEET"] = getattr(config, "FILE_A_SHEET", "Sheet1")
+    settings["HEADER_PROBE_ROWS"] = getattr(config, "HEADER_PROBE_ROWS", 0)
+    settings["FILE_A_MEMBER_PATTERN"] = getattr(config, "FILE_A_MEMBER_PATTERN", "*")
+    settings["FILE_B_MEMBER_PATTERN"] = getattr(config, "FILE_B_MEMBER_PATTERN", "*")
+    settings["CACHE_FORMAT_VERSION"] = CACHE_FORMAT_VERSION
+    settings.update(extra)
+    payload = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class ParsedInputCache:
+    """
+    Size-bounded LRU cache of parsed DataFrames stored as Parquet files.
+
+    Keys are plain strings (see make_key); any read/write failure degrades to a cache miss.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: Any) -> Optional["ParsedInputCache"]:
+        """Build the cache from Config.INPUT_CACHE_DIR / INPUT_CACHE_MAX_BYTES; None when disabled."""
+        cache_dir = getattr(config, "INPUT_CACHE_DIR", None)
+        if not cache_dir:
+            return None
+        try:
+            return cls(Path(cache_dir), getattr(config, "INPUT_CACHE_MAX_BYTES", 0))
+        except OSError:
+            return None
+
+    @staticmethod
+    def make_key(digest: str, fingerprint: str, label: str) -> str:
+        return f"{digest}-{fingerprint}-{label}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # mark as recently used
+        except Exception:
+            return None
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
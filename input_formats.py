@@ -0,0 +1,493 @@
+"""
+Non-Excel input formats for File A / File B: CSV, Parquet and Arrow IPC (Feather).
+
+Scheduled batch runs can export the ZRPMM0015_S report and the promotion lists as
+tables instead of workbooks. Every reader returns a text frame that matches
+read_excel(dtype=str): column values as strings, blanks as NaN. The rest of the
+pipeline therefore sees the same Config.COL_A_* / COL_B* column contract.
+
+The format comes from the file extension, or from the leading magic bytes for
+uploads and files with an unknown extension. A workbook holds File B's two
+sheets; in a table format File B is two files. Pass them as a
+(Sheet 1, Sheet 2) pair, or as a folder containing "Sheet 1.<ext>" and
+"Sheet 2.<ext>".
+
+iter_table_chunks streams a table as text frames of a bounded number of rows, for
+preparing very large File A extracts chunk by chunk (Config.FILE_A_CHUNK_ROWS).
+
+Inputs may also arrive compressed: a .zip archive (the member is picked by a filename
+pattern), or a gzip / Zstandard compressed file (.gz / .zst). decompress_input unpacks
+the member in memory, never to a temporary file; gzip / Zstandard CSV is streamed
+without decompressing the whole file when read in chunks.
+"""
+
+import csv
+import fnmatch
+import io
+import zipfile
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from input_cache import content_digest
+
+FORMAT_BY_EXTENSION = {
+    ".xlsx": "excel",
+    ".xlsm": "excel",
+    ".xlsb": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+_MAGIC_BYTES = [
+    (b"PK\x03\x04", "excel"),  # XLSX / XLSM (zip container)
+    (b"\xd0\xcf\x11\xe0", "excel"),  # legacy XLS (OLE2)
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "arrow"),  # Arrow IPC file / Feather v2
+    (b"\xff\xff\xff\xff", "arrow"),  # Arrow IPC stream
+]
+
+FILE_B_SHEET_NAMES = ("Sheet 1", "Sheet 2")
+
+COMPRESSION_BY_EXTENSION = {
+    ".zip": "zip",
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+_COMPRESSION_MAGIC_BYTES = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+# Single-file codecs pyarrow can decompress as a stream
+STREAM_COMPRESSIONS = ("gzip", "zstd")
+
+InputSource = Union[str, Path, bytes, Any]
+
+
+def _is_path(source: Any) -> bool:
+    return isinstance(source, (str, Path))
+
+
+def _head_bytes(source: InputSource, size: int = 8) -> bytes:
+    """First bytes of a path, bytes or file-like object (file position is restored)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    if hasattr(source, "read"):
+        position = source.tell()
+        source.seek(0)
+        head = source.read(size)
+        source.seek(position)
+        return head
+    with open(source, "rb") as fh:
+        return fh.read(size)
+
+
+def _source_name(source: Any) -> str:
+    return str(source) if _is_path(source) else (getattr(source, "name", "") or "")
+
+
+def rewound_source(source: InputSource) -> Any:
+    """
+    Path as is, bytes wrapped in BytesIO, file-like objects rewound to the start, for
+    zipfile.ZipFile, pd.ExcelFile and openpyxl.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def workbook_zip_kind(source: InputSource) -> Optional[str]:
+    """
+    "xlsx" for a zip holding xl/workbook.xml (XLSX / XLSM, which openpyxl can stream),
+    "xlsb" for one holding xl/workbook.bin, None for any other zip or non-zip source.
+    """
+    try:
+        with zipfile.ZipFile(rewound_source(source)) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        return None
+    if "xl/workbook.xml" in names:
+        return "xlsx"
+    if "xl/workbook.bin" in names:
+        return "xlsb"
+    return None
+
+
+def detect_compression(source: Any) -> Optional[str]:
+    """
+    "zip", "gzip", "zstd" or None (not compressed; folders and File B pairs are never compressed).
+    A known extension wins; otherwise the magic bytes decide. Workbooks are zip containers
+    too, so a zip is only an archive when it is not an XLSX / XLSM / XLSB.
+    """
+    if isinstance(source, (tuple, list)) or (_is_path(source) and Path(source).is_dir()):
+        return None
+    suffix = Path(_source_name(source)).suffix.lower()
+    if suffix in COMPRESSION_BY_EXTENSION:
+        return COMPRESSION_BY_EXTENSION[suffix]
+    if suffix in FORMAT_BY_EXTENSION:
+        return None
+    head = _head_bytes(source)
+    for magic, compression in _COMPRESSION_MAGIC_BYTES:
+        if head.startswith(magic):
+            return compression
+    if head.startswith(b"PK\x03\x04") and workbook_zip_kind(source) is None:
+        return "zip"
+    return None
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory file carrying the inner file name, so detect_input_format sees its extension."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+def _compressed_stream(source: InputSource, compression: str):
+    """pyarrow input stream decompressing a gzip / Zstandard path, bytes or file-like object."""
+    import pyarrow as pa
+
+    data = _as_bytes_or_path(source)
+    return pa.input_stream(data if isinstance(data, str) else pa.py_buffer(data), compression=compression)
+
+
+def _inner_name(source: Any) -> str:
+    """File name without the .gz / .zst suffix ("" when the source has no name)."""
+    name = Path(_source_name(source)).name
+    if Path(name).suffix.lower() in COMPRESSION_BY_EXTENSION:
+        return Path(name).stem
+    return name
+
+
+def _member_rank(name: str) -> int:
+    """Workbooks, then CSV, Parquet, Arrow; .txt and unknown extensions last."""
+    suffix = Path(name).suffix.lower()
+    if suffix == ".txt" or suffix not in FORMAT_BY_EXTENSION:
+        return len(FORMAT_BY_EXTENSION)
+    return list(FORMAT_BY_EXTENSION).index(suffix)
+
+
+def _select_member(names: List[str], pattern: str, label: str) -> str:
+    """The archive file whose name (or path) matches pattern; ties go to the preferred format, then archive order."""
+    files = [n for n in names if not n.endswith("/") and not n.startswith("__MACOSX/")]
+    matches = [n for n in files if fnmatch.fnmatch(Path(n).name, pattern) or fnmatch.fnmatch(n, pattern)]
+    if not matches:
+        raise ValueError(f"{label} archive has no file matching '{pattern}'. Files found: {files}")
+    return min(matches, key=_member_rank)
+
+
+def decompress_input(source: InputSource, member_pattern: str = "*", label: str = "Input") -> InputSource:
+    """
+    source unchanged when it is not compressed. Otherwise the wanted file decompressed in
+    memory as a NamedBytesIO: from a .zip the member matching member_pattern (workbooks,
+    then tables when several match), from .gz / .zst the single compressed file.
+    """
+    compression = detect_compression(source)
+    if compression is None:
+        return source
+    if compression == "zip":
+        with zipfile.ZipFile(rewound_source(source)) as archive:
+            member = _select_member(archive.namelist(), member_pattern, label)
+            return NamedBytesIO(archive.read(member), Path(member).name)
+    with _compressed_stream(source, compression) as stream:
+        return NamedBytesIO(stream.read(), _inner_name(source))
+
+
+def decompress_file_b(source: Any, member_pattern: str = "*") -> Any:
+    """
+    File B as decompress_input, except that a .zip holding "Sheet 1.<ext>" and "Sheet 2.<ext>"
+    tables becomes a (Sheet 1, Sheet 2) pair of in-memory files.
+    """
+    if detect_compression(source) == "zip":
+        with zipfile.ZipFile(rewound_source(source)) as archive:
+            names = archive.namelist()
+            pair = []
+            for sheet in FILE_B_SHEET_NAMES:
+                matches = [
+                    n for n in names
+                    if Path(n).stem == sheet
+                    and FORMAT_BY_EXTENSION.get(Path(n).suffix.lower()) not in (None, "excel")
+                ]
+                if matches:
+                    pair.append(NamedBytesIO(archive.read(matches[0]), Path(matches[0]).name))
+            if len(pair) == 2:
+                return tuple(pair)
+    return decompress_input(source, member_pattern, label="File B")
+
+
+def compressed_input_format(source: Any, compression: str) -> str:
+    """detect_input_format of the file inside a gzip / Zstandard source (peeks at its first bytes)."""
+    fmt = FORMAT_BY_EXTENSION.get(Path(_inner_name(source)).suffix.lower())
+    if fmt is not None:
+        return fmt
+    with _compressed_stream(source, compression) as stream:
+        return detect_input_format(stream.read(8))
+
+
+def detect_input_format(source: InputSource) -> str:
+    """
+    "excel", "csv", "parquet" or "arrow".
+    A known file extension wins; otherwise the magic bytes decide, and text defaults to CSV.
+    """
+    name = str(source) if _is_path(source) else getattr(source, "name", "")
+    fmt = FORMAT_BY_EXTENSION.get(Path(name).suffix.lower()) if name else None
+    if fmt is not None:
+        return fmt
+    head = _head_bytes(source)
+    for magic, magic_fmt in _MAGIC_BYTES:
+        if head.startswith(magic):
+            return magic_fmt
+    return "csv"
+
+
+def resolve_file_b_sources(source: Any) -> Any:
+    """
+    File B as given, or a (Sheet 1, Sheet 2) pair of table files.
+    A folder is resolved to its "Sheet 1.<ext>" and "Sheet 2.<ext>" files.
+    """
+    if isinstance(source, (tuple, list)):
+        if len(source) != 2:
+            raise ValueError("File B as tables needs exactly two files: (Sheet 1, Sheet 2)")
+        return tuple(source)
+    if _is_path(source) and Path(source).is_dir():
+        folder = Path(source)
+        found = []
+        for sheet in FILE_B_SHEET_NAMES:
+            matches = sorted(
+                path for path in folder.glob(f"{sheet}.*")
+                if FORMAT_BY_EXTENSION.get(path.suffix.lower()) not in (None, "excel")
+            )
+            if not matches:
+                raise ValueError(
+                    f"File B folder {folder} has no '{sheet}.csv/.parquet/.arrow' file. "
+                    f"Files found: {sorted(p.name for p in folder.iterdir())}"
+                )
+            found.append(matches[0])
+        return tuple(found)
+    return source
+
+
+def source_digest(source: Any) -> str:
+    """content_digest of a single source, or of both files of a File B pair."""
+    if isinstance(source, tuple):
+        combined = "".join(content_digest(part) for part in source)
+        return content_digest(combined.encode("ascii"))
+    return content_digest(source)
+
+
+def _as_bytes_or_path(source: InputSource) -> Union[str, bytes]:
+    if _is_path(source):
+        return str(source)
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    return bytes(source)
+
+
+def _csv_header(source: Union[str, bytes], compression: Optional[str] = None) -> List[str]:
+    if compression is not None:
+        with _compressed_stream(source, compression) as stream:
+            first_line = b""
+            while b"\n" not in first_line:
+                block = stream.read(64 * 1024)
+                if not block:
+                    break
+                first_line += block
+            first_line = first_line.split(b"\n", 1)[0]
+    elif isinstance(source, bytes):
+        first_line = source.split(b"\n", 1)[0]
+    else:
+        with open(source, "rb") as fh:
+            first_line = fh.readline()
+    return next(csv.reader([first_line.decode("utf-8-sig").rstrip("\r")]), [])
+
+
+def _csv_convert_options(header: List[str], columns: Optional[List[str]]):
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    include = [c for c in header if c in set(columns)] if columns is not None else None
+    return pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        strings_can_be_null=True,
+        include_columns=include,
+    )
+
+
+def _read_csv_table(source: Union[str, bytes], columns: Optional[List[str]]):
+    """pyarrow CSV reader with every column typed as text, so Article codes keep leading zeros."""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    data = pa.BufferReader(source) if isinstance(source, bytes) else source
+    return pa_csv.read_csv(data, convert_options=_csv_convert_options(_csv_header(source), columns))
+
+
+def _open_arrow(source: Union[str, bytes]):
+    """Arrow IPC file reader (memory-mapped when given a path), or IPC stream reader."""
+    import pyarrow as pa
+
+    data = pa.memory_map(source) if isinstance(source, str) else pa.BufferReader(source)
+    try:
+        return pa.ipc.open_file(data)
+    except pa.ArrowInvalid:
+        data.seek(0)
+        return pa.ipc.open_stream(data)
+
+
+def _read_arrow_table(source: Union[str, bytes]):
+    """Arrow IPC file (memory-mapped when given a path) or IPC stream."""
+    return _open_arrow(source).read_all()
+
+
+def _text_column(values: pd.Series) -> pd.Series:
+    """Values as strings like read_excel(dtype=str): integral floats without ".0", blanks as NaN."""
+    if pd.api.types.is_string_dtype(values) and not pd.api.types.is_object_dtype(values):
+        return values
+    if pd.api.types.is_float_dtype(values):
+        finite = values.dropna()
+        if len(finite) and np.isfinite(finite).all() and (finite == np.trunc(finite)).all():
+            values = values.astype("Int64")
+    return values.astype(str).where(values.notna(), np.nan)
+
+
+def to_text_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert every column to text, matching frames parsed with read_excel(dtype=str)."""
+    for col in df.columns:
+        df[col] = _text_column(df[col])
+    return df
+
+
+def read_tabular_file(
+    source: InputSource,
+    fmt: str,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read a CSV / Parquet / Arrow IPC table as a text frame.
+    If columns is given, only those headers are loaded (missing ones are skipped).
+    """
+    data = _as_bytes_or_path(source)
+    if fmt == "csv":
+        table = _read_csv_table(data, columns)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(io.BytesIO(data) if isinstance(data, bytes) else data)
+        names = parquet_file.schema_arrow.names
+        wanted = [c for c in names if c in set(columns)] if columns is not None else None
+        table = parquet_file.read(columns=wanted)
+    elif fmt == "arrow":
+        table = _read_arrow_table(data)
+        if columns is not None:
+            table = table.select([c for c in table.column_names if c in set(columns)])
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+    return to_text_frame(table.to_pandas())
+
+
+def _record_batches(
+    data: Union[str, bytes],
+    fmt: str,
+    columns: Optional[List[str]],
+    chunk_rows: int,
+    compression: Optional[str] = None,
+):
+    """Record batches of a CSV / Parquet / Arrow table, projected to columns when given."""
+    import pyarrow as pa
+
+    if fmt == "csv":
+        from pyarrow import csv as pa_csv
+
+        if compression is not None:
+            stream = _compressed_stream(data, compression)
+        else:
+            stream = pa.BufferReader(data) if isinstance(data, bytes) else data
+        reader = pa_csv.open_csv(
+            stream,
+            convert_options=_csv_convert_options(_csv_header(data, compression), columns),
+        )
+        return iter(reader)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(io.BytesIO(data) if isinstance(data, bytes) else data)
+        names = parquet_file.schema_arrow.names
+        wanted = [c for c in names if c in set(columns)] if columns is not None else None
+        return parquet_file.iter_batches(batch_size=chunk_rows, columns=wanted)
+    if fmt == "arrow":
+        reader = _open_arrow(data)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = iter(reader)
+        if columns is None:
+            return batches
+        return (
+            batch.select([c for c in batch.schema.names if c in set(columns)]) for batch in batches
+        )
+    raise ValueError(f"Unsupported input format: {fmt}")
+
+
+def _rebatch(batches: Iterable[Any], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Regroup record batches of any size into text frames of chunk_rows rows (the last may be shorter)."""
+    import pyarrow as pa
+
+    pending: List[Any] = []
+    pending_rows = 0
+    for batch in batches:
+        while batch.num_rows:
+            take = min(chunk_rows - pending_rows, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            pending_rows += take
+            batch = batch.slice(take)
+            if pending_rows == chunk_rows:
+                yield to_text_frame(pa.Table.from_batches(pending).to_pandas())
+                pending, pending_rows = [], 0
+    if pending_rows:
+        yield to_text_frame(pa.Table.from_batches(pending).to_pandas())
+
+
+def iter_table_chunks(
+    source: InputSource,
+    fmt: str,
+    chunk_rows: int,
+    columns: Optional[List[str]] = None,
+    compression: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV / Parquet / Arrow table as text frames of at most chunk_rows rows.
+    Same text as read_tabular_file, except that float columns are rendered per chunk.
+    compression: "gzip" / "zstd" to decompress a CSV on the fly (see STREAM_COMPRESSIONS).
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    if compression is not None and fmt != "csv":
+        raise ValueError("Only CSV can be streamed from a compressed file")
+    data = _as_bytes_or_path(source)
+    return _rebatch(_record_batches(data, fmt, columns, chunk_rows, compression), chunk_rows)
+
+
+def read_file_b_tables(sources: Tuple[Any, Any]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read File B "Sheet 1" / "Sheet 2" from a pair of table files."""
+    frames = []
+    for sheet, source in zip(FILE_B_SHEET_NAMES, sources):
+        fmt = detect_input_format(source)
+        if fmt == "excel":
+            raise ValueError(f"File B '{sheet}' given as a pair must be a CSV, Parquet or Arrow file")
+        frames.append(read_tabular_file(source, fmt))
+    return frames[0], frames[1]
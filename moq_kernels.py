@@ -0,0 +1,81 @@
+"""
+Array kernels for MOQ rounding used by the dispatch rules in promo_calculator.
+
+Every function accepts NumPy arrays (or scalars, broadcast as usual) and
+returns a float64 array. Where the multiple (MOQ) is NaN or <= 0, or the value
+is NaN, the result is `fill` instead of a rounded value, so callers decide the
+"no valid MOQ" policy explicitly (0 = no dispatch, or pass the values through).
+"""
+
+from typing import Union
+
+import numpy as np
+
+ArrayLike = Union[np.ndarray, float, int]
+
+
+def _valid(values: np.ndarray, multiple: np.ndarray) -> np.ndarray:
+    return ~np.isnan(values) & (multiple > 0)
+
+
+def mround_array(values: ArrayLike, multiple: ArrayLike, fill: ArrayLike = 0.0) -> np.ndarray:
+    """
+    Excel-compatible MROUND over arrays: round to nearest multiple, 0.5 rounds UP.
+    Same arithmetic as the scalar mround(): floor(value / multiple + 0.5) * multiple.
+    """
+    values = np.asarray(values, dtype="float64")
+    multiple = np.asarray(multiple, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rounded = np.floor(values / multiple + 0.5) * multiple
+    return np.where(_valid(values, multiple), rounded, fill)
+
+
+def ceil_to_multiple(
+    values: ArrayLike,
+    multiple: ArrayLike,
+    fill: ArrayLike = 0.0,
+    use_remainder: bool = False,
+) -> np.ndarray:
+    """
+    Round up to the next multiple.
+
+    Default: ceil(value / multiple) * multiple (as math.ceil in the dispatch rules).
+    use_remainder=True: (value // multiple + (1 if value % multiple > 0 else 0)) * multiple,
+    Python floor-division semantics as used by the Suggested DN Qty rule. The two only
+    differ for multiples not exactly representable in binary (e.g. MOQ 0.7).
+    """
+    values = np.asarray(values, dtype="float64")
+    multiple = np.asarray(multiple, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if use_remainder:
+            steps = np.floor_divide(values, multiple) + (np.remainder(values, multiple) > 0)
+        else:
+            steps = np.ceil(values / multiple)
+        rounded = steps * multiple
+    return np.where(_valid(values, multiple), rounded, fill)
+
+
+def floor_to_multiple(values: ArrayLike, multiple: ArrayLike, fill: ArrayLike = 0.0) -> np.ndarray:
+    """Largest multiple not above value: (value // multiple) * multiple."""
+    values = np.asarray(values, dtype="float64")
+    multiple = np.asarray(multiple, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rounded = np.floor_divide(values, multiple) * multiple
+    return np.where(_valid(values, multiple), rounded, fill)
+
+
+def capped_multiple(
+    values: ArrayLike,
+    multiple: ArrayLike,
+    cap: float,
+    fill: ArrayLike = 0.0,
+) -> np.ndarray:
+    """
+    Suggested DN Qty cap rule:
+    - value <= cap: round value UP to a multiple (may end slightly above cap, e.g. 49 → 60 with MOQ 12)
+    - value > cap: largest multiple <= cap (e.g. cap 50, MOQ 12 → 48)
+    """
+    values = np.asarray(values, dtype="float64")
+    capped = floor_to_multiple(np.full_like(values, float(cap)), multiple, fill=fill)
+    rounded = ceil_to_multiple(values, multiple, fill=fill, use_remainder=True)
+    return np.where(values > cap, capped, rounded)
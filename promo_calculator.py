@@ -1,11 +1,37 @@
+import fnmatch
+import importlib.util
+import io
+import json
 import math
+import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 
+import numpy as np
 import pandas as pd
 
+from input_cache import ParsedInputCache, config_fingerprint
+from input_formats import (
+    STREAM_COMPRESSIONS,
+    compressed_input_format,
+    decompress_file_b,
+    decompress_input,
+    detect_compression,
+    detect_input_format,
+    iter_table_chunks,
+    read_file_b_tables,
+    read_tabular_file,
+    resolve_file_b_sources,
+    rewound_source,
+    source_digest,
+    workbook_zip_kind,
+)
+from moq_kernels import capped_multiple, ceil_to_multiple, mround_array
+from stage_profiler import StageProfiler
+
 
 def mround(value: float, multiple: float) -> float:
     """
@@ -34,6 +60,9 @@ class Config:
     # Lead time default (can be overridden by CLI arg or UI)
     DEFAULT_LEAD_TIME: int = 0
 
+    # Largest lead time offered by the UI slider and the lead-time sweep (0..MAX_LEAD_TIME)
+    MAX_LEAD_TIME: int = 14
+
     # Max cap for Last Month Sold Qty
     LAST_MONTH_SOLD_CAP: int = 100000
 
@@ -47,6 +76,72 @@ class Config:
     # RP Type that should be calculated for dispatch
     DISPATCH_RP_TYPE: str = "RF"
 
+    # Dispatch rule engine used by calculate_demand
+    # "vectorized" = column-wise NumPy evaluation (default)
+    # "rowwise" = original per-row apply() closures, kept as the reference implementation
+    DISPATCH_ENGINE: str = "vectorized"
+
+    # Site / RP type dispatch rules (see DEFAULT_DISPATCH_RULES): a list of rule dicts or the
+    # path of a .csv / .json rule file; None = DEFAULT_DISPATCH_RULES. Only the vectorized
+    # engine evaluates custom rules (the rowwise engine implements the default rules)
+    DISPATCH_RULES: Optional[Any] = None
+
+    # Excel reader engine for input workbooks
+    # "auto" = python-calamine when installed, otherwise openpyxl (read-only streaming)
+    EXCEL_ENGINE: str = "auto"
+
+    # If True: File A only loads the columns named in COL_A_* plus ARTICLE_INFO_FIELDS.
+    # Faster and lighter on large SAP extracts, but Final Order Report then only carries those columns.
+    PROJECT_FILE_A_COLUMNS: bool = False
+
+    # Parsed-input cache: Parquet copies of parsed workbooks keyed by the SHA-256 of the file
+    # bytes and the column mapping. Off by default (None); set a folder to enable it. Least
+    # recently used entries are evicted once the folder exceeds INPUT_CACHE_MAX_BYTES.
+    INPUT_CACHE_DIR: Optional[str] = None
+    INPUT_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # If True: File A and File B are parsed concurrently in two worker processes, which hand
+    # the parsed sheets back as Arrow IPC buffers. Worth it when File A is large; parsing stays
+    # sequential on single-CPU machines or when worker processes are unavailable.
+    PARALLEL_READ: bool = False
+
+    # If True: working frames use the compact schema (see apply_compact_schema):
+    # categoricals for low-cardinality text, lossless int32 / float32 downcasts for numerics
+    COMPACT_DTYPES: bool = True
+
+    # If True: each stage starts from a shallow copy of its input when pandas copy-on-write is
+    # active (always in pandas >= 3), so a column is only copied when the stage modifies it;
+    # export headers are renamed at write time instead of copying every sheet's frame.
+    # False (or pandas without copy-on-write) keeps a full copy of every stage input
+    COPY_FREE_PIPELINE: bool = True
+
+    # Streaming File A preparation: when > 0, File A is read and normalized in chunks of this
+    # many rows and duplicate (Article, Site) rows are merged across chunks, so the whole raw
+    # sheet is never held in memory (0 = read the whole sheet, then prepare it)
+    FILE_A_CHUNK_ROWS: int = 0
+
+    # File A workbook sheet. When it is missing, or SAP title rows sit above the header, the
+    # first HEADER_PROBE_ROWS rows of each sheet (this one first) are probed for the header row
+    # holding the required COL_A_* columns; only that sheet is then parsed, from that row
+    # (0 = no probing: the sheet must exist and its first row is the header)
+    FILE_A_SHEET: str = "Sheet1"
+    HEADER_PROBE_ROWS: int = 20
+
+    # Compressed inputs (.zip / .gz / .zst) are decompressed in memory. From a .zip archive
+    # the first file whose name matches the pattern is read (e.g. "*File A*.xlsx"); a File B
+    # .zip may instead hold "Sheet 1.csv" and "Sheet 2.csv"
+    FILE_A_MEMBER_PATTERN: str = "*"
+    FILE_B_MEMBER_PATTERN: str = "*"
+
+    # If True: only File A rows whose Article is in File B Sheet 1 are prepared, merged and
+    # calculated. The filter runs right after reading, before numeric coercion, dedup and
+    # merge (promo-scope pushdown)
+    PROMO_SCOPE_ONLY: bool = False
+
+    # With PROMO_SCOPE_ONLY: keep the out-of-scope File A rows as passthrough rows, listed in
+    # the Final Order Report without calculated columns (False = leave them out of the report)
+    PROMO_SCOPE_PASSTHROUGH: bool = True
+
     # Column names for File A (Sheet: Data)
     COL_A_ARTICLE: str = "Article"
     COL_A_SITE: str = "Site"
@@ -74,61 +169,1065 @@ class Config:
     COL_B2_HK: str = "Shop Target(HK)"
     COL_B2_MO: str = "Shop Target(MO)"
     COL_B2_ALL: str = "Shop Target(ALL)"
+    # Further Sheet 2 columns matching this pattern add a target type named by the group,
+    # e.g. "Shop Target(KLN)" → Target Type "KLN" (percentage column Pct_KLN)
+    COL_B2_TARGET_PATTERN: str = r"Shop Target\((.+)\)"
+
+    # merge_data joins: an Article listed in several File B Sheet 1 rows (e.g. two promo
+    # groups) or a Site listed twice in Sheet 2 repeats the matching File A rows (fan-out).
+    # "warn" = report it and keep every match; "error" = stop before the joined frame is built
+    JOIN_FANOUT_POLICY: str = "warn"
 
     # D001 DC site code
     DC_SITE_CODE: str = "D001"
 
 
+# Optional article information fields passed through from File A to the Summary_Report
+ARTICLE_INFO_FIELDS: List[str] = [
+    "Article Description",
+    "Product Hierarchy",
+    "Article Long Text (60 Chars)",
+    "Description p. group",
+]
+
+
+def resolve_excel_engine(config: Config) -> str:
+    """
+    Return the pandas read_excel engine to use.
+    "auto" picks calamine (Rust, much faster on large workbooks) when python-calamine is installed.
+    """
+    if config.EXCEL_ENGINE != "auto":
+        return config.EXCEL_ENGINE
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+def file_a_columns(config: Config) -> List[str]:
+    """File A columns used by the calculation: Config.COL_A_* plus optional article info fields."""
+    return [
+        config.COL_A_ARTICLE,
+        config.COL_A_SITE,
+        config.COL_A_RP_TYPE,
+        config.COL_A_NET_STOCK,
+        config.COL_A_PENDING,
+        config.COL_A_SAFETY,
+        config.COL_A_LAST_MONTH_SOLD,
+        config.COL_A_MOQ,
+        config.COL_A_SUPPLY_SOURCE,
+        config.COL_A_LAUNCH_DATE,
+        config.COL_A_IN_QLTY,
+        config.COL_A_BLOCKED,
+    ] + ARTICLE_INFO_FIELDS
+
+
+def file_a_required_columns(config: Config) -> List[str]:
+    """File A columns prepare_file_a cannot do without."""
+    return [
+        config.COL_A_ARTICLE,
+        config.COL_A_SITE,
+        config.COL_A_RP_TYPE,
+        config.COL_A_NET_STOCK,
+        config.COL_A_PENDING,
+        config.COL_A_SAFETY,
+        config.COL_A_LAST_MONTH_SOLD,
+        config.COL_A_MOQ,
+        config.COL_A_SUPPLY_SOURCE,
+    ]
+
+
+def _usecols(columns: Optional[List[str]]):
+    """pandas usecols callable keeping only the given headers (missing ones are skipped)."""
+    if columns is None:
+        return None
+    wanted = set(columns)
+
+    def usecols(header) -> bool:
+        return header in wanted
+
+    return usecols
+
+
+def read_workbook(
+    source: Any,
+    sheet_names: List[str],
+    config: Config,
+    label: str = "Workbook",
+    columns: Optional[Dict[str, List[str]]] = None,
+    header_rows: Optional[Dict[str, int]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Open a workbook once and parse every requested sheet as text (dtype=str).
+
+    source: path, raw bytes or binary file-like object (e.g. a Streamlit upload).
+    columns: optional per-sheet header projection.
+    header_rows: optional per-sheet 0-based header row (rows above it are skipped).
+    Raises ValueError naming the available sheets when a required sheet is missing.
+    """
+    columns = columns or {}
+    header_rows = header_rows or {}
+    with pd.ExcelFile(rewound_source(source), engine=resolve_excel_engine(config)) as xls:
+        for name in sheet_names:
+            if name not in xls.sheet_names:
+                raise ValueError(
+                    f"{label} missing required sheet '{name}'. "
+                    f"Available sheets: {xls.sheet_names}"
+                )
+        return {
+            name: xls.parse(
+                name, dtype=str, header=header_rows.get(name, 0), usecols=_usecols(columns.get(name))
+            )
+            for name in sheet_names
+        }
+
+
+# Cell strings read_excel treats as missing by default (its na_values list)
+EXCEL_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+def _excel_cell_text(value: Any) -> Any:
+    """One openpyxl cell value as read_excel(dtype=str) text: integral numbers without ".0", blanks / NA strings → NaN."""
+    from openpyxl.cell.cell import ERROR_CODES
+
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return np.nan if value in EXCEL_NA_STRINGS or value in ERROR_CODES else value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _iter_sheet_heads(source: Any, config: Config, first_sheet: str) -> Iterator[Tuple[List[str], str, List[tuple]]]:
+    """
+    (sheet names, sheet, first Config.HEADER_PROBE_ROWS rows) for each sheet, first_sheet first.
+    XLSX / XLSM are read in openpyxl read-only mode, so only those rows are parsed;
+    XLS / XLSB go through the configured engine with nrows.
+    """
+    rows = config.HEADER_PROBE_ROWS
+    if workbook_zip_kind(source) == "xlsx":
+        from openpyxl import load_workbook
+
+        book = load_workbook(rewound_source(source), read_only=True, data_only=True)
+        try:
+            names = book.sheetnames
+            for name in sorted(names, key=lambda n: n != first_sheet):
+                yield names, name, list(book[name].iter_rows(max_row=rows, values_only=True))
+        finally:
+            book.close()
+        return
+    with pd.ExcelFile(rewound_source(source), engine=resolve_excel_engine(config)) as xls:
+        names = xls.sheet_names
+        for name in sorted(names, key=lambda n: n != first_sheet):
+            head = xls.parse(name, header=None, nrows=rows, dtype=object)
+            yield names, name, list(head.itertuples(index=False, name=None))
+
+
+def locate_header(
+    source: Any,
+    required: List[str],
+    config: Config,
+    sheet_name: str,
+    label: str = "Workbook",
+) -> Tuple[str, int]:
+    """
+    Find the sheet and 0-based header row (as read_excel(header=...)) holding every required
+    column, probing only the first Config.HEADER_PROBE_ROWS rows of each sheet, sheet_name first.
+    With HEADER_PROBE_ROWS = 0 returns (sheet_name, 0) unchecked.
+    Raises ValueError naming the available sheets when no sheet has the columns.
+    """
+    if config.HEADER_PROBE_ROWS <= 0:
+        return sheet_name, 0
+    wanted = set(required)
+    names: List[str] = []
+    for names, name, head in _iter_sheet_heads(source, config, sheet_name):
+        for row_number, row in enumerate(head):
+            if wanted <= {str(value) for value in row if value is not None}:
+                return name, row_number
+    if sheet_name in names:
+        # Let the column check report what is missing from the expected sheet
+        return sheet_name, 0
+    raise ValueError(
+        f"{label} missing required sheet '{sheet_name}', and no other sheet has the columns "
+        f"{required} in its first {config.HEADER_PROBE_ROWS} rows. Available sheets: {names}"
+    )
+
+
+def _text_chunk(rows: List[List[Any]], names: List[str]) -> pd.DataFrame:
+    """Rows of cell text / NaN as a str frame; blanks stay missing rather than becoming "nan"."""
+    frame = pd.DataFrame(rows, columns=names, dtype=object)
+    return frame.astype("str").where(frame.notna(), np.nan)
+
+
+def iter_workbook_chunks(
+    source: Any,
+    sheet_name: str,
+    chunk_rows: int,
+    label: str = "Workbook",
+    columns: Optional[List[str]] = None,
+    header_row: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream one worksheet as text frames of at most chunk_rows rows (openpyxl read-only mode).
+
+    Cell text matches read_workbook(); fully blank rows are skipped like read_excel does.
+    columns: optional header projection (missing headers are skipped).
+    header_row: 0-based header row; rows above it are skipped.
+    """
+    from openpyxl import load_workbook
+
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    book = load_workbook(rewound_source(source), read_only=True, data_only=True)
+    try:
+        if sheet_name not in book.sheetnames:
+            raise ValueError(
+                f"{label} missing required sheet '{sheet_name}'. "
+                f"Available sheets: {book.sheetnames}"
+            )
+        rows = book[sheet_name].iter_rows(min_row=header_row + 1, values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] in (None, ""):
+            header.pop()
+        header = [f"Unnamed: {i}" if name in (None, "") else name for i, name in enumerate(header)]
+        keep = [i for i, name in enumerate(header) if columns is None or name in set(columns)]
+        names = [header[i] for i in keep]
+
+        buffer: List[List[Any]] = []
+        for row in rows:
+            if all(value is None or value == "" for value in row):
+                continue
+            buffer.append([_excel_cell_text(row[i]) if i < len(row) else np.nan for i in keep])
+            if len(buffer) == chunk_rows:
+                yield _text_chunk(buffer, names)
+                buffer = []
+        if buffer:
+            yield _text_chunk(buffer, names)
+    finally:
+        book.close()
+
+
+def read_excel_sheet(
+    source: Any,
+    sheet_name: str,
+    config: Config,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read one worksheet as text (dtype=str) with the configured engine.
+    If columns is given, only those headers are loaded (missing ones are skipped).
+    """
+    projection = {sheet_name: columns} if columns is not None else None
+    return read_workbook(source, [sheet_name], config, columns=projection)[sheet_name]
+
+
+def _read_file_a(file_a_source: Any, config: Config) -> pd.DataFrame:
+    """
+    Parse File A (Config.FILE_A_SHEET of a workbook, or a CSV / Parquet / Arrow table) as text;
+    Article kept as TEXT. The sheet and header row are located with locate_header.
+    """
+    projection = file_a_columns(config) if config.PROJECT_FILE_A_COLUMNS else None
+
+    file_a_source = decompress_input(file_a_source, config.FILE_A_MEMBER_PATTERN, label="File A")
+    fmt = detect_input_format(file_a_source)
+    if fmt == "excel":
+        sheet, header_row = locate_header(
+            file_a_source, file_a_required_columns(config), config, config.FILE_A_SHEET, label="File A"
+        )
+        sheet_columns = {sheet: projection} if projection is not None else None
+        df_a = read_workbook(
+            file_a_source, [sheet], config, label="File A", columns=sheet_columns,
+            header_rows={sheet: header_row},
+        )[sheet]
+    else:
+        df_a = read_tabular_file(file_a_source, fmt, columns=projection)
+    # Ensure Article column is treated as TEXT (string) format
+    if config.COL_A_ARTICLE in df_a.columns:
+        df_a[config.COL_A_ARTICLE] = df_a[config.COL_A_ARTICLE].astype(str)
+    return df_a
+
+
+def _read_file_b(file_b_source: Any, config: Config) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parse File B "Sheet 1" (promo SKU list) and "Sheet 2" (site target %) as text:
+    both sheets of one workbook in one open, or a (Sheet 1, Sheet 2) pair of table files.
+    """
+    file_b_source = resolve_file_b_sources(decompress_file_b(file_b_source, config.FILE_B_MEMBER_PATTERN))
+    if isinstance(file_b_source, tuple):
+        df_b1, df_b2 = read_file_b_tables(file_b_source)
+    elif detect_input_format(file_b_source) != "excel":
+        raise ValueError(
+            "File B as CSV / Parquet / Arrow needs two files: pass a folder containing "
+            "'Sheet 1.<ext>' and 'Sheet 2.<ext>'"
+        )
+    else:
+        sheets = read_workbook(file_b_source, ["Sheet 1", "Sheet 2"], config, label="File B")
+        df_b1, df_b2 = sheets["Sheet 1"], sheets["Sheet 2"]
+    # Ensure Article column is treated as TEXT (string) format in File B Sheet 1
+    if config.COL_B1_ARTICLE in df_b1.columns:
+        df_b1[config.COL_B1_ARTICLE] = df_b1[config.COL_B1_ARTICLE].astype(str)
+    return df_b1, df_b2
+
+
 def read_input_files(
-    file_a_path: Path,
-    file_b_path: Path,
+    file_a_path: Any,
+    file_b_path: Any,
     config: Config,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Load:
-    - File A: main inventory & sales (Sheet: Data or Sheet 1)
-    - File B: Sheet1 (promo SKU list), Sheet2 (site target %)
+    - File A: main inventory & sales (Sheet: Config.FILE_A_SHEET, or the sheet whose first
+      rows hold the File A header; see locate_header)
+    - File B: Sheet 1 (promo SKU list), Sheet 2 (site target %)
+
+    Each file may be a path, raw bytes or a binary file-like object (e.g. a Streamlit
+    upload); each workbook is opened once and all of its sheets parsed in one pass.
+    CSV / Parquet / Arrow tables are detected by extension or magic bytes (input_formats);
+    File B in a table format is a folder (or pair) holding "Sheet 1" and "Sheet 2".
+    .zip / .gz / .zst inputs are decompressed in memory (Config.FILE_A/B_MEMBER_PATTERN
+    picks the file inside a .zip); the cache is keyed on the compressed bytes.
+
+    Parsed sheets are reused from Config.INPUT_CACHE_DIR when the workbook bytes
+    and column mapping are unchanged.
 
     Returns:
     (df_a, df_b1, df_b2)
     """
-    # File A - 直接讀取 "Sheet1" 工作表
+    file_b_path = resolve_file_b_sources(file_b_path)
+    cache = ParsedInputCache.from_config(config)
+    df_a = df_b1 = df_b2 = None
+    if cache is not None:
+        fingerprint = config_fingerprint(config)
+        key_a = cache.make_key(source_digest(file_a_path), fingerprint, "A")
+        digest_b = source_digest(file_b_path)
+        key_b1 = cache.make_key(digest_b, fingerprint, "B1")
+        key_b2 = cache.make_key(digest_b, fingerprint, "B2")
+        df_a = cache.get(key_a)
+        df_b1 = cache.get(key_b1)
+        df_b2 = cache.get(key_b2)
+        if df_b1 is None or df_b2 is None:
+            df_b1 = df_b2 = None
+
+    parse_a = df_a is None
+    parse_b = df_b1 is None
+    if parse_a and parse_b and config.PARALLEL_READ and _available_cpus() > 1:
+        df_a, df_b1, df_b2 = _read_files_parallel(file_a_path, file_b_path, config)
+    else:
+        if parse_a:
+            df_a = _read_file_a(file_a_path, config)
+        if parse_b:
+            df_b1, df_b2 = _read_file_b(file_b_path, config)
+
+    if cache is not None:
+        if parse_a:
+            cache.put(key_a, df_a)
+        if parse_b:
+            cache.put(key_b1, df_b1)
+            cache.put(key_b2, df_b2)
+
+    return df_a, df_b1, df_b2
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (parallel reading only pays off with two or more)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _frame_to_arrow(df: pd.DataFrame) -> bytes:
+    """Serialize a parsed sheet as an Arrow IPC stream (cheap to send between processes)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_to_frame(buffer: bytes) -> pd.DataFrame:
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+def _read_file_a_arrow(file_a_source: Any, config: Config) -> bytes:
+    """Worker-process entry point: parse File A, return it as Arrow IPC bytes."""
+    return _frame_to_arrow(_read_file_a(file_a_source, config))
+
+
+def _read_file_b_arrow(file_b_source: Any, config: Config) -> Tuple[bytes, bytes]:
+    """Worker-process entry point: parse File B, return both sheets as Arrow IPC bytes."""
+    df_b1, df_b2 = _read_file_b(file_b_source, config)
+    return _frame_to_arrow(df_b1), _frame_to_arrow(df_b2)
+
+
+def _read_files_parallel(
+    file_a_source: Any,
+    file_b_source: Any,
+    config: Config,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Parse File A and File B in two worker processes (Config.PARALLEL_READ).
+    File-like sources are read into bytes first so they can be sent to the workers.
+    Falls back to parsing in this process when a worker pool cannot be used.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    def sendable(source: Any) -> Any:
+        if isinstance(source, tuple):
+            return tuple(sendable(part) for part in source)
+        if hasattr(source, "read"):
+            source.seek(0)
+            return source.read()
+        return source
+
+    sources = [sendable(file_a_source), sendable(resolve_file_b_sources(file_b_source))]
+
     try:
-        df_a = pd.read_excel(file_a_path, sheet_name="Sheet1", dtype=str)
-        # Ensure Article column is treated as TEXT (string) format
-        if config.COL_A_ARTICLE in df_a.columns:
-            df_a[config.COL_A_ARTICLE] = df_a[config.COL_A_ARTICLE].astype(str)
-    except ValueError:
-        # 如果失敗，列出所有可用的工作表名稱
-        xls_a = pd.ExcelFile(file_a_path)
-        available_sheets = xls_a.sheet_names
-        raise ValueError(
-            f"File A missing required sheet 'Sheet1'. "
-            f"Available sheets: {available_sheets}"
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            future_a = pool.submit(_read_file_a_arrow, sources[0], config)
+            future_b = pool.submit(_read_file_b_arrow, sources[1], config)
+            buffer_a = future_a.result()
+            buffer_b1, buffer_b2 = future_b.result()
+    except (BrokenProcessPool, OSError, NotImplementedError):
+        df_a = _read_file_a(sources[0], config)
+        df_b1, df_b2 = _read_file_b(sources[1], config)
+        return df_a, df_b1, df_b2
+
+    return _arrow_to_frame(buffer_a), _arrow_to_frame(buffer_b1), _arrow_to_frame(buffer_b2)
+
+
+class NumericCoercionReport:
+    """
+    Per-column results of coerce_numeric_columns: non-numeric tokens set to 0 (with a few
+    examples), negative values set to 0 and values capped. Reports of File A chunks are
+    combined with merge().
+    """
+
+    MAX_EXAMPLES = 3
+
+    def __init__(self):
+        self.columns: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        column: str,
+        non_numeric: int = 0,
+        negatives: int = 0,
+        capped: int = 0,
+        cap: Optional[float] = None,
+        examples: Optional[List[str]] = None,
+    ) -> None:
+        entry = self.columns.setdefault(
+            column, {"Non_Numeric": 0, "Negatives": 0, "Capped": 0, "Cap": cap, "Examples": []}
         )
+        entry["Non_Numeric"] += int(non_numeric)
+        entry["Negatives"] += int(negatives)
+        entry["Capped"] += int(capped)
+        for token in examples or []:
+            if token not in entry["Examples"] and len(entry["Examples"]) < self.MAX_EXAMPLES:
+                entry["Examples"].append(token)
+
+    def merge(self, other: "NumericCoercionReport") -> None:
+        for column, entry in other.columns.items():
+            self.add(column, entry["Non_Numeric"], entry["Negatives"], entry["Capped"], entry["Cap"], entry["Examples"])
+
+    def messages(self) -> List[str]:
+        """Warnings in the usual wording: negatives per column, then caps, then non-numeric tokens."""
+        messages = [
+            f"{column}: {entry['Negatives']} negative values set to 0"
+            for column, entry in self.columns.items()
+            if entry["Negatives"]
+        ]
+        messages += [
+            f"{column}: {entry['Capped']} values capped at {entry['Cap']}"
+            for column, entry in self.columns.items()
+            if entry["Capped"]
+        ]
+        messages += [
+            f"{column}: {entry['Non_Numeric']} non-numeric values set to 0 (e.g. {entry['Examples']})"
+            for column, entry in self.columns.items()
+            if entry["Non_Numeric"]
+        ]
+        return messages
+
+    def to_frame(self) -> pd.DataFrame:
+        """Columns with at least one issue: Column, Non_Numeric, Negatives, Capped, Examples."""
+        rows = [
+            {"Column": column, **{k: entry[k] for k in ("Non_Numeric", "Negatives", "Capped")},
+             "Examples": ", ".join(entry["Examples"])}
+            for column, entry in self.columns.items()
+            if entry["Non_Numeric"] or entry["Negatives"] or entry["Capped"]
+        ]
+        return pd.DataFrame(rows, columns=["Column", "Non_Numeric", "Negatives", "Capped", "Examples"])
 
-    # File B
-    xls_b = pd.ExcelFile(file_b_path)
-    df_b1 = pd.read_excel(xls_b, sheet_name="Sheet 1", dtype=str)
-    # Ensure Article column is treated as TEXT (string) format in File B Sheet 1
-    if config.COL_B1_ARTICLE in df_b1.columns:
-        df_b1[config.COL_B1_ARTICLE] = df_b1[config.COL_B1_ARTICLE].astype(str)
-    
-    df_b2 = pd.read_excel(xls_b, sheet_name="Sheet 2", dtype=str)
 
-    return df_a, df_b1, df_b2
+class ArticleMatchReport:
+    """
+    Article overlap of File A and File B Sheet1: unique Article counts and the full sorted
+    lists of Articles found in only one file. messages() keeps the warnings short (at most
+    MAX_EXAMPLES Articles each); to_frame() holds every unmatched Article for export.
+    """
+
+    MAX_EXAMPLES = 10
+    FILE_A_ONLY = "File A only (no promo targets)"
+    FILE_B_ONLY = "File B only (unused promo targets)"
+
+    def __init__(
+        self,
+        file_a_articles: int = 0,
+        file_b_articles: int = 0,
+        only_in_a: Optional[np.ndarray] = None,
+        only_in_b: Optional[np.ndarray] = None,
+    ):
+        self.file_a_articles = file_a_articles
+        self.file_b_articles = file_b_articles
+        self.only_in_a = only_in_a if only_in_a is not None else np.array([], dtype=object)
+        self.only_in_b = only_in_b if only_in_b is not None else np.array([], dtype=object)
+
+    @property
+    def matched(self) -> int:
+        return self.file_a_articles - len(self.only_in_a)
+
+    def _sample(self, articles: np.ndarray) -> str:
+        text = str(articles[: self.MAX_EXAMPLES].tolist())
+        if len(articles) > self.MAX_EXAMPLES:
+            text += f" ... and {len(articles) - self.MAX_EXAMPLES} more"
+        return text
+
+    def messages(self) -> List[str]:
+        """Warnings in the usual wording: match summary (or CRITICAL), then sample unmatched Articles."""
+        if not self.matched:
+            messages = [
+                f"⚠️ CRITICAL: NO Articles from File A matched with File B Sheet1! "
+                f"File A has {self.file_a_articles} unique Articles, "
+                f"File B Sheet1 has {self.file_b_articles} unique Articles. "
+                f"This means NO promotion targets will be applied."
+            ]
+        else:
+            messages = [
+                f"[OK] Article match summary: {self.matched} matched, "
+                f"{len(self.only_in_a)} in File A only, "
+                f"{len(self.only_in_b)} in File B only."
+            ]
+        if len(self.only_in_a):
+            messages.append(f"Articles in File A but not in File B (no promo targets): {self._sample(self.only_in_a)}")
+        if len(self.only_in_b):
+            messages.append(f"Articles in File B but not in File A (unused promo targets): {self._sample(self.only_in_b)}")
+        return messages
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every unmatched Article: Article, Match_Status (File A only first, each sorted)."""
+        return pd.DataFrame({
+            "Article": np.concatenate([self.only_in_a, self.only_in_b]),
+            "Match_Status": [self.FILE_A_ONLY] * len(self.only_in_a) + [self.FILE_B_ONLY] * len(self.only_in_b),
+        })
+
+
+def match_articles(articles_a: pd.Series, articles_b: pd.Series) -> ArticleMatchReport:
+    """
+    Compare the Articles of two files without Python sets: each column is reduced to its
+    unique values (missing values ignored) and the two unique arrays are factorized together
+    with sorted codes, so membership is np.isin on integer codes and the unmatched lists
+    come out sorted from np.unique on those codes.
+    """
+    unique_a = pd.Series(pd.unique(articles_a)).dropna().astype(str)
+    unique_b = pd.Series(pd.unique(articles_b)).dropna().astype(str)
+    codes, dictionary = pd.factorize(pd.concat([unique_a, unique_b], ignore_index=True), sort=True)
+    codes_a, codes_b = codes[: len(unique_a)], codes[len(unique_a):]
+    return ArticleMatchReport(
+        file_a_articles=len(unique_a),
+        file_b_articles=len(unique_b),
+        only_in_a=dictionary.take(np.unique(codes_a[~np.isin(codes_a, codes_b)])).to_numpy(dtype=object),
+        only_in_b=dictionary.take(np.unique(codes_b[~np.isin(codes_b, codes_a)])).to_numpy(dtype=object),
+    )
+
+
+class StageWarnings(list):
+    """
+    Warning messages of a stage (a plain list of str) plus the structured details:
+    numeric (NumericCoercionReport), duplicates (merged keys: Article, Site, Rows),
+    fanout (join keys matching several rows: Join, Key, Left_Rows, Matches) and
+    article_match (ArticleMatchReport of merge_data).
+    """
+
+    def __init__(self, messages: Optional[List[str]] = None, numeric: Optional[NumericCoercionReport] = None):
+        super().__init__(messages or [])
+        self.numeric = numeric if numeric is not None else NumericCoercionReport()
+        self.duplicates = pd.DataFrame(columns=["Article", "Site", "Rows"])
+        self.fanout = pd.DataFrame(columns=["Join", "Key", "Left_Rows", "Matches"])
+        self.article_match = ArticleMatchReport()
+
+
+# Non-blank text accepted as a number by pd.to_numeric (after trimming whitespace)
+_NUMBER_PATTERN = r"(?i)^[+-]?((\d+\.?\d*|\.\d+)(e[+-]?\d+)?|inf(inity)?)$"
+
+
+def _is_text_column(s: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(s) and not pd.api.types.is_object_dtype(s)
+
+
+def _parse_text_columns(columns: List[pd.Series]) -> Tuple[np.ndarray, np.ndarray, List[List[str]]]:
+    """
+    Parse text columns like pd.to_numeric(errors="coerce") in one pass: all columns are
+    stacked into one Arrow string array, trimmed, validated with one regex and cast to float64.
+
+    Returns (values, non_numeric, examples): float64 (columns × rows), the count of
+    non-blank unparseable tokens per column and up to MAX_EXAMPLES of them.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    n = len(columns[0])
+    text = pa.chunked_array([pa.array(s, type=pa.string(), from_pandas=True) for s in columns], type=pa.string())
+    trimmed = pc.utf8_trim_whitespace(text)
+    valid = pc.match_substring_regex(trimmed, _NUMBER_PATTERN)
+    numbers = pc.cast(pc.if_else(valid, trimmed, pa.scalar(None, pa.string())), pa.float64())
+    values = numbers.to_numpy().reshape(len(columns), n) if n else np.empty((len(columns), 0))
+
+    bad = pc.fill_null(pc.and_(pc.invert(valid), pc.not_equal(trimmed, "")), False)
+    bad = bad.to_numpy(zero_copy_only=False).reshape(len(columns), n)
+    non_numeric = bad.sum(axis=1)
+    examples: List[List[str]] = []
+    for i, count in enumerate(non_numeric):
+        if not count:
+            examples.append([])
+            continue
+        tokens = pc.unique(pc.filter(trimmed.slice(i * n, n).combine_chunks(), pa.array(bad[i])))
+        examples.append(tokens.to_pylist()[: NumericCoercionReport.MAX_EXAMPLES])
+    return values, non_numeric, examples
+
+
+def coerce_numeric_columns(
+    df: pd.DataFrame,
+    sources: Dict[str, str],
+    report: NumericCoercionReport,
+    quiet_negatives: Tuple[str, ...] = (),
+    caps: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Batched pd.to_numeric for several columns: {output column: source column} → numeric arrays.
+
+    Blank and non-numeric values become 0, negatives are set to 0 and values above
+    caps[output column] are capped, all on one 2-D (columns × rows) float64 array; text
+    columns are parsed in a single pass (_parse_text_columns). Counts per source column go
+    to report (negatives of quiet_negatives outputs are clipped without being reported).
+    Missing source columns are skipped. Columns holding only integers come back as int64.
+    """
+    caps = caps or {}
+    present = [(out, src) for out, src in sources.items() if src in df.columns]
+    if not present:
+        return {}
+    values = np.empty((len(present), len(df)), dtype="float64")
+    non_numeric = np.zeros(len(present), dtype="int64")
+    examples: List[List[str]] = [[] for _ in present]
+
+    text_rows = [i for i, (_, src) in enumerate(present) if _is_text_column(df[src])]
+    if text_rows:
+        parsed, text_bad, text_examples = _parse_text_columns([df[present[i][1]] for i in text_rows])
+        values[text_rows] = parsed
+        non_numeric[text_rows] = text_bad
+        for i, tokens in zip(text_rows, text_examples):
+            examples[i] = tokens
+    for i, (_, src) in enumerate(present):
+        if i in text_rows:
+            continue
+        s = df[src]
+        parsed = pd.to_numeric(s, errors="coerce")
+        values[i] = parsed.to_numpy(dtype="float64", na_value=np.nan)
+        if not pd.api.types.is_numeric_dtype(s):
+            bad = s.notna() & parsed.isna() & (s.astype(str).str.strip() != "")
+            non_numeric[i] = int(bad.sum())
+            examples[i] = s[bad].astype(str).str.strip().unique()[: NumericCoercionReport.MAX_EXAMPLES].tolist()
+
+    np.nan_to_num(values, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    negatives = (values < 0).sum(axis=1)
+    np.maximum(values, 0.0, out=values)
+    capped = np.zeros(len(present), dtype="int64")
+    for i, (out, _) in enumerate(present):
+        if out in caps:
+            over = values[i] > caps[out]
+            capped[i] = int(over.sum())
+            values[i, over] = caps[out]
+
+    integral = np.isfinite(values).all(axis=1) & (values == np.trunc(values)).all(axis=1)
+    result: Dict[str, np.ndarray] = {}
+    for i, (out, src) in enumerate(present):
+        result[out] = values[i].astype("int64") if integral[i] else values[i].copy()
+        report.add(
+            src,
+            non_numeric=non_numeric[i],
+            negatives=0 if out in quiet_negatives else negatives[i],
+            capped=capped[i],
+            cap=caps.get(out),
+            examples=examples[i],
+        )
+    return result
+
+
+# Compact working-frame schema (Config.COMPACT_DTYPES)
+SCHEMA_CATEGORY_COLUMNS: List[str] = ["Site", "RP_Type", "Target_Type", "Group_No", "Dispatch_Type"]
+SCHEMA_INT32_COLUMNS: List[str] = [
+    "SaSa_Net_Stock",
+    "Pending_Received",
+    "Safety_Stock",
+    "MOQ",
+    "In_Quality_Insp",
+    "Blocked",
+    "Last_Month_Sold_Qty",
+    "Last_Month_Sold_Qty_capped",
+    "Supply_source",
+    "SKU_Target",
+    "Promotion_Days",
+    "Promo_Target_Cover_Days",
+    "Suggested_Dispatch_Qty",
+    "Suggested_DN_Qty",
+    "Target_Dispatch",
+]
+SCHEMA_FLOAT32_COLUMNS: List[str] = ["Pct_HK", "Pct_MO", "Pct_ALL", "Site_Target_%"]
+
+_INT32_INFO = np.iinfo(np.int32)
+
+
+def apply_compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the known working columns to the compact schema in place and return df.
+
+    Downcasts are lossless only, so calculations give identical results:
+    - int32 when every value is a finite integer within range (no NaN)
+    - float32 when every value round-trips exactly (e.g. 0.5, 0.25; not 0.3)
+    Columns that are absent or would lose precision keep their dtype.
+    """
+    for col in SCHEMA_CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    for col in SCHEMA_INT32_COLUMNS:
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if s.dtype == np.int32 or s.dtype == bool or not pd.api.types.is_numeric_dtype(s):
+            continue
+        values = s.to_numpy(dtype="float64", na_value=np.nan)
+        if not np.isfinite(values).all() or not (values == np.trunc(values)).all():
+            continue
+        if len(values) and (values.min() < _INT32_INFO.min or values.max() > _INT32_INFO.max):
+            continue
+        df[col] = values.astype("int32")
+
+    for col in SCHEMA_FLOAT32_COLUMNS:
+        if col not in df.columns or df[col].dtype != np.float64:
+            continue
+        values = df[col].to_numpy()
+        as_float32 = values.astype("float32")
+        if np.array_equal(as_float32.astype("float64"), values, equal_nan=True):
+            df[col] = as_float32
+
+    return df
+
+
+def _finish_stage(df: pd.DataFrame, config: Config) -> pd.DataFrame:
+    """Apply the compact schema to a stage's output frame when Config.COMPACT_DTYPES is on."""
+    if config.COMPACT_DTYPES:
+        apply_compact_schema(df)
+    return df
+
+
+def copy_on_write_active() -> bool:
+    """
+    True when pandas copy-on-write is on (always in pandas >= 3, opt-in in pandas 2).
+    pandas 2.2's "warn" mode only reports would-be changes, so it counts as off.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return getattr(pd.options.mode, "copy_on_write", False) is True
+
+
+def _stage_frame(df: pd.DataFrame, copy_free: bool) -> pd.DataFrame:
+    """
+    Working frame owned by a stage: changes never reach the caller's frame. Under
+    copy-on-write (Config.COPY_FREE_PIPELINE) this is a shallow copy and a column's data is
+    only duplicated when the stage writes into it; otherwise a full copy.
+    """
+    if copy_free and copy_on_write_active():
+        return df.copy(deep=False)
+    return df.copy()
+
+
+def memory_usage_report(stages: List[Tuple[str, pd.DataFrame]]) -> pd.DataFrame:
+    """Rows, columns and deep memory usage (MB) of each stage's output frame."""
+    return pd.DataFrame(
+        [
+            {
+                "Stage": name,
+                "Rows": len(frame),
+                "Columns": frame.shape[1],
+                "Memory_MB": round(frame.memory_usage(deep=True).sum() / (1024 * 1024), 2),
+            }
+            for name, frame in stages
+        ]
+    )
+
+
+# File A dedup on (Article, Site): additive quantities are summed; every other column,
+# including MOQ / Safety_Stock / RP_Type / Supply_source (properties of the SKU-Site), takes
+# its first non-missing value
+FILE_A_SUM_COLUMNS: List[str] = [
+    "SaSa_Net_Stock",
+    "Pending_Received",
+    "Last_Month_Sold_Qty",
+    "Last_Month_Sold_Qty_capped",
+    "In_Quality_Insp",
+    "Blocked",
+]
+
+
+def _factorize_keys(df: pd.DataFrame, key_cols: List[str]) -> Tuple[np.ndarray, int]:
+    """
+    Group code of every row for the key columns, hashing each key column once.
+    Codes are numbered in sorted key order (missing keys last), like groupby(sort=True).
+    """
+    combined = np.zeros(len(df), dtype="int64")
+    for col in key_cols:
+        codes, uniques = pd.factorize(df[col], sort=True, use_na_sentinel=False)
+        combined = combined * len(uniques) + codes
+    codes, uniques = pd.factorize(combined, sort=True)
+    return codes, len(uniques)
+
+
+def _group_starts(sorted_codes: np.ndarray) -> np.ndarray:
+    """Positions where a new group begins in an array of sorted group codes."""
+    if not len(sorted_codes):
+        return np.zeros(0, dtype="int64")
+    return np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+
+def aggregate_duplicate_keys(
+    df: pd.DataFrame,
+    key_cols: List[str],
+    sum_cols: List[str],
+    count_col: Optional[str] = None,
+    force: bool = False,
+    source_cols: Optional[Dict[str, str]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Merge rows that share a key: sum_cols are summed, every other column keeps its first
+    non-missing value (groupby "first" semantics), so optional and descriptive columns
+    survive. The key is factorized once and the group codes serve duplicate detection,
+    the sums (np.add.reduceat) and the "first" row lookups.
+
+    count_col: optional column of row counts carried by already merged rows (summed).
+    source_cols: summed column → the raw input column it was parsed from; on merged keys
+    the raw column takes the summed value, so both show the same quantity.
+    Without duplicates df is returned unchanged, unless force; otherwise one row per key,
+    sorted by key, with the columns of df in their original order.
+
+    Returns (df, merged): merged lists the keys built from more than one row
+    (key columns + Rows).
+    """
+    codes, n_groups = _factorize_keys(df, key_cols)
+    order = np.argsort(codes, kind="stable")
+    starts = _group_starts(codes[order])
+    if count_col is not None:
+        rows = np.add.reduceat(df[count_col].to_numpy()[order], starts) if len(df) else starts
+    else:
+        rows = np.diff(np.r_[starts, len(df)])
+    first_rows = order[starts]
+    merged = df[key_cols].iloc[first_rows[rows > 1]].reset_index(drop=True)
+    merged["Rows"] = rows[rows > 1]
+    if n_groups == len(df) and not force:
+        return df, merged
+
+    sums = set(sum_cols) | ({count_col} if count_col is not None else set())
+    out: Dict[Any, Any] = {}
+    for col in df.columns:
+        s = df[col]
+        if col in sums:
+            out[col] = np.add.reduceat(s.to_numpy()[order], starts) if len(df) else s.to_numpy()
+            continue
+        take_rows = first_rows
+        missing = s.isna().to_numpy()
+        if missing.any():
+            # First non-missing row of each group; all-missing groups keep their first row
+            valid = order[~missing[order]]
+            valid_starts = _group_starts(codes[valid])
+            take_rows = first_rows.copy()
+            take_rows[codes[valid[valid_starts]]] = valid[valid_starts]
+        out[col] = s.array.take(take_rows)
+
+    multi = rows > 1
+    for sum_col, source in (source_cols or {}).items():
+        if multi.any() and sum_col in out and source in out and source not in sums:
+            out[source] = _with_merged_values(df[source], out[source], multi, out[sum_col][multi])
+    return pd.DataFrame(out, columns=df.columns), merged
+
+
+def _with_merged_values(source: pd.Series, values: Any, multi: np.ndarray, summed: np.ndarray) -> Any:
+    """values of a raw column with the merged keys (multi) replaced by their summed quantity."""
+    if pd.api.types.is_numeric_dtype(source):
+        result = np.asarray(values, dtype="float64").copy()
+        result[multi] = summed
+        return result
+    result = np.asarray(values, dtype=object).copy()
+    result[multi] = [str(int(v)) if float(v).is_integer() else str(v) for v in summed]
+    return pd.array(result, dtype=source.dtype)
+
+
+def _file_a_sum_sources(config: Config) -> Dict[str, str]:
+    """Summed File A quantities → their raw File A columns."""
+    return {
+        "SaSa_Net_Stock": config.COL_A_NET_STOCK,
+        "Pending_Received": config.COL_A_PENDING,
+        "Last_Month_Sold_Qty": config.COL_A_LAST_MONTH_SOLD,
+        "In_Quality_Insp": config.COL_A_IN_QLTY,
+        "Blocked": config.COL_A_BLOCKED,
+    }
+
+
+def _duplicates_warning(merged: pd.DataFrame) -> str:
+    sample = list(merged.iloc[:5, :2].itertuples(index=False, name=None))
+    return (
+        f"Duplicates found in File A on (Article, Site): {len(merged)} keys merged from "
+        f"{int(merged['Rows'].sum())} rows; quantities summed, other columns keep the first value. "
+        f"e.g. {sample}"
+    )
+
+
+def _check_file_a_columns(columns: Any, config: Config) -> None:
+    required_cols = file_a_required_columns(config)
+    missing = [c for c in required_cols if c not in columns]
+    if missing:
+        raise ValueError(f"File A missing required columns: {missing}")
+
+
+def _normalize_file_a(df: pd.DataFrame, config: Config) -> NumericCoercionReport:
+    """Add the normalized File A working columns to df in place (no dedup, no rename)."""
+    report = NumericCoercionReport()
+
+    # Trim Article, Site
+    df[config.COL_A_ARTICLE] = df[config.COL_A_ARTICLE].astype(str).str.strip()
+    df[config.COL_A_SITE] = df[config.COL_A_SITE].astype(str).str.strip().str.upper()
+
+    # Normalize numeric columns in one batch: blanks / non-numeric → 0, negatives → 0,
+    # Last Month Sold Qty capped. Supply source negatives are clipped without a warning.
+    numeric = coerce_numeric_columns(
+        df,
+        {
+            "SaSa_Net_Stock": config.COL_A_NET_STOCK,
+            "Pending_Received": config.COL_A_PENDING,
+            "Safety_Stock": config.COL_A_SAFETY,
+            "Last_Month_Sold_Qty": config.COL_A_LAST_MONTH_SOLD,
+            "MOQ": config.COL_A_MOQ,
+            "Supply_source": config.COL_A_SUPPLY_SOURCE,
+            "In_Quality_Insp": config.COL_A_IN_QLTY,
+            "Blocked": config.COL_A_BLOCKED,
+        },
+        report,
+        quiet_negatives=("Supply_source",),
+        caps={"Last_Month_Sold_Qty": config.LAST_MONTH_SOLD_CAP},
+    )
+    for col in ["SaSa_Net_Stock", "Pending_Received", "Safety_Stock", "Last_Month_Sold_Qty", "MOQ", "Supply_source"]:
+        df[col] = numeric[col]
+
+    # In Quality Insp, Blocked as optional
+    df["In_Quality_Insp"] = numeric.get("In_Quality_Insp", 0)
+    df["Blocked"] = numeric.get("Blocked", 0)
+
+    # Launch Date processing
+    if config.COL_A_LAUNCH_DATE in df.columns:
+        df["Launch_Date"] = df[config.COL_A_LAUNCH_DATE].fillna("").astype(str).str.strip()
+    else:
+        df["Launch_Date"] = ""
+
+    df["Last_Month_Sold_Qty_capped"] = df["Last_Month_Sold_Qty"]
+
+    # RP Type normalization
+    df["RP_Type"] = df[config.COL_A_RP_TYPE].fillna("").astype(str).str.strip().str.upper()
+
+    return report
+
+
+def _rename_file_a(df: pd.DataFrame, config: Config) -> pd.DataFrame:
+    """Rename for unified downstream schema"""
+    return df.rename(
+        columns={
+            config.COL_A_ARTICLE: "Article",
+            config.COL_A_SITE: "Site",
+        }
+    )
+
+
+# Launch Date text formats, tried in order: SAP exports (YYYYMMDD, DD.MM.YYYY, ...) and
+# Excel date cells read as text ("YYYY-MM-DD HH:MM:SS"). Plain numbers are Excel serial dates.
+LAUNCH_DATE_FORMATS: List[str] = [
+    "%Y%m%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d.%m.%Y",
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+]
+
+_EXCEL_SERIAL_PATTERN = r"^\d{1,7}(?:\.\d*)?$"
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+_EXCEL_MAX_SERIAL = 2958465  # 9999-12-31
+
+
+def parse_launch_dates(values: pd.Series) -> pd.Series:
+    """
+    Launch Date text as datetime64[ns] dates (time of day dropped); blank or
+    unrecognised values are NaT. Each distinct value is parsed once.
+    """
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype="str").str.strip()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+
+    serial = text.str.fullmatch(_EXCEL_SERIAL_PATTERN).fillna(False).to_numpy(dtype=bool)
+    if serial.any():
+        days = pd.to_numeric(text[serial]).to_numpy(dtype="float64")
+        days = np.where((days >= 1) & (days <= _EXCEL_MAX_SERIAL), np.floor(days), np.nan)
+        parsed[serial] = _EXCEL_EPOCH + pd.to_timedelta(days, unit="D")
+
+    for fmt in LAUNCH_DATE_FORMATS:
+        todo = parsed.isna().to_numpy() & ~serial
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce").dt.normalize()
+
+    dates = parsed.to_numpy(dtype="datetime64[ns]")
+    out = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    found = codes >= 0
+    out[found] = dates[codes[found]]
+    return pd.Series(out, index=values.index, name="Launch_Date_Parsed")
 
 
-def to_numeric(series: pd.Series, col_name: str, warnings: List[str]) -> pd.Series:
+def _add_launch_date_columns(df: pd.DataFrame) -> None:
+    """Launch_Date_Parsed (datetime64) and Is_New_SKU (blank Launch Date) from the Launch_Date text, in place."""
+    df["Launch_Date_Parsed"] = parse_launch_dates(df["Launch_Date"])
+    df["Is_New_SKU"] = _blank_launch_date_mask(df)
+
+
+def launched_within_days(df: pd.DataFrame, days: int, as_of: Any = None) -> np.ndarray:
     """
-    Convert to numeric, coerce errors to 0, negative to 0.
+    True where the Launch Date lies within the last `days` days up to as_of (default today).
+    Uses Launch_Date_Parsed when present; blank or unparsed dates are False.
     """
-    s = pd.to_numeric(series, errors="coerce").fillna(0)
-    negatives = (s < 0).sum()
-    if negatives > 0:
-        warnings.append(f"{col_name}: {negatives} negative values set to 0")
-        s = s.clip(lower=0)
-    return s
+    if "Launch_Date_Parsed" in df.columns:
+        dates = df["Launch_Date_Parsed"]
+    elif "Launch_Date" in df.columns:
+        dates = parse_launch_dates(df["Launch_Date"])
+    else:
+        return np.zeros(len(df), dtype=bool)
+    end = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    values = dates.to_numpy(dtype="datetime64[ns]")
+    start = np.datetime64(end - pd.Timedelta(days=days), "ns")
+    return (values >= start) & (values <= np.datetime64(end, "ns"))
 
 
 def prepare_file_a(df_a_raw: pd.DataFrame, config: Config) -> Tuple[pd.DataFrame, List[str]]:
@@ -147,113 +1246,218 @@ def prepare_file_a(df_a_raw: pd.DataFrame, config: Config) -> Tuple[pd.DataFrame
     - Supply_source
     - In_Quality_Insp (optional, default 0)
     - Blocked (optional, default 0)
+    - Launch_Date (text), Launch_Date_Parsed (datetime64), Is_New_SKU (blank Launch Date)
     """
-    warnings: List[str] = []
+    # Basic column existence checks
+    _check_file_a_columns(df_a_raw.columns, config)
 
-    df = df_a_raw.copy()
+    df = _stage_frame(df_a_raw, config.COPY_FREE_PIPELINE)
+    report = _normalize_file_a(df, config)
+    warnings = StageWarnings(report.messages(), report)
 
-    # Basic column existence checks
-    required_cols = [
-        config.COL_A_ARTICLE,
-        config.COL_A_SITE,
-        config.COL_A_RP_TYPE,
-        config.COL_A_NET_STOCK,
-        config.COL_A_PENDING,
-        config.COL_A_SAFETY,
-        config.COL_A_LAST_MONTH_SOLD,
-        config.COL_A_MOQ,
-        config.COL_A_SUPPLY_SOURCE,
-    ]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        raise ValueError(f"File A missing required columns: {missing}")
+    # Deduplicate by (Article, Site): sum quantities, first value for everything else
+    # For RP_Type, Supply_source: take the first non-null; in real system use stricter validation.
+    key_cols = [config.COL_A_ARTICLE, config.COL_A_SITE]
+    df, merged = aggregate_duplicate_keys(df, key_cols, FILE_A_SUM_COLUMNS, source_cols=_file_a_sum_sources(config))
+    if len(merged):
+        warnings.append(_duplicates_warning(merged))
+        warnings.duplicates = _rename_file_a(merged, config)
 
-    # Trim Article, Site
-    df[config.COL_A_ARTICLE] = df[config.COL_A_ARTICLE].astype(str).str.strip()
-    df[config.COL_A_SITE] = df[config.COL_A_SITE].astype(str).str.strip().str.upper()
+    df = _rename_file_a(df, config)
+    _add_launch_date_columns(df)
 
-    # Normalize numeric columns
-    df["SaSa_Net_Stock"] = to_numeric(df[config.COL_A_NET_STOCK], config.COL_A_NET_STOCK, warnings)
-    df["Pending_Received"] = to_numeric(df[config.COL_A_PENDING], config.COL_A_PENDING, warnings)
-    df["Safety_Stock"] = to_numeric(df[config.COL_A_SAFETY], config.COL_A_SAFETY, warnings)
-    df["Last_Month_Sold_Qty"] = to_numeric(
-        df[config.COL_A_LAST_MONTH_SOLD], config.COL_A_LAST_MONTH_SOLD, warnings
-    )
-    df["MOQ"] = to_numeric(df[config.COL_A_MOQ], config.COL_A_MOQ, warnings)
+    return _finish_stage(df, config), warnings
 
-    # Supply source: normalize robustly; keep as numeric (float) to avoid NaN→int issues during apply()
-    supply_raw = pd.to_numeric(df[config.COL_A_SUPPLY_SOURCE], errors="coerce")
-    supply_raw = supply_raw.fillna(0)
-    # Negative or weird values → 0
-    supply_raw = supply_raw.clip(lower=0)
-    df["Supply_source"] = supply_raw
 
-    # In Quality Insp, Blocked as optional
-    if config.COL_A_IN_QLTY in df.columns:
-        df["In_Quality_Insp"] = to_numeric(df[config.COL_A_IN_QLTY], config.COL_A_IN_QLTY, warnings)
-    else:
-        df["In_Quality_Insp"] = 0
+def _promo_scope_mask(articles: pd.Series, promo_articles: pd.Index) -> np.ndarray:
+    """
+    True for File A rows whose Article (stripped, as in prepare_file_a) is a promo Article.
+    Only the distinct codes are stripped and looked up, then mapped back to the rows.
+    """
+    codes, uniques = pd.factorize(articles)
+    in_scope = pd.Index(uniques).astype(str).str.strip().isin(promo_articles)
+    return np.append(in_scope, False)[codes]  # code -1 (missing Article) is out of scope
 
-    if config.COL_A_BLOCKED in df.columns:
-        df["Blocked"] = to_numeric(df[config.COL_A_BLOCKED], config.COL_A_BLOCKED, warnings)
-    else:
-        df["Blocked"] = 0
 
-    # Launch Date processing
+def _promo_article_index(promo_articles: Any) -> pd.Index:
+    return pd.Index(pd.Series(promo_articles, dtype=object).astype(str).str.strip().unique())
+
+
+def _file_a_passthrough(df_raw: pd.DataFrame, config: Config) -> pd.DataFrame:
+    """
+    Out-of-scope File A rows in the prepare_file_a column layout for the Final Order Report:
+    Article / Site trimmed, the working quantity columns parsed as numbers, no checks,
+    capping or dedup.
+    """
+    df = _stage_frame(df_raw, config.COPY_FREE_PIPELINE)
+    df[config.COL_A_ARTICLE] = df[config.COL_A_ARTICLE].astype(str).str.strip()
+    df[config.COL_A_SITE] = df[config.COL_A_SITE].astype(str).str.strip().str.upper()
+    sources = {
+        "SaSa_Net_Stock": config.COL_A_NET_STOCK,
+        "Pending_Received": config.COL_A_PENDING,
+        "Safety_Stock": config.COL_A_SAFETY,
+        "Last_Month_Sold_Qty": config.COL_A_LAST_MONTH_SOLD,
+        "Last_Month_Sold_Qty_capped": config.COL_A_LAST_MONTH_SOLD,
+        "MOQ": config.COL_A_MOQ,
+        "Supply_source": config.COL_A_SUPPLY_SOURCE,
+        "In_Quality_Insp": config.COL_A_IN_QLTY,
+        "Blocked": config.COL_A_BLOCKED,
+    }
+    for col, source in sources.items():
+        if source in df.columns:
+            df[col] = pd.to_numeric(df[source], errors="coerce")
     if config.COL_A_LAUNCH_DATE in df.columns:
         df["Launch_Date"] = df[config.COL_A_LAUNCH_DATE].fillna("").astype(str).str.strip()
-    else:
-        df["Launch_Date"] = ""
+        _add_launch_date_columns(df)
+    df["RP_Type"] = df[config.COL_A_RP_TYPE].fillna("").astype(str).str.strip().str.upper()
+    return _rename_file_a(df, config)
+
 
-    # Cap Last Month Sold Qty
-    capped_mask = df["Last_Month_Sold_Qty"] > config.LAST_MONTH_SOLD_CAP
-    capped_count = int(capped_mask.sum())
-    if capped_count > 0:
-        df.loc[capped_mask, "Last_Month_Sold_Qty"] = config.LAST_MONTH_SOLD_CAP
-        warnings.append(
-            f"Last Month Sold Qty: {capped_count} values capped at {config.LAST_MONTH_SOLD_CAP}"
+def split_promo_scope(
+    df_a_raw: pd.DataFrame,
+    promo_articles: Any,
+    config: Config,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], List[str]]:
+    """
+    Promo-scope pushdown (Config.PROMO_SCOPE_ONLY): keep the raw File A rows whose Article
+    is in File B Sheet 1, so prepare_file_a / merge_data / calculate_demand only see those.
+
+    Returns (in_scope_raw, passthrough, warnings). passthrough holds the other rows in the
+    prepare_file_a layout for export_to_excel, or None when Config.PROMO_SCOPE_PASSTHROUGH is off.
+    """
+    _check_file_a_columns(df_a_raw.columns, config)
+    mask = _promo_scope_mask(df_a_raw[config.COL_A_ARTICLE], _promo_article_index(promo_articles))
+    in_scope = df_a_raw[mask]
+    passthrough = None
+    if config.PROMO_SCOPE_PASSTHROUGH:
+        passthrough = _file_a_passthrough(df_a_raw[~mask], config)
+    warnings = [_promo_scope_warning(len(in_scope), len(df_a_raw), passthrough is not None)]
+    return in_scope, passthrough, warnings
+
+
+def _promo_scope_warning(kept: int, total: int, passthrough: bool) -> str:
+    return (
+        f"Promo scope: {kept} of {total} File A rows have File B Sheet1 Articles and are "
+        f"calculated; {total - kept} rows "
+        + ("passed through to Final Order Report." if passthrough else "skipped.")
+    )
+
+
+def iter_file_a_chunks(file_a_source: Any, config: Config, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """File A (located sheet of a workbook, or a CSV / Parquet / Arrow table) as text frames of chunk_rows rows."""
+    projection = file_a_columns(config) if config.PROJECT_FILE_A_COLUMNS else None
+    compression = detect_compression(file_a_source)
+    if compression in STREAM_COMPRESSIONS and compressed_input_format(file_a_source, compression) == "csv":
+        # gzip / Zstandard CSV: decompressed on the fly, chunk by chunk
+        return iter_table_chunks(file_a_source, "csv", chunk_rows, columns=projection, compression=compression)
+    file_a_source = decompress_input(file_a_source, config.FILE_A_MEMBER_PATTERN, label="File A")
+    fmt = detect_input_format(file_a_source)
+    if fmt == "excel":
+        sheet, header_row = locate_header(
+            file_a_source, file_a_required_columns(config), config, config.FILE_A_SHEET, label="File A"
+        )
+        return iter_workbook_chunks(
+            file_a_source, sheet, chunk_rows, label="File A", columns=projection, header_row=header_row
         )
+    return iter_table_chunks(file_a_source, fmt, chunk_rows, columns=projection)
 
-    df["Last_Month_Sold_Qty_capped"] = df["Last_Month_Sold_Qty"]
 
-    # RP Type normalization
-    df["RP_Type"] = df[config.COL_A_RP_TYPE].fillna("").astype(str).str.strip().str.upper()
+def prepare_file_a_chunked(
+    file_a_source: Any,
+    config: Config,
+    promo_articles: Optional[Any] = None,
+    chunk_rows: Optional[int] = None,
+    out_of_scope: Optional[List[pd.DataFrame]] = None,
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Streaming version of read + prepare_file_a for very large File A extracts.
+
+    File A is read in chunks of chunk_rows rows (default Config.FILE_A_CHUNK_ROWS). Each
+    chunk is normalized and its duplicate (Article, Site) rows merged on their own; the
+    partial results are merged again after the last chunk with the same sum / first rules
+    (a hidden row count keeps track of the merged rows). The result equals
+    prepare_file_a on the whole sheet.
+
+    promo_articles: optional File B Sheet 1 Articles; rows of other Articles are dropped
+    before normalization (promo-scope pushdown).
+    out_of_scope: optional list collecting the dropped rows as passthrough frames
+    (see split_promo_scope).
+    """
+    chunk_rows = chunk_rows or config.FILE_A_CHUNK_ROWS
+    wanted = _promo_article_index(promo_articles) if promo_articles is not None else None
 
-    # Deduplicate by (Article, Site): sum numeric fields if duplicates
     key_cols = [config.COL_A_ARTICLE, config.COL_A_SITE]
-    group_fields_sum = [
-        "SaSa_Net_Stock",
-        "Pending_Received",
-        "Safety_Stock",
-        "Last_Month_Sold_Qty",
-        "Last_Month_Sold_Qty_capped",
-        "MOQ",
-        "In_Quality_Insp",
-        "Blocked",
-    ]
-    # For RP_Type, Supply_source: take the first non-null; in real system use stricter validation.
-    # MOQ and Safety_Stock are properties of the SKU-Site, not additive — use "first" instead of "sum".
-    if df.duplicated(key_cols).any():
-        warnings.append("Duplicates found in File A on (Article, Site); aggregated by sum for numerics.")
-        agg_map = {col: "sum" for col in group_fields_sum}
-        agg_map["MOQ"] = "first"
-        agg_map["Safety_Stock"] = "first"
-        agg_map["RP_Type"] = "first"
-        agg_map["Supply_source"] = "first"
-        df = (
-            df.groupby(key_cols, as_index=False)
-            .agg(agg_map)
+    report = NumericCoercionReport()
+    frames: List[pd.DataFrame] = []
+    empty: Optional[pd.DataFrame] = None
+    merged = False
+    checked = False
+    total_rows = kept_rows = 0
+    for chunk in iter_file_a_chunks(file_a_source, config, chunk_rows):
+        if not checked:
+            _check_file_a_columns(chunk.columns, config)
+            checked = True
+        total_rows += len(chunk)
+        if wanted is not None:
+            mask = _promo_scope_mask(chunk[config.COL_A_ARTICLE], wanted)
+            if out_of_scope is not None and not mask.all():
+                out_of_scope.append(_file_a_passthrough(chunk[~mask], config))
+            chunk = _stage_frame(chunk[mask], config.COPY_FREE_PIPELINE)
+        kept_rows += len(chunk)
+        if chunk.empty:
+            empty = chunk
+            continue
+
+        report.merge(_normalize_file_a(chunk, config))
+        chunk["_Rows"] = 1
+        chunk, chunk_merged = aggregate_duplicate_keys(
+            chunk, key_cols, FILE_A_SUM_COLUMNS, count_col="_Rows", source_cols=_file_a_sum_sources(config)
         )
-
-    # Rename for unified downstream schema
-    df = df.rename(
-        columns={
-            config.COL_A_ARTICLE: "Article",
-            config.COL_A_SITE: "Site",
-        }
+        merged = merged or len(chunk_merged) > 0
+        frames.append(chunk)
+
+    if not checked:
+        raise ValueError("File A has no data rows")
+    if not frames:
+        # Nothing in scope: an empty frame with the normalized columns
+        _normalize_file_a(empty, config)
+        empty["_Rows"] = 1
+        frames = [empty]
+
+    warnings = StageWarnings(report.messages(), report)
+    if wanted is not None:
+        warnings.insert(0, _promo_scope_warning(kept_rows, total_rows, out_of_scope is not None))
+    df = pd.concat(frames, ignore_index=True)
+    del frames
+    # Chunks that merged rows are sorted by key: re-sort across chunks like prepare_file_a
+    df, merged_keys = aggregate_duplicate_keys(
+        df, key_cols, FILE_A_SUM_COLUMNS, count_col="_Rows", force=merged, source_cols=_file_a_sum_sources(config)
     )
+    df = df.drop(columns="_Rows")
+    if len(merged_keys):
+        warnings.append(_duplicates_warning(merged_keys))
+        warnings.duplicates = _rename_file_a(merged_keys, config)
 
-    return df, warnings
+    df = _rename_file_a(df, config)
+    _add_launch_date_columns(df)
+
+    return _finish_stage(df, config), warnings
+
+
+def target_type_columns(columns: Any, config: Config) -> Dict[str, str]:
+    """
+    Target type → Sheet 2 percentage column: HK / MO / ALL from Config.COL_B2_*, then every
+    other column whose header matches Config.COL_B2_TARGET_PATTERN (type upper-cased).
+    """
+    types = {"HK": config.COL_B2_HK, "MO": config.COL_B2_MO, "ALL": config.COL_B2_ALL}
+    pattern = re.compile(config.COL_B2_TARGET_PATTERN)
+    for col in columns:
+        if col in types.values():
+            continue
+        match = pattern.fullmatch(str(col).strip())
+        if match:
+            types.setdefault(match.group(1).strip().upper(), col)
+    return types
 
 
 def prepare_file_b(
@@ -276,8 +1480,9 @@ def prepare_file_b(
     - Pct_HK
     - Pct_MO
     - Pct_ALL
+    - Pct_<TYPE> for further target types (see target_type_columns)
     """
-    warnings: List[str] = []
+    report = NumericCoercionReport()
 
     # Sheet 1 checks
     required_b1 = [
@@ -289,40 +1494,30 @@ def prepare_file_b(
     if missing_b1:
         raise ValueError(f"File B Sheet1 missing required columns: {missing_b1}")
 
-    df_b1 = df_b1_raw.copy()
+    df_b1 = _stage_frame(df_b1_raw, config.COPY_FREE_PIPELINE)
     df_b1[config.COL_B1_ARTICLE] = df_b1[config.COL_B1_ARTICLE].astype(str).str.strip()
     df_b1[config.COL_B1_GROUP_NO] = df_b1[config.COL_B1_GROUP_NO].astype(str).str.strip()
 
-    df_b1["SKU_Target"] = to_numeric(df_b1[config.COL_B1_SKU_TARGET], config.COL_B1_SKU_TARGET, warnings)
+    # SKU Target, Target Cover Days and Promotion Days (optional) in one batch;
+    # zero / negative days are treated as "not provided" (0)
+    numeric = coerce_numeric_columns(
+        df_b1,
+        {
+            "SKU_Target": config.COL_B1_SKU_TARGET,
+            "Promo_Target_Cover_Days": config.COL_B1_TARGET_COVER_DAYS,
+            "Promotion_Days": config.COL_B1_PROMO_DAYS,
+        },
+        report,
+    )
+    df_b1["SKU_Target"] = numeric["SKU_Target"]
 
     if config.COL_B1_TARGET_TYPE in df_b1.columns:
         df_b1["Target_Type"] = df_b1[config.COL_B1_TARGET_TYPE].astype(str).str.strip().str.upper()
     else:
         df_b1["Target_Type"] = "ALL"
 
-    # Target Cover Days (optional)
-    if config.COL_B1_TARGET_COVER_DAYS in df_b1.columns:
-        df_b1["Promo_Target_Cover_Days"] = to_numeric(
-            df_b1[config.COL_B1_TARGET_COVER_DAYS],
-            config.COL_B1_TARGET_COVER_DAYS,
-            warnings,
-        )
-        # zero treated as "not provided"
-        df_b1.loc[df_b1["Promo_Target_Cover_Days"] <= 0, "Promo_Target_Cover_Days"] = 0
-    else:
-        df_b1["Promo_Target_Cover_Days"] = 0
-    
-    # Promotion Days (optional)
-    if config.COL_B1_PROMO_DAYS in df_b1.columns:
-        df_b1["Promotion_Days"] = to_numeric(
-            df_b1[config.COL_B1_PROMO_DAYS],
-            config.COL_B1_PROMO_DAYS,
-            warnings,
-        )
-        # zero treated as "not provided"
-        df_b1.loc[df_b1["Promotion_Days"] <= 0, "Promotion_Days"] = 0
-    else:
-        df_b1["Promotion_Days"] = 0
+    df_b1["Promo_Target_Cover_Days"] = numeric.get("Promo_Target_Cover_Days", 0)
+    df_b1["Promotion_Days"] = numeric.get("Promotion_Days", 0)
 
     df_b1 = df_b1.rename(
         columns={
@@ -351,24 +1546,124 @@ def prepare_file_b(
     if missing_b2:
         raise ValueError(f"File B Sheet2 missing required columns: {missing_b2}")
 
-    df_b2 = df_b2_raw.copy()
+    df_b2 = _stage_frame(df_b2_raw, config.COPY_FREE_PIPELINE)
     df_b2[config.COL_B2_SITE] = df_b2[config.COL_B2_SITE].astype(str).str.strip().str.upper()
 
     def pct_col(col: str) -> pd.Series:
-        s = pd.to_numeric(df_b2[col], errors="coerce").fillna(0.0)
+        s = pd.to_numeric(df_b2[col], errors="coerce").astype("float64").fillna(0.0)
         # Accept both 0-1 and 0-100; treat >1 as percentage
-        mask_pct = s > 1
-        if mask_pct.any():
-            s.loc[mask_pct] = s.loc[mask_pct] / 100.0
-        return s
+        return s.where(s <= 1, s / 100.0)
 
-    df_b2["Pct_HK"] = pct_col(config.COL_B2_HK)
-    df_b2["Pct_MO"] = pct_col(config.COL_B2_MO)
-    df_b2["Pct_ALL"] = pct_col(config.COL_B2_ALL)
+    for target_type, col in target_type_columns(df_b2.columns, config).items():
+        df_b2[f"Pct_{target_type}"] = pct_col(col)
 
     df_b2 = df_b2.rename(columns={config.COL_B2_SITE: "Site"})
 
-    return df_b1, df_b2, warnings
+    warnings = StageWarnings(report.messages(), report)
+    return _finish_stage(df_b1, config), _finish_stage(df_b2, config), warnings
+
+
+def plan_left_join(left_keys: pd.Series, right_keys: pd.Series) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """
+    Row positions of a left join on one key column, computed on integer codes before any
+    joined frame is built.
+
+    The right keys are factorized into the shared dictionary; the left keys are factorized
+    and only their distinct values are looked up in it. Like DataFrame.merge(how="left"),
+    each left row takes every matching right row (in right order), or one row with no
+    match (right position -1), and missing keys match missing keys.
+
+    Returns (left_rows, right_rows, fanout): fanout lists the keys matched by more than one
+    right row (Key, Left_Rows, Matches), so the output size len(left_rows) is known upfront.
+    """
+    right_codes, dictionary = pd.factorize(right_keys, use_na_sentinel=False)
+    left_unique_codes, left_uniques = pd.factorize(left_keys, use_na_sentinel=False)
+    lookup = pd.Index(np.asarray(dictionary, dtype=object)).get_indexer(np.asarray(left_uniques, dtype=object))
+    left_codes = lookup[left_unique_codes]
+
+    counts = np.bincount(right_codes, minlength=len(dictionary))
+    matched = left_codes >= 0
+    matches = np.zeros(len(left_codes), dtype=np.int64)
+    matches[matched] = counts[left_codes[matched]]
+
+    multi_codes, multi_rows = np.unique(left_codes[matches > 1], return_counts=True)
+    fanout = pd.DataFrame({
+        "Key": np.asarray(dictionary, dtype=object)[multi_codes],
+        "Left_Rows": multi_rows,
+        "Matches": counts[multi_codes],
+    })
+
+    if not len(fanout):
+        # At most one match per row: the left order is kept as is
+        first_right = np.full(len(dictionary), -1, dtype=np.int64)
+        first_right[right_codes[::-1]] = np.arange(len(right_codes))[::-1]
+        right_rows = np.full(len(left_codes), -1, dtype=np.int64)
+        right_rows[matched] = first_right[left_codes[matched]]
+        return np.arange(len(left_codes)), right_rows, fanout
+
+    out_counts = np.maximum(matches, 1)
+    left_rows = np.repeat(np.arange(len(left_codes)), out_counts)
+    order = np.argsort(right_codes, kind="stable")
+    offsets = np.cumsum(counts) - counts
+    within = np.arange(len(left_rows)) - np.repeat(np.cumsum(out_counts) - out_counts, out_counts)
+    codes = left_codes[left_rows]
+    right_rows = np.full(len(left_rows), -1, dtype=np.int64)
+    hit = codes >= 0
+    right_rows[hit] = order[offsets[codes[hit]] + within[hit]]
+    return left_rows, right_rows, fanout
+
+
+def _take_rows(s: pd.Series, rows: np.ndarray) -> Any:
+    """Values of s at rows; position -1 gives a missing value (dtype widened like merge does)."""
+    values = s.array if isinstance(s.dtype, pd.api.extensions.ExtensionDtype) else s.to_numpy()
+    return pd.api.extensions.take(values, rows, allow_fill=True)
+
+
+def _fanout_message(label: str, key: str, fanout: pd.DataFrame, left_count: int, out_count: int) -> str:
+    sample = fanout["Key"].head(5).tolist()
+    return (
+        f"Join fan-out on {key} with {label}: {len(fanout)} keys match several rows, so "
+        f"{left_count} rows become {out_count} rows. e.g. {sample}"
+    )
+
+
+def indexed_left_join(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    key: str,
+    config: Config,
+    label: str,
+    warnings: StageWarnings,
+) -> pd.DataFrame:
+    """
+    left.merge(right, on=key, how="left") built from plan_left_join row positions.
+
+    Fan-out is reported in warnings (message and warnings.fanout) before the frame is
+    built; with Config.JOIN_FANOUT_POLICY = "error" a ValueError is raised instead.
+    Without fan-out the left columns are reused as they are.
+    """
+    left_rows, right_rows, fanout = plan_left_join(left[key], right[key])
+    if len(fanout):
+        message = _fanout_message(label, key, fanout, len(left), len(left_rows))
+        if config.JOIN_FANOUT_POLICY == "error":
+            raise ValueError(message + ". Set Config.JOIN_FANOUT_POLICY = 'warn' to keep every match.")
+        warnings.append(message)
+        warnings.fanout = pd.concat(
+            [warnings.fanout, fanout.assign(Join=f"{key} ({label})")[list(warnings.fanout.columns)]],
+            ignore_index=True,
+        )
+
+    right_cols = [c for c in right.columns if c != key]
+    overlap = set(right_cols) & set(left.columns)
+    out: Dict[Any, Any] = {}
+    for col in left.columns:
+        name = f"{col}_x" if col in overlap else col
+        # Copy-on-write Series: shared with left until either side is modified
+        out[name] = left[col].reset_index(drop=True) if len(fanout) == 0 else _take_rows(left[col], left_rows)
+    for col in right_cols:
+        name = f"{col}_y" if col in overlap else col
+        out[name] = _take_rows(right[col], right_rows)
+    return pd.DataFrame(out, copy=False)
 
 
 def merge_data(
@@ -387,44 +1682,20 @@ def merge_data(
     - Site_Target_%
     - Is_Promo_SKU
     
-    Returns: (merged_df, warnings)
+    Returns: (merged_df, warnings); warnings.fanout lists join keys that repeat File A rows
+    (Config.JOIN_FANOUT_POLICY) and warnings.article_match the Articles found in only one file
     """
-    warnings: List[str] = []
+    warnings = StageWarnings()
     
-    # Track File A SKUs
-    articles_in_a = set(df_a["Article"].unique())
-    articles_in_b1 = set(df_b1["Article"].unique())
+    # Diagnostic: Article overlap (counts and full unmatched lists in warnings.article_match)
+    warnings.article_match = match_articles(df_a["Article"], df_b1["Article"])
+    warnings.extend(warnings.article_match.messages())
     
-    # Diagnostic: Check for Article overlap
-    matched_articles = articles_in_a.intersection(articles_in_b1)
-    unmatched_in_a = articles_in_a - articles_in_b1
-    unmatched_in_b1 = articles_in_b1 - articles_in_a
-    
-    if not matched_articles:
-        warnings.append(
-            f"⚠️ CRITICAL: NO Articles from File A matched with File B Sheet1! "
-            f"File A has {len(articles_in_a)} unique Articles, "
-            f"File B Sheet1 has {len(articles_in_b1)} unique Articles. "
-            f"This means NO promotion targets will be applied."
-        )
-    else:
-        warnings.append(
-            f"[OK] Article match summary: {len(matched_articles)} matched, "
-            f"{len(unmatched_in_a)} in File A only, "
-            f"{len(unmatched_in_b1)} in File B only."
-        )
-    
-    if unmatched_in_a:
-        warnings.append(
-            f"Articles in File A but not in File B (no promo targets): {sorted(list(unmatched_in_a))[:10]}"
-        )
-    if unmatched_in_b1:
-        warnings.append(
-            f"Articles in File B but not in File A (unused promo targets): {sorted(list(unmatched_in_b1))}"
-        )
-    
-    # Merge promo SKU info by Article (many sites share SKU)
-    df = df_a.merge(
+    # Merge promo SKU info by Article (many sites share SKU), then site target by Site
+    # (one Pct_<TYPE> column per target type): left joins on integer codes, with the
+    # output size and any fan-out known before the joined frame is built
+    df = indexed_left_join(
+        df_a,
         df_b1[
             [
                 "Group_No",
@@ -435,30 +1706,16 @@ def merge_data(
                 "Promotion_Days",
             ]
         ],
-        on="Article",
-        how="left",
-    )
-
-    # Merge site target by Site
-    df = df.merge(
-        df_b2[["Site", "Pct_HK", "Pct_MO", "Pct_ALL"]],
-        on="Site",
-        how="left",
+        "Article",
+        config,
+        "File B Sheet1",
+        warnings,
     )
+    pct_cols = [c for c in df_b2.columns if str(c).startswith("Pct_")]
+    df = indexed_left_join(df, df_b2[["Site"] + pct_cols], "Site", config, "File B Sheet2", warnings)
 
     # Determine Site_Target_% based on Target_Type
-    def pick_site_target_pct(row) -> float:
-        # Robust against non-string / NaN values
-        raw_type = row.get("Target_Type")
-        t = str(raw_type).upper() if raw_type is not None else ""
-        if t == "HK":
-            return float(row.get("Pct_HK") or 0)
-        if t == "MO":
-            return float(row.get("Pct_MO") or 0)
-        # Default / ALL / unexpected values
-        return float(row.get("Pct_ALL") or 0)
-
-    df["Site_Target_%"] = df.apply(pick_site_target_pct, axis=1)
+    df["Site_Target_%"] = site_target_pct(df, pct_cols)
 
     # Determine promo flag: must have SKU_Target > 0 and Site_Target_% > 0
     df["Is_Promo_SKU"] = (df["SKU_Target"].fillna(0) > 0) & (df["Site_Target_%"].fillna(0) > 0)
@@ -470,7 +1727,304 @@ def merge_data(
         f"Promo SKU detection: {promo_count} out of {total_rows} rows flagged as promotion SKUs"
     )
 
-    return df, warnings
+    return _finish_stage(df, config), warnings
+
+
+def site_target_pct(df: pd.DataFrame, pct_cols: List[str]) -> np.ndarray:
+    """
+    Pct_<Target_Type> of every row; missing and unknown target types use Pct_ALL.
+    Target_Type is factorized so each distinct type is looked up once, then every row's
+    percentage is gathered from the rows × types matrix (NaN where the Site is not in Sheet 2).
+    """
+    types = [c[len("Pct_"):] for c in pct_cols]
+    default = types.index("ALL")
+    codes, uniques = pd.factorize(df["Target_Type"])
+    type_index = np.array(
+        [types.index(str(t).upper()) if str(t).upper() in types else default for t in uniques] + [default],
+        dtype=np.intp,
+    )
+    picked = type_index[codes]  # code -1 (missing Target_Type) picks the trailing default
+    matrix = df[pct_cols].to_numpy(dtype="float64", na_value=np.nan)
+    return matrix[np.arange(len(df)), picked]
+
+
+def _float_column(df: pd.DataFrame, col: str, fill_nan: bool = False) -> np.ndarray:
+    """
+    Column as a float64 array; non-numeric values become NaN (or 0 with fill_nan).
+    Missing columns are treated as all zeros, like row.get(col, 0) in the row-wise rules.
+    """
+    if col not in df.columns:
+        return np.zeros(len(df), dtype="float64")
+    arr = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if fill_nan:
+        arr = np.where(np.isnan(arr), 0.0, arr)
+    return arr
+
+
+def _upper_text_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as an object array of upper-cased strings; NaN / missing column → ""."""
+    if col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    s = df[col]
+    return s.where(s.notna(), "").astype(str).str.upper().to_numpy(dtype=object)
+
+
+def _new_sku_mask(df: pd.DataFrame) -> np.ndarray:
+    """Is_New_SKU as precomputed by prepare_file_a, else derived from the Launch_Date text."""
+    if "Is_New_SKU" in df.columns:
+        return df["Is_New_SKU"].to_numpy(dtype=bool, na_value=True)
+    return _blank_launch_date_mask(df)
+
+
+def _blank_launch_date_mask(df: pd.DataFrame) -> np.ndarray:
+    """True where Launch_Date is blank / "nan" / "null" / "none" (i.e. new SKU)."""
+    if "Launch_Date" not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    s = df["Launch_Date"]
+    text = s.where(s.notna(), "").astype(str).str.strip().str.lower()
+    return text.isin(["", "nan", "null", "none"]).to_numpy(dtype=bool)
+
+
+def _truncate_to_int(values: np.ndarray) -> np.ndarray:
+    """Python int() semantics (truncate toward zero) over a float array; non-finite → 0."""
+    values = np.where(np.isfinite(values), values, 0.0)
+    return np.trunc(values).astype("int64")
+
+
+# Dispatch rules, first match wins. Each rule names the rows it applies to and how they are
+# dispatched:
+# - site: fnmatch pattern on Site ("*" = every site, "HB8*" = HB80..HB89)
+# - rp_type: pattern on RP_Type; blank = Config.DISPATCH_RP_TYPE
+# - condition: one of DISPATCH_CONDITIONS (blank = "always")
+# - formula: one of DISPATCH_FORMULAS (Suggested_Dispatch_Qty and Suggested_DN_Qty)
+# - remark: Dispatch_Remark of rows the rule dispatches (Suggested Dispatch or DN Qty > 0)
+# Rows matching no rule are not dispatched. Adding a special store is a new row here or in a
+# Config.DISPATCH_RULES file.
+DISPATCH_RULE_FIELDS: Tuple[str, ...] = ("site", "rp_type", "condition", "formula", "remark")
+
+DEFAULT_DISPATCH_RULES: List[Dict[str, str]] = [
+    {"site": "HB87", "rp_type": "RF", "condition": "no_target", "formula": "safety_stock_gap", "remark": "HB87-RF派貨"},
+    {"site": "*", "rp_type": "ND", "condition": "always", "formula": "promo_target", "remark": "ND 派貨"},
+    {"site": "*", "rp_type": "", "condition": "always", "formula": "net_demand", "remark": ""},
+]
+
+DISPATCH_CONDITIONS: Dict[str, str] = {
+    "always": "every matching row",
+    "no_target": "Site_Promo_Demand <= 0 (no promo target)",
+    "has_target": "Site_Promo_Demand > 0",
+}
+
+DISPATCH_FORMULAS: Dict[str, str] = {
+    "net_demand": "dispatch Net_Demand_for_Dispatch (at least one MOQ) rounded up to MOQ; "
+    "DN Qty from the dispatch qty (MOQ multiple, capped at 50 when Promotion Days > 4)",
+    "promo_target": "dispatch Site_Promo_Demand rounded up to MOQ (0 without promo target); "
+    "DN Qty as net_demand, or Site_Promo_Demand when MOQ is missing",
+    "safety_stock_gap": "dispatch Mround(Safety_Stock - SaSa_Net_Stock - Pending_Received, MOQ), "
+    "at least one MOQ; DN Qty 0",
+    "none": "no dispatch",
+}
+
+
+def load_dispatch_rules(source: Any) -> List[Dict[str, str]]:
+    """Dispatch rules from a .json file (list of objects) or a .csv file with DISPATCH_RULE_FIELDS columns."""
+    path = Path(source)
+    if path.suffix.lower() == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    return pd.read_csv(path, dtype=str, keep_default_na=False).to_dict("records")
+
+
+def compile_dispatch_rules(config: Config) -> List[Dict[str, str]]:
+    """
+    Config.DISPATCH_RULES (or DEFAULT_DISPATCH_RULES) validated and normalized: patterns
+    upper-cased, blanks filled with their defaults. Raises ValueError on unknown fields,
+    conditions or formulas.
+    """
+    rules = config.DISPATCH_RULES
+    if rules is None:
+        rules = DEFAULT_DISPATCH_RULES
+    elif isinstance(rules, (str, Path)):
+        rules = load_dispatch_rules(rules)
+
+    compiled = []
+    for number, rule in enumerate(rules, start=1):
+        unknown = sorted(set(rule) - set(DISPATCH_RULE_FIELDS))
+        if unknown:
+            raise ValueError(f"Dispatch rule {number}: unknown fields {unknown}; expected {list(DISPATCH_RULE_FIELDS)}")
+        condition = str(rule.get("condition") or "always").strip().lower()
+        if condition not in DISPATCH_CONDITIONS:
+            raise ValueError(
+                f"Dispatch rule {number}: unknown condition {condition!r}; expected one of {list(DISPATCH_CONDITIONS)}"
+            )
+        formula = str(rule.get("formula") or "").strip().lower()
+        if formula not in DISPATCH_FORMULAS:
+            raise ValueError(
+                f"Dispatch rule {number}: unknown formula {formula!r}; expected one of {list(DISPATCH_FORMULAS)}"
+            )
+        compiled.append({
+            "site": str(rule.get("site") or "*").strip().upper(),
+            "rp_type": str(rule.get("rp_type") or config.DISPATCH_RP_TYPE).strip().upper(),
+            "condition": condition,
+            "formula": formula,
+            "remark": str(rule.get("remark") or ""),
+        })
+    return compiled
+
+
+def _pattern_masks(df: pd.DataFrame, col: str, patterns: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Row mask of each fnmatch pattern over the upper-cased text of col (missing → "").
+    The column is factorized once and patterns are matched against its distinct values only.
+    """
+    if col in df.columns:
+        codes, uniques = pd.factorize(df[col])
+        labels = [str(value).upper() for value in uniques] + [""]
+    else:
+        codes, labels = np.full(len(df), -1), [""]
+    return {
+        pattern: np.array([fnmatch.fnmatchcase(label, pattern) for label in labels], dtype=bool)[codes]
+        for pattern in set(patterns)
+    }
+
+
+def _matching_rule(df: pd.DataFrame, rules: List[Dict[str, str]], site_promo_demand: np.ndarray) -> np.ndarray:
+    """Index of the first rule matching each row (-1 = no rule): O(rules × rows) mask updates."""
+    site_masks = _pattern_masks(df, "Site", [rule["site"] for rule in rules])
+    rp_masks = _pattern_masks(df, "RP_Type", [rule["rp_type"] for rule in rules])
+    conditions = {
+        "always": np.ones(len(df), dtype=bool),
+        # NaN Site_Promo_Demand compares False in both
+        "no_target": site_promo_demand <= 0,
+        "has_target": site_promo_demand > 0,
+    }
+    rule_index = np.full(len(df), -1, dtype="int64")
+    for i in reversed(range(len(rules))):
+        rule = rules[i]
+        rule_index[site_masks[rule["site"]] & rp_masks[rule["rp_type"]] & conditions[rule["condition"]]] = i
+    return rule_index
+
+
+def _dispatch_rule_arrays(
+    out: pd.DataFrame,
+    config: Config,
+    net: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Column-wise equivalent of the row-wise dispatch closures in calculate_demand.
+
+    Returns Suggested_Dispatch_Qty, Target_Dispatch, Suggested_DN_Qty, Dispatch_Remark
+    and Dispatch_Type arrays. Dispatch / DN qty and remark follow the dispatch rule table
+    (Config.DISPATCH_RULES); with the default rules the results are identical to
+    DISPATCH_ENGINE = "rowwise".
+
+    net defaults to out["Net_Demand_for_Dispatch"]. A 2-D net (rows × lead times)
+    broadcasts every rule across lead times; per-row inputs are used as (rows, 1) columns.
+    """
+    if net is None:
+        net = _float_column(out, "Net_Demand_for_Dispatch")
+
+    def per_row(values: np.ndarray) -> np.ndarray:
+        return values if net.ndim == 1 else values[:, None]
+
+    site = per_row(_upper_text_column(out, "Site"))
+    rp = per_row(_upper_text_column(out, "RP_Type"))
+
+    site_promo_demand_rows = _float_column(out, "Site_Promo_Demand")
+    site_promo_demand = per_row(site_promo_demand_rows)
+    moq = per_row(_float_column(out, "MOQ"))
+    moq_filled = np.where(np.isnan(moq), 0.0, moq)
+    safety = per_row(_float_column(out, "Safety_Stock", fill_nan=True))
+    stock = per_row(_float_column(out, "SaSa_Net_Stock", fill_nan=True))
+    pending = per_row(_float_column(out, "Pending_Received", fill_nan=True))
+    promo_days = per_row(_float_column(out, "Promotion_Days"))
+    supply = per_row(np.trunc(_float_column(out, "Supply_source", fill_nan=True)))
+    blank_launch_date = per_row(_new_sku_mask(out))
+
+    # Dispatch rules (Config.DISPATCH_RULES): each row follows the formula of its first matching rule
+    rules = compile_dispatch_rules(config)
+    rule_index = per_row(_matching_rule(out, rules, site_promo_demand_rows))
+    shape = np.broadcast_shapes(rule_index.shape, net.shape)
+
+    def by_rule(formulas: Dict[str, Any]) -> np.ndarray:
+        result = np.zeros(shape, dtype="float64")
+        for i, rule in enumerate(rules):
+            hit = np.broadcast_to(rule_index == i, shape)
+            result[hit] = np.broadcast_to(formulas[rule["formula"]], shape)[hit]
+        return result
+
+    is_nd = rp == "ND"
+    valid_moq = moq > 0
+    has_target = site_promo_demand > 0
+
+    def mround_at_least_moq(raw: np.ndarray) -> np.ndarray:
+        # Mround (Excel half-up) to MOQ multiple, never below one MOQ; 0 when raw <= 0 or MOQ <= 0
+        ok = (raw > 0) & (moq_filled > 0)
+        return np.where(ok, np.maximum(mround_array(raw, moq_filled), moq_filled), 0.0)
+
+    # Suggested Dispatch Qty
+    net_ok = (net > 0) & valid_moq
+    suggested = _truncate_to_int(
+        by_rule({
+            "net_demand": np.where(net_ok, ceil_to_multiple(np.maximum(net, moq), moq), 0.0),
+            "promo_target": np.where(has_target, ceil_to_multiple(site_promo_demand, moq, fill=site_promo_demand), 0.0),
+            "safety_stock_gap": mround_at_least_moq(safety - stock - pending),
+            "none": 0.0,
+        })
+    )
+
+    # Target Dispatch: Mround((店舖推廣目標需求量 - SaSa Net Stock - Pending Received), MOQ)
+    spd_filled = np.where(np.isnan(site_promo_demand), 0.0, site_promo_demand)
+    target_dispatch = _truncate_to_int(mround_at_least_moq(spd_filled - stock - pending))
+
+    # Suggested DN Qty: Suggested_Dispatch_Qty as MOQ multiple, capped at 50 when Promotion Days > 4
+    dispatch_qty = suggested.astype("float64")
+    dn_from_dispatch = np.where(
+        promo_days > 4,
+        capped_multiple(dispatch_qty, moq, cap=50),
+        ceil_to_multiple(dispatch_qty, moq, use_remainder=True),
+    )
+    dn_qty = _truncate_to_int(
+        by_rule({
+            "net_demand": np.where(net_ok, dn_from_dispatch, 0.0),
+            "promo_target": np.where(has_target, np.where(valid_moq, dn_from_dispatch, site_promo_demand), 0.0),
+            "safety_stock_gap": 0.0,
+            "none": 0.0,
+        })
+    )
+
+    # Dispatch_Remark of the matching rule (e.g. ND dispatch / HB87-RF) where it dispatches
+    remarks = np.array([rule["remark"] for rule in rules] + [""], dtype=object)
+    remark = np.where((suggested > 0) | (dn_qty > 0), remarks[rule_index], "").astype(object)
+
+    # Dispatch_Type (new SKU check has the highest priority)
+    has_dn = dn_qty > 0
+    is_buyer_order = (supply == 1) | (supply == 4)
+    is_dn_supply = supply == 2
+    by_supply = np.select([is_buyer_order, is_dn_supply], ["Buyer需要訂貨", "需生成 DN"], default="N/A")
+    nd_by_supply = np.select([is_buyer_order, is_dn_supply], ["Buyer需要訂貨", "需生成 DN"], default="ND")
+    dispatch_type = np.select(
+        [
+            blank_launch_date & has_dn,
+            site == config.DC_SITE_CODE,
+            is_nd & has_dn,
+            is_nd,
+        ],
+        ["新SKU必須由Buyer首次派貨", "D001", nd_by_supply, "無須補貨"],
+        default=by_supply,
+    ).astype(object)
+
+    return {
+        "Suggested_Dispatch_Qty": suggested,
+        "Target_Dispatch": target_dispatch,
+        "Suggested_DN_Qty": dn_qty,
+        "Dispatch_Remark": remark,
+        "Dispatch_Type": dispatch_type,
+    }
+
+
+def _apply_dispatch_rules_vectorized(out: pd.DataFrame, config: Config) -> None:
+    """Add the dispatch columns to out in place using the column-wise rule arrays."""
+    for col, values in _dispatch_rule_arrays(out, config).items():
+        out[col] = values
 
 
 def calculate_demand(
@@ -483,7 +2037,7 @@ def calculate_demand(
     """
     lead = config.DEFAULT_LEAD_TIME if lead_time is None else int(lead_time)
 
-    out = df.copy()
+    out = _stage_frame(df, config.COPY_FREE_PIPELINE)
 
     # Daily_Sales_Rate
     out["Daily_Sales_Rate"] = out["Last_Month_Sold_Qty_capped"] / float(config.DAYS_IN_MONTH_FOR_RATE)
@@ -509,7 +2063,7 @@ def calculate_demand(
     # Handle Promotion_Days: only calculate promo demand when Promotion_Days > 0.
     # If Promotion_Days is not provided (0), the promo demand cannot be meaningfully
     # daily-rated, so Site_Promo_Demand stays at 0.
-    promo_days = out["Promotion_Days"].copy()
+    promo_days = out["Promotion_Days"]
     valid_promo_mask = promo_mask & (promo_days > 0)
     
     if valid_promo_mask.any():
@@ -542,6 +2096,15 @@ def calculate_demand(
         # "zero": keep 0, which will result in no dispatch
         pass
 
+    if config.DISPATCH_ENGINE == "vectorized":
+        _apply_dispatch_rules_vectorized(out, config)
+        return _finish_stage(out, config)
+    if config.DISPATCH_RULES is not None:
+        raise ValueError(
+            "Config.DISPATCH_RULES is only evaluated by DISPATCH_ENGINE = \"vectorized\"; "
+            "the rowwise engine implements DEFAULT_DISPATCH_RULES"
+        )
+
     # Suggested Dispatch Qty
     def compute_suggested_dispatch(row) -> int:
         rp = (row.get("RP_Type") or "").upper()
@@ -874,9 +2437,12 @@ def calculate_demand(
             dn_qty = 0
 
         # Check Launch Date for new SKU logic - HIGHEST PRIORITY
-        launch_date = row.get("Launch_Date", "")
-        launch_date_str = str(launch_date).strip() if pd.notna(launch_date) else ""
-        is_new_sku = launch_date_str == "" or launch_date_str.lower() in ("nan", "null", "none")
+        if "Is_New_SKU" in row.index and pd.notna(row["Is_New_SKU"]):
+            is_new_sku = bool(row["Is_New_SKU"])
+        else:
+            launch_date = row.get("Launch_Date", "")
+            launch_date_str = str(launch_date).strip() if pd.notna(launch_date) else ""
+            is_new_sku = launch_date_str == "" or launch_date_str.lower() in ("nan", "null", "none")
 
         # New SKU logic: If Launch Date is blank and Suggested_DN_Qty > 0, show new SKU message
         # This check must come FIRST before any other logic
@@ -908,7 +2474,128 @@ def calculate_demand(
 
     out["Dispatch_Type"] = out.apply(determine_dispatch_type, axis=1)
 
-    return out
+    return _finish_stage(out, config)
+
+
+class DemandSweep:
+    """
+    calculate_demand results for several lead times, computed in one broadcasted pass.
+
+    Lead time only enters Base_Demand, so lead-independent columns are computed once
+    (base) and lead-dependent ones are stored as 2-D arrays (rows × lead times).
+    detail(lead_time) returns the same frame as calculate_demand(df, config, lead_time).
+    """
+
+    def __init__(
+        self,
+        base: pd.DataFrame,
+        lead_times: List[int],
+        columns: Dict[str, np.ndarray],
+        compact: bool = False,
+        copy_free: bool = False,
+    ):
+        self.base = base
+        self.lead_times = list(lead_times)
+        self.columns = columns
+        self.compact = compact
+        self.copy_free = copy_free
+
+    def detail(self, lead_time: int) -> pd.DataFrame:
+        """Detail frame for one lead time (a slice of the sweep, no recomputation)."""
+        lead = int(lead_time)
+        if lead not in self.lead_times:
+            raise ValueError(f"Lead time {lead} not in sweep: {self.lead_times}")
+        idx = self.lead_times.index(lead)
+        out = _stage_frame(self.base, self.copy_free)
+        for col, values in self.columns.items():
+            out[col] = values[:, idx]
+        if self.compact:
+            apply_compact_schema(out)
+        return out
+
+    def comparison(self, config: Config) -> pd.DataFrame:
+        """
+        One row per lead time:
+        - Total_Demand, Total_Dispatch, Total_Suggested_DN_Qty summed over non-D001 rows
+        - D001_Shortage_SKUs: Summary_Report rows (Group No. + SKU) with a D001 stock shortage alert
+        """
+        base = self.base
+        n_leads = len(self.lead_times)
+        non_dc = (base["Site"] != config.DC_SITE_CODE).to_numpy()
+        non_dc_rows = base.loc[non_dc]
+
+        # Same (Group_No, Article) grouping as generate_summary
+        group_frame = pd.DataFrame(self.columns["Suggested_DN_Qty"][non_dc], columns=range(n_leads))
+        group_frame["Target_Dispatch"] = non_dc_rows["Target_Dispatch"].to_numpy()
+        group_frame["Supply_source"] = non_dc_rows["Supply_source"].to_numpy()
+        grouped = group_frame.groupby(
+            [non_dc_rows["Group_No"].to_numpy(), non_dc_rows["Article"].to_numpy()]
+        )
+        dn_by_group = grouped[list(range(n_leads))].sum().to_numpy(dtype="float64")
+        target_by_group = grouped["Target_Dispatch"].sum().to_numpy(dtype="float64")
+        supply = np.trunc(
+            pd.to_numeric(grouped["Supply_source"].first(), errors="coerce").fillna(0).to_numpy()
+        )
+
+        dc_stock = base.loc[~non_dc].groupby("Article")["SaSa_Net_Stock"].sum()
+        group_articles = grouped["Supply_source"].first().index.get_level_values(1)
+        d001_stock = pd.Series(group_articles).map(dc_stock).fillna(0).to_numpy(dtype="float64")
+
+        checks_d001 = ~((supply == 1) | (supply == 4))
+        shortage = checks_d001[:, None] & (
+            (d001_stock[:, None] < dn_by_group) | (d001_stock < target_by_group)[:, None]
+        )
+
+        return pd.DataFrame({
+            "Lead_Time": self.lead_times,
+            "Total_Demand": np.nansum(self.columns["Total_Demand"][non_dc], axis=0),
+            "Total_Dispatch": self.columns["Suggested_Dispatch_Qty"][non_dc].sum(axis=0),
+            "Total_Suggested_DN_Qty": self.columns["Suggested_DN_Qty"][non_dc].sum(axis=0),
+            "D001_Shortage_SKUs": shortage.sum(axis=0),
+        })
+
+
+def calculate_demand_sweep(
+    df: pd.DataFrame,
+    config: Config,
+    lead_times: Optional[List[int]] = None,
+) -> DemandSweep:
+    """
+    Apply calculate_demand for every lead time (default 0..Config.MAX_LEAD_TIME) at once.
+
+    Base_Demand = Daily_Sales_Rate × (Effective_Target_Cover_Days + lead) is broadcast to
+    rows × lead times, and the dispatch rules are evaluated over the 2-D Net Demand.
+    """
+    leads = list(range(config.MAX_LEAD_TIME + 1)) if lead_times is None else [int(x) for x in lead_times]
+    if not leads:
+        raise ValueError("lead_times must not be empty")
+
+    # Lead-independent columns (and MOQ policy) exactly as calculate_demand computes them
+    base = calculate_demand(df, config, lead_time=leads[0])
+
+    rate = base["Daily_Sales_Rate"].to_numpy(dtype="float64")[:, None]
+    cover_days = base["Effective_Target_Cover_Days"].to_numpy(dtype="float64")[:, None]
+    base_demand = rate * (cover_days + np.asarray(leads, dtype="float64")[None, :])
+    total_demand = base_demand + base["Site_Promo_Demand"].to_numpy(dtype="float64")[:, None]
+    on_hand = (base["SaSa_Net_Stock"] + base["Pending_Received"]).to_numpy(dtype="float64")
+    net_raw = total_demand - on_hand[:, None]
+    if config.USE_NEGATIVE_NET_FOR_DISPATCH:
+        net_for_dispatch = net_raw
+    else:
+        net_for_dispatch = np.clip(net_raw, 0, None)
+
+    rules = _dispatch_rule_arrays(base, config, net=net_for_dispatch)
+    columns = {
+        "Base_Demand": base_demand,
+        "Total_Demand": total_demand,
+        "Net_Demand_raw": net_raw,
+        "Net_Demand_for_Dispatch": net_for_dispatch,
+        "Suggested_Dispatch_Qty": rules["Suggested_Dispatch_Qty"],
+        "Suggested_DN_Qty": rules["Suggested_DN_Qty"],
+        "Dispatch_Remark": rules["Dispatch_Remark"],
+        "Dispatch_Type": rules["Dispatch_Type"],
+    }
+    return DemandSweep(base, leads, columns, compact=config.COMPACT_DTYPES, copy_free=config.COPY_FREE_PIPELINE)
 
 
 def generate_summary(
@@ -935,20 +2622,21 @@ def generate_summary(
     - Out_of_Stock_Warning per SKU based on rules.
     - Include additional article information: Article Description, Product Hierarchy, Article Long Text (60 Chars), Description p. group
     """
-    # Separate D001 and non-D001
-    non_dc = detail[detail["Site"] != config.DC_SITE_CODE]
-    dc = detail[detail["Site"] == config.DC_SITE_CODE]
-
     # Aggregate non-DC
     grp_keys = ["Group_No", "Article"]
 
     # Determine which additional fields to include (if they exist)
     additional_fields: list[str] = []
-    for field in ["Article Description", "Product Hierarchy", "Article Long Text (60 Chars)", "Description p. group"]:
+    for field in ARTICLE_INFO_FIELDS:
         if field in detail.columns:
             # For additional fields, we'll take the first non-null value per group
             additional_fields.append(field)
 
+    # Separate D001 and non-D001; each slice only takes the columns aggregated from it
+    is_dc = (detail["Site"] == config.DC_SITE_CODE).to_numpy(dtype=bool)
+    is_h_site = detail["Site"].str.match(r"^H[ABCD]", na=False).to_numpy(dtype=bool)
+    stock_cols = ["SaSa_Net_Stock", "Pending_Received"]
+
     # Demand/dispatch aggregation: ALL non-D001 sites
     agg_dict_demand = {
         "Total_Demand": "sum",
@@ -963,8 +2651,9 @@ def generate_summary(
     for field in additional_fields:
         agg_dict_demand[field] = "first"
 
+    non_dc = detail.loc[~is_dc, grp_keys + list(agg_dict_demand)]
     agg_non_dc = (
-        non_dc.groupby(grp_keys, as_index=False)
+        non_dc.groupby(grp_keys, as_index=False, observed=True)
         .agg(agg_dict_demand)
     )
     
@@ -976,8 +2665,8 @@ def generate_summary(
     })
     
     # H-site stock aggregation: only HA, HB, HC, HD sites
-    h_site_non_dc = non_dc[non_dc["Site"].str.match(r"^H[ABCD]", na=False)]
-    h_agg = h_site_non_dc.groupby(grp_keys, as_index=False).agg(
+    h_site_non_dc = detail.loc[~is_dc & is_h_site, grp_keys + stock_cols]
+    h_agg = h_site_non_dc.groupby(grp_keys, as_index=False, observed=True).agg(
         Total_Stock=("SaSa_Net_Stock", "sum"),
         Total_Pending=("Pending_Received", "sum"),
     )
@@ -989,6 +2678,7 @@ def generate_summary(
     agg_non_dc["Total_Stock_Available"] = agg_non_dc["Total_Stock"] + agg_non_dc["Total_Pending"]
 
     # D001 info: assume at most one row per (Article) for DC; if multiple, sum
+    dc = detail.loc[is_dc, ["Article", "In_Quality_Insp", "Blocked"] + stock_cols]
     dc_agg = (
         dc.groupby("Article", as_index=False)
         .agg(
@@ -1012,65 +2702,50 @@ def generate_summary(
         if col in summary.columns:
             summary[col] = summary[col].fillna(0)
 
-    # Calculate effective inventory and enhanced inventory status
-    def calculate_effective_inventory_and_status(row) -> tuple:
-        """
-        計算有效庫存和庫存狀態
-        
-        有效庫存 = D001 SaSa_Net_Stock + Shop(H字頭) SaSa_Net_Stock + Shop(H字頭) Pending_Received
-        """
-        # Get the original detail data for this article to calculate H-site inventory
-        article_detail = detail[detail["Article"] == row["Article"]]
-        
-        # H-site店鋪的庫存 (HA*, HB*, HC*, HD*)
-        h_sites = article_detail[article_detail["Site"].str.match(r"^H[ABCD]", na=False)]
-        h_stock = h_sites["SaSa_Net_Stock"].sum()
-        h_pending = h_sites["Pending_Received"].sum()
-        
-        # 有效庫存 = D001 + H字頭店鋪庫存 + H字頭店鋪待收貨
-        effective_inventory = row["D001_SaSa_Net_Stock"] + h_stock + h_pending
-        
-        # 獲取 Supply source (使用summary已匯總的值，與報表顯示一致)
-        supply_source = row.get("Supply_source", 0)
-        try:
-            supply_source = int(supply_source) if pd.notna(supply_source) else 0
-        except (TypeError, ValueError):
-            supply_source = 0
-        
-        total_demand = row["Total_Demand"]
-        d001_stock = row["D001_SaSa_Net_Stock"]
-        
-        # 根據Supply source判斷庫存狀態
-        if supply_source == 2:
-            if effective_inventory >= total_demand:
-                if d001_stock > 100:
-                    status = "庫存足夠, RP team會安排Lot For Lot"
-                else:
-                    status = "庫存足夠目標數量, 但D001少於100件, 在需要時進行搓貨"
-            else:
-                status = "庫存不足夠, 請Buyer留意"
-        elif supply_source in (1, 4):
-            sku_target = float(row.get("SKU_Target", 0) if pd.notna(row.get("SKU_Target", 0)) else 0)
-            h_site_total = h_stock + h_pending
-            if h_site_total >= sku_target:
-                status = "庫存足夠"
-            else:
-                status = "庫存現時不足, 因為是行貨, 需要Buyer open PO"
-        else:
-            # 默認情況，使用原有的簡單邏輯
-            if row["Total_Dispatch"] > d001_stock:
-                status = "D001 缺貨"
-            elif total_demand > row["Total_Stock_Available"]:
-                status = "Y"
-            else:
-                status = "N"
-        
-        return effective_inventory, status
-
-    # Apply the enhanced inventory status calculation
-    result = summary.apply(calculate_effective_inventory_and_status, axis=1, result_type='expand')
-    summary["Effective_Inventory"] = result[0]
-    summary["Enhanced_Inventory_Status"] = result[1]
+    # H-site店鋪的庫存 (HA*, HB*, HC*, HD*): one groupby pass over detail, looked up per Article
+    h_site_rows = detail.loc[is_h_site, ["Article"] + stock_cols]
+    h_by_article = h_site_rows.groupby("Article").agg(
+        H_Stock=("SaSa_Net_Stock", "sum"),
+        H_Pending=("Pending_Received", "sum"),
+    )
+    h_stock = summary["Article"].map(h_by_article["H_Stock"]).fillna(0).to_numpy(dtype="float64")
+    h_pending = summary["Article"].map(h_by_article["H_Pending"]).fillna(0).to_numpy(dtype="float64")
+
+    # 有效庫存 = D001 SaSa_Net_Stock + Shop(H字頭) SaSa_Net_Stock + Shop(H字頭) Pending_Received
+    d001_stock = summary["D001_SaSa_Net_Stock"].to_numpy(dtype="float64")
+    effective_inventory = d001_stock + h_stock + h_pending
+
+    # 獲取 Supply source (使用summary已匯總的值，與報表顯示一致)
+    supply_source = np.trunc(_float_column(summary, "Supply_source", fill_nan=True))
+    total_demand = summary["Total_Demand"].to_numpy(dtype="float64")
+    sku_target = _float_column(summary, "SKU_Target", fill_nan=True)
+    is_dn_supply = supply_source == 2
+    is_buyer_order = (supply_source == 1) | (supply_source == 4)
+    covers_demand = effective_inventory >= total_demand
+
+    # 根據Supply source判斷庫存狀態; 默認情況使用原有的簡單邏輯
+    summary["Effective_Inventory"] = effective_inventory
+    summary["Enhanced_Inventory_Status"] = np.select(
+        [
+            is_dn_supply & covers_demand & (d001_stock > 100),
+            is_dn_supply & covers_demand,
+            is_dn_supply,
+            is_buyer_order & (h_stock + h_pending >= sku_target),
+            is_buyer_order,
+            summary["Total_Dispatch"].to_numpy(dtype="float64") > d001_stock,
+            total_demand > summary["Total_Stock_Available"].to_numpy(dtype="float64"),
+        ],
+        [
+            "庫存足夠, RP team會安排Lot For Lot",
+            "庫存足夠目標數量, 但D001少於100件, 在需要時進行搓貨",
+            "庫存不足夠, 請Buyer留意",
+            "庫存足夠",
+            "庫存現時不足, 因為是行貨, 需要Buyer open PO",
+            "D001 缺貨",
+            "Y",
+        ],
+        default="N",
+    ).astype(object)
 
     # Calculate inventory difference (Effective_Inventory - Total_Demand)
     summary["Inventory_Difference"] = summary["Effective_Inventory"] - summary["Total_Demand"]
@@ -1101,34 +2776,15 @@ def generate_summary(
 
     summary["Target_Qty_Shortage_Status"] = summary.apply(calc_shortage_status, axis=1)
 
-    # Add New SKU Alert for Summary_Report
-    def check_new_sku_alert(row) -> str:
-        """
-        檢查該SKU是否為新SKU且需要提示
-        """
-        article = row["Article"]
-        
-        # Get all detail rows for this article
-        article_detail = detail[detail["Article"] == article]
-        
-        # Check if any row has Launch_Date blank and Suggested_DN_Qty > 0
-        for _, detail_row in article_detail.iterrows():
-            launch_date = detail_row.get("Launch_Date", "")
-            launch_date_str = str(launch_date).strip() if pd.notna(launch_date) else ""
-            is_new_sku = launch_date_str == "" or launch_date_str.lower() in ("nan", "null", "none")
-            
-            suggested_dn_qty = detail_row.get("Suggested_DN_Qty", 0)
-            try:
-                dn_qty = float(suggested_dn_qty) if pd.notna(suggested_dn_qty) else 0
-            except (TypeError, ValueError):
-                dn_qty = 0
-            
-            if is_new_sku and dn_qty > 0:
-                return "新SKU必須由Buyer首次派貨"
-        
-        return ""
-    
-    summary["New_SKU_Alert"] = summary.apply(check_new_sku_alert, axis=1)
+    # Add New SKU Alert for Summary_Report:
+    # an Article is flagged when any of its detail rows is a new SKU (blank Launch_Date) with Suggested_DN_Qty > 0
+    new_sku_rows = _new_sku_mask(detail) & (
+        _float_column(detail, "Suggested_DN_Qty", fill_nan=True) > 0
+    )
+    new_sku_articles = detail.loc[new_sku_rows, "Article"].unique()
+    summary["New_SKU_Alert"] = np.where(
+        summary["Article"].isin(new_sku_articles), "新SKU必須由Buyer首次派貨", ""
+    ).astype(object)
     
     # Update Enhanced_Inventory_Status to include New SKU alert
     def update_enhanced_inventory_status(row) -> str:
@@ -1206,6 +2862,9 @@ def export_to_excel(
     df_b1: pd.DataFrame,
     df_b2: pd.DataFrame,
     output_path: Path,
+    lead_time_comparison: Optional[pd.DataFrame] = None,
+    df_a_passthrough: Optional[pd.DataFrame] = None,
+    article_match: Optional[ArticleMatchReport] = None,
 ):
     """
     Export simplified views (remove intermediate/duplicated columns):
@@ -1213,6 +2872,8 @@ def export_to_excel(
     - Final Order Report:
         Raw_A_Clean + Suggested_Dispatch_Qty, Dispatch_Type, SKU_Target, Site_Target_%, Total_Demand
         (Values instead of formulas for better usability)
+        Out-of-scope rows from split_promo_scope (df_a_passthrough) are appended with
+        the calculated columns left blank.
 
     - Promo_Sheet1 / Promo_Sheet2:
         Keep as-is (reference configuration).
@@ -1250,6 +2911,12 @@ def export_to_excel(
             "Out_of_Stock_Warning",
         ]
         (Columns missing in data will be skipped safely.)
+
+    - Lead_Time_Comparison (optional, from DemandSweep.comparison):
+        Total demand / dispatch / DN qty and D001 shortage SKUs per lead time.
+
+    - Article_Match (optional, from merge_data's warnings.article_match):
+        Every Article found in only one of File A / File B Sheet1, written when there is any.
     """
     # Create Final Order Report with additional columns
     # First, merge df_a_clean with the calculated columns from detail
@@ -1257,17 +2924,25 @@ def export_to_excel(
     
     # Get the additional columns from detail
     additional_cols = ["Suggested_Dispatch_Qty", "Suggested_DN_Qty", "Dispatch_Type", "SKU_Target", "Site_Target_%", "Total_Demand"]
-    additional_data = detail[merge_keys + additional_cols].copy()
+    additional_data = detail[merge_keys + additional_cols]
     
     # Remove duplicates in additional_data to ensure clean merge
     additional_data = additional_data.drop_duplicates(subset=merge_keys, keep='first')
     
+    # Launch date working columns are internal to the dispatch rules, not report columns
+    launch_date_cols = ["Launch_Date_Parsed", "Is_New_SKU"]
+
     # Merge df_a_clean with additional columns
-    df_final_order_report = df_a_clean.merge(
+    df_final_order_report = df_a_clean.drop(columns=launch_date_cols, errors="ignore").merge(
         additional_data,
         on=merge_keys,
         how="left"
     )
+    if df_a_passthrough is not None and len(df_a_passthrough):
+        df_final_order_report = pd.concat(
+            [df_final_order_report, df_a_passthrough.reindex(columns=df_final_order_report.columns)],
+            ignore_index=True,
+        )
     
     # Define keep-lists for simplified outputs
     detail_keep_cols = [
@@ -1299,7 +2974,7 @@ def export_to_excel(
     ]
     # Keep only existing columns, avoid KeyError
     detail_simple_cols = [c for c in detail_keep_cols if c in detail.columns]
-    detail_simple = detail[detail_simple_cols].copy()
+    detail_simple = detail[detail_simple_cols]
 
     summary_keep_cols = [
         "Group_No",
@@ -1328,7 +3003,7 @@ def export_to_excel(
         "Target_Qty_Shortage_Status",  # New field - shortage status based on Supply_source
     ]
     summary_simple_cols = [c for c in summary_keep_cols if c in summary.columns]
-    summary_simple = summary[summary_simple_cols].copy()
+    summary_simple = summary[summary_simple_cols]
 
     # Rename shop-only columns for clarity in Summary_Report output
     summary_simple = summary_simple.rename(columns={
@@ -1338,17 +3013,21 @@ def export_to_excel(
     })
 
     with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-        # All sheet headers: replace underscores with spaces for readability
-        def _display_columns(df: pd.DataFrame) -> pd.DataFrame:
-            out = df.copy()
-            out.columns = [c.replace("_", " ") for c in out.columns]
-            return out
-
-        _display_columns(df_final_order_report).to_excel(writer, sheet_name="Final Order Report", index=False)
-        _display_columns(df_b1).to_excel(writer, sheet_name="Promo_Sheet1", index=False)
-        _display_columns(df_b2).to_excel(writer, sheet_name="Promo_Sheet2", index=False)
-        _display_columns(detail_simple).to_excel(writer, sheet_name="Detail_Calculation", index=False)
-        _display_columns(summary_simple).to_excel(writer, sheet_name="Summary_Report", index=False)
+        # All sheet headers: replace underscores with spaces for readability. The header row
+        # is rewritten as each sheet is written, so no frame is copied just to rename columns.
+        def _write_sheet(df: pd.DataFrame, sheet_name: str) -> None:
+            header = [str(c).replace("_", " ") for c in df.columns]
+            df.to_excel(writer, sheet_name=sheet_name, index=False, header=header)
+
+        _write_sheet(df_final_order_report, "Final Order Report")
+        _write_sheet(df_b1, "Promo_Sheet1")
+        _write_sheet(df_b2, "Promo_Sheet2")
+        _write_sheet(detail_simple, "Detail_Calculation")
+        _write_sheet(summary_simple, "Summary_Report")
+        if lead_time_comparison is not None:
+            _write_sheet(lead_time_comparison, "Lead_Time_Comparison")
+        if article_match is not None and (len(article_match.only_in_a) or len(article_match.only_in_b)):
+            _write_sheet(article_match.to_frame(), "Article_Match")
 
 
 def main(
@@ -1356,6 +3035,9 @@ def main(
     file_b: str = "Promotion Target File B.xlsx",
     lead_time: Optional[int] = None,
     output: str = "Promotion_Planning_Result.xlsx",
+    lead_time_sweep: bool = False,
+    memory_report: bool = False,
+    profile: bool = False,
 ):
     """
     Entry point for local run.
@@ -1365,25 +3047,71 @@ def main(
 
     Or with parameters:
       python promo_calculator.py "Promotion Target File A.XLSX" "Promotion Target File B.xlsx" 10 "Result.xlsx"
+
+    Flags (anywhere on the command line):
+      --lead-time-sweep   compute all lead times 0..Config.MAX_LEAD_TIME in one pass and
+                          add a Lead_Time_Comparison sheet
+      --memory-report     print rows / columns / memory of each stage's frame
+      --profile           print wall / CPU time, peak RSS (and its growth) and rows / columns per stage
+      --profile-dump      with --profile: also run cProfile and write the slowest stage's
+                          statistics to <output name>_<stage>.pstats
+      --parallel-read     parse File A and File B in parallel worker processes (Config.PARALLEL_READ)
+      --chunk-rows=N      read and prepare File A in chunks of N rows (Config.FILE_A_CHUNK_ROWS)
+      --sheet=NAME        File A sheet to try first (Config.FILE_A_SHEET)
+      --member-a=PATTERN  file to read from a File A .zip archive (Config.FILE_A_MEMBER_PATTERN)
+      --member-b=PATTERN  file to read from a File B .zip archive (Config.FILE_B_MEMBER_PATTERN)
+      --dispatch-rules=FILE  dispatch rule table (.csv / .json) instead of the default rules
+                          (Config.DISPATCH_RULES)
+      --input-cache=DIR   reuse parsed inputs cached as Parquet in DIR (Config.INPUT_CACHE_DIR)
+      --promo-scope       only prepare / merge / calculate File A rows of File B Sheet 1 Articles;
+                          other rows are passed through to Final Order Report (Config.PROMO_SCOPE_ONLY)
     """
     cfg = Config()
 
-    if lead_time is None and len(sys.argv) >= 4:
+    # Separate "--flags" from positional arguments
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    lead_time_sweep = lead_time_sweep or "--lead-time-sweep" in flags
+    memory_report = memory_report or "--memory-report" in flags
+    profile_dump = "--profile-dump" in flags
+    profile = profile or profile_dump or "--profile" in flags
+    profiler = StageProfiler(enabled=profile, cprofile=profile_dump)
+    if "--parallel-read" in flags:
+        cfg.PARALLEL_READ = True
+    if "--promo-scope" in flags:
+        cfg.PROMO_SCOPE_ONLY = True
+    for flag in flags:
+        if flag.startswith("--chunk-rows="):
+            cfg.FILE_A_CHUNK_ROWS = int(flag.split("=", 1)[1])
+        elif flag.startswith("--sheet="):
+            cfg.FILE_A_SHEET = flag.split("=", 1)[1]
+        elif flag.startswith("--member-a="):
+            cfg.FILE_A_MEMBER_PATTERN = flag.split("=", 1)[1]
+        elif flag.startswith("--member-b="):
+            cfg.FILE_B_MEMBER_PATTERN = flag.split("=", 1)[1]
+        elif flag.startswith("--dispatch-rules="):
+            cfg.DISPATCH_RULES = flag.split("=", 1)[1]
+        elif flag.startswith("--input-cache="):
+            cfg.INPUT_CACHE_DIR = flag.split("=", 1)[1]
+
+    if lead_time is None and len(args) >= 3:
         try:
-            lead_time = int(sys.argv[3])
+            lead_time = int(args[2])
         except ValueError:
             lead_time = cfg.DEFAULT_LEAD_TIME
 
     if lead_time is None:
         lead_time = cfg.DEFAULT_LEAD_TIME
+    if lead_time < 0:
+        raise ValueError(f"Lead time must be 0 or more days, got {lead_time}")
 
     # CLI args parsing (simple)
-    if len(sys.argv) >= 2:
-        file_a = sys.argv[1]
-    if len(sys.argv) >= 3:
-        file_b = sys.argv[2]
-    if len(sys.argv) >= 5:
-        output = sys.argv[4]
+    if len(args) >= 1:
+        file_a = args[0]
+    if len(args) >= 2:
+        file_b = args[1]
+    if len(args) >= 4:
+        output = args[3]
     
     # Generate timestamp in YYYYMMDDHHMM format if not already present
     if "_20" not in output:  # Check if timestamp already exists
@@ -1396,16 +3124,76 @@ def main(
     file_b_path = Path(file_b)
     output_path = Path(output)
 
-    df_a_raw, df_b1_raw, df_b2_raw = read_input_files(file_a_path, file_b_path, cfg)
-
-    df_a_clean, warn_a = prepare_file_a(df_a_raw, cfg)
-    df_b1, df_b2, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
-
-    merged, warn_merge = merge_data(df_a_clean, df_b1, df_b2, cfg)
-    detail = calculate_demand(merged, cfg, lead_time=lead_time)
-    summary = generate_summary(detail, cfg)
-
-    export_to_excel(detail, summary, df_a_clean, df_b1, df_b2, output_path)
+    df_a_passthrough = None
+    if cfg.FILE_A_CHUNK_ROWS > 0:
+        # Streaming File A: File B first, so its Articles can filter File A chunk by chunk
+        with profiler.stage("read_input_files") as stage:
+            df_b1_raw, df_b2_raw = _read_file_b(file_b_path, cfg)
+            stage.set_output(df_b1_raw)
+        with profiler.stage("prepare_file_b") as stage:
+            df_b1, df_b2, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
+            stage.set_output(df_b1)
+        with profiler.stage("prepare_file_a") as stage:
+            promo_articles = df_b1["Article"] if cfg.PROMO_SCOPE_ONLY else None
+            out_of_scope: Optional[List[pd.DataFrame]] = (
+                [] if cfg.PROMO_SCOPE_ONLY and cfg.PROMO_SCOPE_PASSTHROUGH else None
+            )
+            df_a_clean, warn_a = prepare_file_a_chunked(
+                file_a_path, cfg, promo_articles=promo_articles, out_of_scope=out_of_scope
+            )
+            if out_of_scope:
+                df_a_passthrough = pd.concat(out_of_scope, ignore_index=True)
+            stage.set_output(df_a_clean)
+    else:
+        with profiler.stage("read_input_files") as stage:
+            df_a_raw, df_b1_raw, df_b2_raw = read_input_files(file_a_path, file_b_path, cfg)
+            stage.set_output(df_a_raw)
+
+        with profiler.stage("prepare_file_b") as stage:
+            df_b1, df_b2, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
+            stage.set_output(df_b1)
+        warn_scope: List[str] = []
+        if cfg.PROMO_SCOPE_ONLY:
+            with profiler.stage("split_promo_scope") as stage:
+                df_a_raw, df_a_passthrough, warn_scope = split_promo_scope(df_a_raw, df_b1["Article"], cfg)
+                stage.set_output(df_a_raw)
+        with profiler.stage("prepare_file_a") as stage:
+            df_a_clean, warn_a = prepare_file_a(df_a_raw, cfg)
+            warn_a[:0] = warn_scope
+            stage.set_output(df_a_clean)
+
+    with profiler.stage("merge_data") as stage:
+        merged, warn_merge = merge_data(df_a_clean, df_b1, df_b2, cfg)
+        stage.set_output(merged)
+    lead_time_comparison = None
+    if lead_time_sweep:
+        with profiler.stage("calculate_demand_sweep") as stage:
+            sweep = calculate_demand_sweep(
+                merged, cfg, lead_times=list(range(max(cfg.MAX_LEAD_TIME, lead_time) + 1))
+            )
+            detail = sweep.detail(lead_time)
+            lead_time_comparison = sweep.comparison(cfg)
+            stage.set_output(detail)
+    else:
+        with profiler.stage("calculate_demand") as stage:
+            detail = calculate_demand(merged, cfg, lead_time=lead_time)
+            stage.set_output(detail)
+    with profiler.stage("generate_summary") as stage:
+        summary = generate_summary(detail, cfg)
+        stage.set_output(summary)
+
+    with profiler.stage("export_to_excel"):
+        export_to_excel(
+            detail,
+            summary,
+            df_a_clean,
+            df_b1,
+            df_b2,
+            output_path,
+            lead_time_comparison=lead_time_comparison,
+            df_a_passthrough=df_a_passthrough,
+            article_match=warn_merge.article_match,
+        )
 
     # Print warnings to stdout for user visibility
     all_warnings = warn_a + warn_b + warn_merge
@@ -1414,6 +3202,28 @@ def main(
         for w in all_warnings:
             print(f"- {w}")
         print("================\n")
+    if memory_report:
+        report = memory_usage_report(
+            [
+                ("File A", df_a_clean),
+                ("File B1", df_b1),
+                ("File B2", df_b2),
+                ("Merged", merged),
+                ("Detail", detail),
+                ("Summary", summary),
+            ]
+        )
+        print("=== MEMORY REPORT ===")
+        print(report.to_string(index=False))
+        print("=====================\n")
+    if profile:
+        print("=== STAGE PROFILE ===")
+        print(profiler.report().to_string(index=False))
+        if profile_dump:
+            stats_path = output_path.with_name(f"{output_path.stem}_{profiler.slowest_stage()}.pstats")
+            profiler.dump_slowest(stats_path)
+            print(f"cProfile statistics of the slowest stage written to: {stats_path}")
+        print("=====================\n")
     print(f"Calculation completed. Output written to: {output_path}")
 
 
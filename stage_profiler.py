@@ -0,0 +1,190 @@
+"""
+Per-stage timing and memory instrumentation for the pipeline.
+
+Each stage (read_input_files, prepare_file_a, ..., export_to_excel) is wrapped in
+StageProfiler.stage(name) or decorated with StageProfiler.profiled(name). For every
+stage the profiler records wall time, CPU time, the process peak RSS when the stage
+ends and its growth during the stage, and the rows / columns of the stage output.
+
+A disabled profiler hands out one shared no-op context, so instrumented code runs
+unchanged (no timers, no cProfile) when profiling is off.
+"""
+
+import cProfile
+import functools
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far; None where unavailable (Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageRecord:
+    """Measurements of one stage run."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb: Optional[float] = None
+        self.peak_rss_delta_mb: Optional[float] = None
+        self.rows: Optional[int] = None
+        self.columns: Optional[int] = None
+
+    def set_output(self, result: Any) -> None:
+        """Record rows / columns of the stage output (a DataFrame or a tuple starting with one)."""
+        frame = result[0] if isinstance(result, tuple) and result else result
+        if isinstance(frame, pd.DataFrame):
+            self.rows, self.columns = frame.shape
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "Stage": self.stage,
+            "Wall_s": round(self.wall_seconds, 4),
+            "CPU_s": round(self.cpu_seconds, 4),
+            "Peak_RSS_MB": self.peak_rss_mb,
+            "Peak_RSS_Delta_MB": self.peak_rss_delta_mb,
+            "Rows": self.rows,
+            "Columns": self.columns,
+        }
+
+
+class _NullStage:
+    """Context used when profiling is disabled: records nothing."""
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set_output(self, result: Any) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageContext:
+    def __init__(self, profiler: "StageProfiler", name: str):
+        self.profiler = profiler
+        self.record = StageRecord(name)
+        self.profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> StageRecord:
+        self.rss_before = peak_rss_bytes()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        if self.profiler.cprofile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self.record
+
+    def __exit__(self, *exc_info) -> bool:
+        if self.profile is not None:
+            self.profile.disable()
+        record = self.record
+        record.wall_seconds = time.perf_counter() - self.wall_start
+        record.cpu_seconds = time.process_time() - self.cpu_start
+        rss_after = peak_rss_bytes()
+        if rss_after is not None:
+            record.peak_rss_mb = round(rss_after / (1024 * 1024), 1)
+        if self.rss_before is not None and rss_after is not None:
+            record.peak_rss_delta_mb = round((rss_after - self.rss_before) / (1024 * 1024), 1)
+        self.profiler._add(record, self.profile)
+        return False
+
+
+class StageProfiler:
+    """
+    Collects StageRecords for a pipeline run.
+
+    Usage:
+        profiler = StageProfiler(enabled=True)
+        with profiler.stage("merge_data") as stage:
+            merged, warnings = merge_data(...)
+            stage.set_output(merged)
+        print(profiler.report())
+
+    With cprofile=True every stage also runs under cProfile and the statistics of
+    the slowest stage can be written with dump_slowest().
+    """
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False):
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.records: List[StageRecord] = []
+        self._slowest_profile: Optional[cProfile.Profile] = None
+        self._slowest_seconds = -1.0
+
+    def stage(self, name: str):
+        """Context manager measuring one stage; a shared no-op when disabled."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageContext(self, name)
+
+    def profiled(self, name: Optional[str] = None) -> Callable:
+        """Decorator form of stage(); the return value is recorded as the stage output."""
+
+        def decorator(func: Callable) -> Callable:
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name) as stage:
+                    result = func(*args, **kwargs)
+                    stage.set_output(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def _add(self, record: StageRecord, profile: Optional[cProfile.Profile]) -> None:
+        self.records.append(record)
+        if profile is not None and record.wall_seconds > self._slowest_seconds:
+            self._slowest_seconds = record.wall_seconds
+            self._slowest_profile = profile
+
+    def extend(self, records: List[StageRecord]) -> None:
+        """Add records measured elsewhere (e.g. returned by a cached stage)."""
+        if self.enabled:
+            self.records.extend(records)
+
+    def slowest_stage(self) -> Optional[str]:
+        if not self.records:
+            return None
+        return max(self.records, key=lambda r: r.wall_seconds).stage
+
+    def report(self) -> pd.DataFrame:
+        """One row per stage: Stage, Wall_s, CPU_s, Peak_RSS_MB, Peak_RSS_Delta_MB, Rows, Columns."""
+        report = pd.DataFrame(
+            [record.to_dict() for record in self.records],
+            columns=["Stage", "Wall_s", "CPU_s", "Peak_RSS_MB", "Peak_RSS_Delta_MB", "Rows", "Columns"],
+        )
+        return report.astype({"Rows": "Int64", "Columns": "Int64"})
+
+    def dump_slowest(self, path: Path) -> Optional[Path]:
+        """Write pstats of the slowest cProfile'd stage to path (None without cprofile data)."""
+        if self._slowest_profile is None:
+            return None
+        path = Path(path)
+        self._slowest_profile.dump_stats(str(path))
+        return path
@@ -12,18 +12,102 @@ from promo_calculator import (
     read_input_files,
     prepare_file_a,
     prepare_file_b,
+    split_promo_scope,
     merge_data,
-    calculate_demand,
+    calculate_demand_sweep,
     generate_summary,
     export_to_excel,
 )
+from input_cache import config_fingerprint, content_digest
+from stage_profiler import StageProfiler
 
 
 def _display_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Return a copy with underscores replaced by spaces in column names for display."""
-    out = df.copy()
-    out.columns = [c.replace("_", " ") for c in out.columns]
-    return out
+    """
+    Return df with underscores replaced by spaces in column names for display. Under pandas
+    copy-on-write only the column labels are new; the data is shared with df.
+    """
+    return df.rename(columns=lambda c: c.replace("_", " "))
+
+
+def _config_key(cfg: Config) -> str:
+    """Fingerprint of every Config setting, so cached stages are invalidated by any config change."""
+    settings = {name: getattr(cfg, name) for name in dir(cfg) if name.isupper()}
+    return config_fingerprint(cfg, **settings)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_prepare_merge(
+    file_a_digest: str,
+    file_b_digest: str,
+    config_key: str,
+    _file_a_bytes: bytes,
+    _file_b_bytes: bytes,
+    _cfg: Config,
+    profile: bool = False,
+):
+    """
+    Parse, prepare and merge the uploads.
+
+    Cached on the upload SHA-256 digests and the Config fingerprint (underscore
+    arguments are not hashed by Streamlit), so moving the Lead Time slider never
+    re-parses the uploads. With profile=True the last item holds the stage records
+    measured when the result was computed.
+    """
+    profiler = StageProfiler(enabled=profile)
+    with profiler.stage("read_input_files") as stage:
+        df_a_raw, df_b1_raw, df_b2_raw = read_input_files(_file_a_bytes, _file_b_bytes, _cfg)
+        stage.set_output(df_a_raw)
+
+    with profiler.stage("prepare_file_b") as stage:
+        df_b1, df_b2, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, _cfg)
+        stage.set_output(df_b1)
+    df_a_passthrough = None
+    warn_scope = []
+    if _cfg.PROMO_SCOPE_ONLY:
+        with profiler.stage("split_promo_scope") as stage:
+            df_a_raw, df_a_passthrough, warn_scope = split_promo_scope(df_a_raw, df_b1["Article"], _cfg)
+            stage.set_output(df_a_raw)
+    with profiler.stage("prepare_file_a") as stage:
+        df_a_clean, warn_a = prepare_file_a(df_a_raw, _cfg)
+        warn_a[:0] = warn_scope
+        stage.set_output(df_a_clean)
+
+    with profiler.stage("merge_data") as stage:
+        merged, warn_merge = merge_data(df_a_clean, df_b1, df_b2, _cfg)
+        stage.set_output(merged)
+    return (
+        df_a_clean,
+        df_a_passthrough,
+        df_b1,
+        df_b2,
+        merged,
+        warn_a,
+        warn_b,
+        warn_merge,
+        profiler.records,
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def compute_lead_time_sweep(
+    file_a_digest: str,
+    file_b_digest: str,
+    config_key: str,
+    _merged: pd.DataFrame,
+    _cfg: Config,
+    profile: bool = False,
+):
+    """
+    Demand / dispatch for every slider lead time in one pass; the slider then only
+    picks a slice (DemandSweep.detail) instead of re-running calculate_demand.
+    Returns (sweep, stage records).
+    """
+    profiler = StageProfiler(enabled=profile)
+    with profiler.stage("calculate_demand_sweep") as stage:
+        sweep = calculate_demand_sweep(_merged, _cfg)
+        stage.set_output(sweep.base)
+    return sweep, profiler.records
 
 
 def run_app():
@@ -39,12 +123,24 @@ def run_app():
     lead_time = st.sidebar.slider(
         "Lead Time (Days)",
         min_value=0,
-        max_value=14,
+        max_value=cfg.MAX_LEAD_TIME,
         value=cfg.DEFAULT_LEAD_TIME,
         step=1,
         help="Used in: Base Demand = Daily Sales Rate × (Target Cover Days + Lead Time).",
     )
 
+    profile_stages = st.sidebar.checkbox(
+        "Profile pipeline stages",
+        value=False,
+        help="Show wall / CPU time, peak memory growth and rows / columns of every stage.",
+    )
+    cfg.PROMO_SCOPE_ONLY = st.sidebar.checkbox(
+        "Promo articles only",
+        value=cfg.PROMO_SCOPE_ONLY,
+        help="Only calculate File A rows whose Article is in File B Sheet 1. "
+        "Other rows are still listed in the Final Order Report, without calculated columns.",
+    )
+
     st.sidebar.markdown("---")
     with st.sidebar.expander("File Requirements (File A & B)", expanded=False):
         st.markdown(
@@ -76,14 +172,14 @@ def run_app():
         st.markdown("**Upload File A (Promotion Target File A.XLSX)**")
         file_a = st.file_uploader(
             "選擇 File A",
-            type=["xlsx", "xls"],
+            type=["xlsx", "xls", "csv", "parquet", "arrow", "feather", "zip", "gz", "zst"],
             key="file_a",
         )
     with col_b:
         st.markdown("**Upload File B (Promotion Target File B.xlsx)**")
         file_b = st.file_uploader(
             "選擇 File B",
-            type=["xlsx", "xls"],
+            type=["xlsx", "xls", "zip"],
             key="file_b",
         )
 
@@ -91,35 +187,55 @@ def run_app():
         st.info("請上載 File A 與 File B 後再按「開始分析」。")
         return
 
+    file_a_bytes = file_a.getvalue()
+    file_b_bytes = file_b.getvalue()
+    upload_key = (content_digest(file_a_bytes), content_digest(file_b_bytes))
+
     # Start analysis button
     if st.button("開始分析 / Run Analysis", type="primary"):
+        st.session_state["analysis_uploads"] = upload_key
+
+    # Keep showing results for the analysed uploads, so moving the Lead Time slider
+    # re-calculates immediately from the cached parse / prepare / merge stage
+    if st.session_state.get("analysis_uploads") == upload_key:
+        profiler = StageProfiler(enabled=profile_stages)
         try:
             with st.spinner("Reading and validating input files..."):
-                # Use in-memory bytes with pandas
-                # Read all columns as string, then ensure Article column is TEXT format
-                df_a_raw = pd.read_excel(file_a, sheet_name="Sheet1", dtype=str)
-                # Ensure Article column is treated as TEXT (string) format
-                if "Article" in df_a_raw.columns:
-                    df_a_raw["Article"] = df_a_raw["Article"].astype(str)
-
-                xls_b = pd.ExcelFile(file_b)
-                df_b1_raw = pd.read_excel(xls_b, sheet_name="Sheet 1", dtype=str)
-                # Ensure Article column is treated as TEXT (string) format in File B Sheet 1
-                if "Article" in df_b1_raw.columns:
-                    df_b1_raw["Article"] = df_b1_raw["Article"].astype(str)
-                
-                df_b2_raw = pd.read_excel(xls_b, sheet_name="Sheet 2", dtype=str)
-
-                df_a_clean, warn_a = prepare_file_a(df_a_raw, cfg)
-                df_b1, df_b2, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
-
-                merged, warn_merge = merge_data(df_a_clean, df_b1, df_b2, cfg)
+                (
+                    df_a_clean,
+                    df_a_passthrough,
+                    df_b1,
+                    df_b2,
+                    merged,
+                    warn_a,
+                    warn_b,
+                    warn_merge,
+                    parse_records,
+                ) = load_prepare_merge(
+                    upload_key[0],
+                    upload_key[1],
+                    _config_key(cfg),
+                    file_a_bytes,
+                    file_b_bytes,
+                    cfg,
+                    profile=profile_stages,
+                )
+                profiler.extend(parse_records)
 
             with st.spinner("Calculating demand and suggested dispatch..."):
-                detail = calculate_demand(merged, cfg, lead_time=lead_time)
+                sweep, sweep_records = compute_lead_time_sweep(
+                    upload_key[0], upload_key[1], _config_key(cfg), merged, cfg, profile=profile_stages
+                )
+                profiler.extend(sweep_records)
+                with profiler.stage("detail_slice") as stage:
+                    detail = sweep.detail(lead_time)
+                    lead_time_comparison = sweep.comparison(cfg)
+                    stage.set_output(detail)
 
             with st.spinner("Generating summary report..."):
-                summary = generate_summary(detail, cfg)
+                with profiler.stage("generate_summary") as stage:
+                    summary = generate_summary(detail, cfg)
+                    stage.set_output(summary)
 
             # Display warnings - merge warnings shown prominently if critical
             all_warnings = warn_a + warn_b + warn_merge
@@ -148,9 +264,40 @@ def run_app():
                             # 普通警告使用默認樣式
                             st.warning(w)
 
+            numeric_issues = pd.concat(
+                [warnings.numeric.to_frame() for warnings in (warn_a, warn_b) if hasattr(warnings, "numeric")],
+                ignore_index=True,
+            )
+            if not numeric_issues.empty:
+                with st.expander("Numeric Data Issues", expanded=False):
+                    st.caption("Per input column: non-numeric values, negatives and capped values (all set to 0 or the cap).")
+                    st.dataframe(_display_columns(numeric_issues), hide_index=True)
+
+            merged_keys = getattr(warn_a, "duplicates", None)
+            if merged_keys is not None and not merged_keys.empty:
+                with st.expander(f"Merged Duplicate Rows ({len(merged_keys)} Article / Site keys)", expanded=False):
+                    st.caption("File A rows sharing Article and Site: quantities summed, other columns keep the first value.")
+                    st.dataframe(merged_keys, hide_index=True)
+
+            fanout = getattr(warn_merge, "fanout", None)
+            if fanout is not None and not fanout.empty:
+                with st.expander(f"Join Fan-out ({len(fanout)} keys)", expanded=False):
+                    st.caption("Keys matching several File B rows: each matching File A row is repeated once per match.")
+                    st.dataframe(_display_columns(fanout), hide_index=True)
+
+            article_match = getattr(warn_merge, "article_match", None)
+            if article_match is not None and (len(article_match.only_in_a) or len(article_match.only_in_b)):
+                with st.expander(
+                    f"Unmatched Articles ({len(article_match.only_in_a)} File A only, "
+                    f"{len(article_match.only_in_b)} File B only)",
+                    expanded=False,
+                ):
+                    st.caption("Full list, also exported as the Article_Match sheet of the Excel download.")
+                    st.dataframe(_display_columns(article_match.to_frame()), hide_index=True)
+
             # Main result tabs
-            tab1, tab2, tab3 = st.tabs(
-                ["Detail Calculation", "Summary Report", "Visualizations"]
+            tab1, tab2, tab3, tab4 = st.tabs(
+                ["Detail Calculation", "Summary Report", "Visualizations", "Lead Time Comparison"]
             )
 
             with tab1:
@@ -240,8 +387,10 @@ def run_app():
 
             with tab3:
                 st.subheader("SKU Demand vs. Available Stock (Exclude D001)")
-                # Exclude DC site for this chart
-                detail_non_dc = detail[detail["Site"] != cfg.DC_SITE_CODE].copy()
+                # Exclude DC site for this chart (only the charted columns are taken)
+                detail_non_dc = detail.loc[
+                    detail["Site"] != cfg.DC_SITE_CODE, ["Article", "Site", "Total_Demand", "Net_Demand_for_Dispatch"]
+                ]
                 if not detail_non_dc.empty:
                     # Aggregate by Article: only compute Total_Demand here
                     chart_df = (
@@ -277,14 +426,36 @@ def run_app():
                         values="Net_Demand_for_Dispatch",
                         aggfunc="sum",
                         fill_value=0,
+                        observed=True,
                     )
                     # Use plain table to avoid matplotlib dependency on Streamlit Cloud
                     st.dataframe(_display_columns(pivot))
                 else:
                     st.info("No non-D001 data available for heatmap.")
 
+            with tab4:
+                st.subheader(f"Lead Time Comparison (0–{cfg.MAX_LEAD_TIME} days)")
+                st.caption("Total dispatch and D001 shortage SKUs for every lead time; current slider value highlighted.")
+                st.dataframe(
+                    _display_columns(lead_time_comparison)
+                    .style
+                    .apply(
+                        lambda r: [
+                            "background-color: #fff3cd" if r["Lead Time"] == lead_time else ""
+                        ] * len(r),
+                        axis=1,
+                    )
+                    .format({"Total Demand": "{:.0f}"}),
+                    width='stretch',
+                )
+                st.line_chart(
+                    _display_columns(lead_time_comparison).set_index("Lead Time")[
+                        ["Total Dispatch", "Total Suggested DN Qty"]
+                    ]
+                )
+
             # Prepare downloadable Excel
-            with st.spinner("Preparing Excel export..."):
+            with st.spinner("Preparing Excel export..."), profiler.stage("export_to_excel"):
                 output_buffer = io.BytesIO()
                 export_to_excel(
                     detail=detail,
@@ -293,9 +464,20 @@ def run_app():
                     df_b1=df_b1,
                     df_b2=df_b2,
                     output_path=output_buffer,
+                    lead_time_comparison=lead_time_comparison,
+                    df_a_passthrough=df_a_passthrough,
+                    article_match=getattr(warn_merge, "article_match", None),
                 )
                 output_buffer.seek(0)
 
+            if profile_stages:
+                with st.sidebar.expander("Stage Profile", expanded=True):
+                    st.dataframe(_display_columns(profiler.report()), hide_index=True)
+                    st.caption(
+                        "Read / prepare / merge / sweep rows are measured when those cached "
+                        "stages last ran; other stages are measured on this rerun."
+                    )
+
             # Generate timestamp in YYYYMMDDHHMM format
             current_time = datetime.now()
             timestamp = current_time.strftime("%Y%m%d%H%M")
@@ -0,0 +1,78 @@
+"""
+測試 Article 匹配診斷 (match_articles / ArticleMatchReport)
+
+測試場景：
+1. 匹配數量及只在 File A / File B 的 Article 與集合運算結果一致（重複、空值、分類型別）
+2. 警告訊息最多列出 10 個 Article，其餘以 "... and N more" 表示
+3. 完全沒有匹配時保留 CRITICAL 警告
+4. 完整清單匯出為 Article_Match 工作表
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import ArticleMatchReport, Config, export_to_excel, match_articles, merge_data
+from test_join_plan import _inputs
+
+
+def test_matches_set_operations():
+    """Test counts and unmatched lists against Python sets"""
+    rng = np.random.default_rng(23)
+    for trial in range(10):
+        a = pd.Series(rng.choice([f"{i:06d}" for i in range(300)] + [None], rng.integers(0, 2000)), dtype="str")
+        b = pd.Series(rng.choice([f"{i:06d}" for i in range(200, 400)], rng.integers(0, 100)), dtype="str")
+        if trial % 2:
+            a = a.astype("category")
+        report = match_articles(a, b)
+        set_a, set_b = set(a.dropna()), set(b.dropna())
+        assert report.file_a_articles == len(set_a) and report.file_b_articles == len(set_b)
+        assert report.matched == len(set_a & set_b)
+        assert report.only_in_a.tolist() == sorted(set_a - set_b)
+        assert report.only_in_b.tolist() == sorted(set_b - set_a)
+    print(f"[CORRECT] {trial + 1} random Article sets")
+
+
+def test_messages_bounded():
+    """Test warning messages list at most MAX_EXAMPLES Articles"""
+    a = pd.Series([f"A{i:05d}" for i in range(100_000)], dtype="str")
+    b = pd.Series([f"A{i:05d}" for i in range(99_990, 100_025)], dtype="str")
+    messages = match_articles(a, b).messages()
+    print(messages)
+    assert messages[0] == "[OK] Article match summary: 10 matched, 99990 in File A only, 25 in File B only."
+    assert messages[1].endswith("'A00009'] ... and 99980 more")
+    assert messages[2] == (
+        "Articles in File B but not in File A (unused promo targets): "
+        f"{[f'A{i}' for i in range(100_000, 100_010)]} ... and 15 more"
+    )
+    assert max(len(m) for m in messages) < 300
+
+    critical = match_articles(pd.Series(["A1"]), pd.Series(["B1", "B2"])).messages()
+    assert critical[0].startswith("⚠️ CRITICAL: NO Articles from File A matched with File B Sheet1!")
+    assert "File A has 1 unique Articles, File B Sheet1 has 2 unique Articles." in critical[0]
+    assert critical[2] == "Articles in File B but not in File A (unused promo targets): ['B1', 'B2']"
+
+
+def test_merge_data_exports_sheet():
+    """Test merge_data keeps the report and export_to_excel writes Article_Match"""
+    df_a, df_b1, df_b2, cfg = _inputs()
+    df_b1 = pd.concat([df_b1, df_b1.iloc[[0]].assign(Article="B9")], ignore_index=True)
+    merged, warnings = merge_data(df_a, df_b1, df_b2, cfg)
+    assert "[OK] Article match summary: 2 matched, 0 in File A only, 1 in File B only." in warnings
+    frame = warnings.article_match.to_frame()
+    assert frame.values.tolist() == [["B9", ArticleMatchReport.FILE_B_ONLY]]
+
+    buffer = io.BytesIO()
+    summary = pd.DataFrame({"Article": merged["Article"]})
+    detail = merged.assign(Suggested_Dispatch_Qty=0, Suggested_DN_Qty=0, Dispatch_Type="", Total_Demand=0)
+    export_to_excel(detail, summary, df_a, df_b1, df_b2, buffer, article_match=warnings.article_match)
+    sheet = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name="Article_Match", dtype=str)
+    assert sheet.columns.tolist() == ["Article", "Match Status"]
+    assert sheet.values.tolist() == [["B9", "File B only (unused promo targets)"]]
+
+
+if __name__ == "__main__":
+    test_matches_set_operations()
+    test_messages_bounded()
+    test_merge_data_exports_sheet()
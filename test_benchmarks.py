@@ -0,0 +1,61 @@
+"""
+測試基準測試套件 (benchmarks)
+
+測試場景：
+1. 合成 File A 含 D001 / HB87 / H 開頭 / 澳門店鋪、RF 與 ND、重複行及空白 Launch Date
+2. 合成 File B 的 Article 全部來自 File A，Sheet 2 不含 D001
+3. run_benchmarks 對每個階段計時並寫入 JSON
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks import generate_file_a, generate_file_b
+from benchmarks.run_benchmarks import STAGES, run_benchmarks
+from promo_calculator import Config
+
+
+def test_synthetic_data_mix():
+    """Test synthetic File A / File B contents"""
+    cfg = Config()
+    df_a = generate_file_a(3000, n_sites=30, seed=1)
+    df_b1, df_b2 = generate_file_b(df_a, seed=1)
+    sites = set(df_a[cfg.COL_A_SITE])
+    print(f"File A: {len(df_a)} rows, {len(sites)} sites; File B Sheet 1: {len(df_b1)} rows")
+
+    assert {"D001", "HB87"} <= sites
+    assert any(s.startswith("HA") for s in sites) and any(s.startswith("MA") for s in sites)
+    assert set(df_a[cfg.COL_A_RP_TYPE]) == {"RF", "ND"}
+    assert df_a.duplicated([cfg.COL_A_ARTICLE, cfg.COL_A_SITE]).sum() > 0
+    assert df_a[cfg.COL_A_LAUNCH_DATE].isna().sum() > 0
+    assert set(df_b1[cfg.COL_B1_ARTICLE]) <= set(df_a[cfg.COL_A_ARTICLE])
+    assert "D001" not in set(df_b2[cfg.COL_B2_SITE])
+
+
+def test_run_benchmarks_json():
+    """Test per-stage timings written as JSON"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "bench.json"
+        run_benchmarks([300], output)
+        run_benchmarks([500], Path(tmp) / "bench_no_excel.json", skip_excel=True)
+        report = json.loads(output.read_text(encoding="utf-8"))
+        report_no_excel = json.loads((Path(tmp) / "bench_no_excel.json").read_text(encoding="utf-8"))
+
+    stages = report["results"][0]["stages"]
+    assert list(stages) == STAGES
+    for name in STAGES:
+        assert stages[name]["skipped"] is None
+        assert stages[name]["seconds"] >= 0
+    assert stages["calculate_demand"]["rows"] == stages["merge_data"]["rows"]
+
+    stages = report_no_excel["results"][0]["stages"]
+    assert stages["read_input_files"]["skipped"] == "--skip-excel"
+    assert stages["export_to_excel"]["skipped"] == "--skip-excel"
+    assert stages["generate_summary"]["rows"] > 0
+    print("[CORRECT] Benchmark JSON written")
+
+
+if __name__ == "__main__":
+    test_synthetic_data_mix()
+    test_run_benchmarks_json()
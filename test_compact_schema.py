@@ -0,0 +1,89 @@
+"""
+測試精簡欄位型別 (COMPACT_DTYPES)
+
+測試場景：
+1. category / int32 / float32 欄位型別
+2. 含 NaN、小數或不能精確表示為 float32 的欄位保持原型別
+3. 開啟與關閉 COMPACT_DTYPES 時 calculate_demand / 匯總結果一致
+4. memory_usage_report 每階段一行
+"""
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    apply_compact_schema,
+    calculate_demand,
+    calculate_demand_sweep,
+    generate_summary,
+    memory_usage_report,
+)
+from test_vectorized_dispatch_engine import build_random_detail
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Categoricals back to object so frames compare by value only."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object).where(df[col].notna(), np.nan)
+    return df.astype(object)
+
+
+def test_compact_schema_dtypes():
+    """Test lossless downcasts only"""
+    df = pd.DataFrame({
+        "Site": ["HA01", "D001", "HA01"],
+        "RP_Type": ["RF", "ND", None],
+        "SaSa_Net_Stock": [10.0, 0.0, 25.0],
+        "Pending_Received": [1.0, np.nan, 2.0],
+        "MOQ": [12.0, 0.7, 6.0],
+        "Pct_HK": [0.5, 0.25, 0.0],
+        "Site_Target_%": [0.1, 0.2, 0.3],
+    })
+    apply_compact_schema(df)
+    print(df.dtypes)
+    assert isinstance(df["Site"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["RP_Type"].dtype, pd.CategoricalDtype)
+    assert df["SaSa_Net_Stock"].dtype == np.int32
+    assert df["Pending_Received"].dtype == np.float64  # NaN kept
+    assert df["MOQ"].dtype == np.float64  # fractional MOQ kept
+    assert df["Pct_HK"].dtype == np.float32
+    assert df["Site_Target_%"].dtype == np.float64  # 0.1 not exact in float32
+    assert df["RP_Type"].isna().tolist() == [False, False, True]
+
+
+def test_compact_schema_same_results():
+    """Test calculate_demand / sweep / summary values with and without compact schema"""
+    df = build_random_detail(n_rows=1500, seed=11)
+    df["Group_No"] = np.where(np.arange(len(df)) % 3, "001", "002")
+    df["In_Quality_Insp"] = 0
+    df["Blocked"] = 0
+
+    results = {}
+    for compact in (False, True):
+        cfg = Config()
+        cfg.COMPACT_DTYPES = compact
+        detail = calculate_demand(df, cfg, lead_time=5)
+        sweep_detail = calculate_demand_sweep(df, cfg, lead_times=[0, 5]).detail(5)
+        results[compact] = (detail, sweep_detail, generate_summary(detail, cfg))
+
+    for wide, compact in zip(results[False], results[True]):
+        pd.testing.assert_frame_equal(_plain(wide), _plain(compact))
+
+    detail = results[True][0]
+    assert isinstance(detail["Dispatch_Type"].dtype, pd.CategoricalDtype)
+    assert detail["Suggested_DN_Qty"].dtype == np.int32
+
+    report = memory_usage_report([("Wide", results[False][0]), ("Compact", detail)])
+    print(report)
+    assert report["Stage"].tolist() == ["Wide", "Compact"]
+    assert report["Rows"].tolist() == [len(df), len(df)]
+    assert report.loc[1, "Memory_MB"] < report.loc[0, "Memory_MB"]
+    print("[CORRECT] Compact schema keeps results identical")
+
+
+if __name__ == "__main__":
+    test_compact_schema_dtypes()
+    test_compact_schema_same_results()
@@ -0,0 +1,122 @@
+"""
+測試壓縮輸入檔案 (.zip / .gz / .zst)
+
+測試場景：
+1. 以副檔名或檔頭判斷壓縮格式，XLSX / XLSB 本身不視為壓縮檔
+2. .gz / .zst CSV 及 .zip 內的 Excel 與原檔讀取結果一致（整張讀取及分塊串流）
+3. File B .zip 可內含 Excel 或 "Sheet 1.csv" / "Sheet 2.csv"
+4. 以名稱樣式選擇 .zip 內的檔案，沒有符合檔案時列出壓縮檔內容
+"""
+
+import gzip
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from input_formats import decompress_input, detect_compression, workbook_zip_kind
+from promo_calculator import Config, prepare_file_a, prepare_file_a_chunked, read_input_files
+from test_excel_reader import write_test_files
+
+
+def test_detect_compression():
+    """Test compression detection by extension and magic bytes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, _ = write_test_files(Path(tmp))
+        assert detect_compression(file_a) is None
+        assert detect_compression(file_a.read_bytes()) is None
+        assert workbook_zip_kind(file_a) == "xlsx"
+    assert detect_compression("export.csv.gz") == "gzip"
+    assert detect_compression("export.ZIP") == "zip"
+    assert detect_compression(gzip.compress(b"Article\n")) == "gzip"
+    assert detect_compression(b"\x28\xb5\x2f\xfd....") == "zstd"
+    assert detect_compression(b"Article,Site\n") is None
+
+    xlsb, archive_bytes = io.BytesIO(), io.BytesIO()
+    with zipfile.ZipFile(xlsb, "w") as archive:
+        archive.writestr("[Content_Types].xml", "")
+        archive.writestr("xl/workbook.bin", b"")
+    with zipfile.ZipFile(archive_bytes, "w") as archive:
+        archive.writestr("export.csv", "Article\n")
+    assert workbook_zip_kind(xlsb.getvalue()) == "xlsb"
+    assert detect_compression(xlsb.getvalue()) is None
+    assert workbook_zip_kind(archive_bytes.getvalue()) is None
+    assert detect_compression(archive_bytes.getvalue()) == "zip"
+
+    member = decompress_input(gzip.compress(b"Article\n000123\n"))
+    assert member.read() == b"Article\n000123\n"
+
+
+def test_compressed_matches_plain():
+    """Test .gz / .zst / .zip inputs give the same File A and File B as the plain files"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        file_a, file_b = write_test_files(folder)
+        expected_a, expected_b1, expected_b2 = read_input_files(file_a, file_b, cfg)
+        expected, _ = prepare_file_a(expected_a, cfg)
+
+        csv_bytes = pd.read_excel(file_a, dtype=str).to_csv(index=False).encode("utf-8")
+        (folder / "file_a.csv.gz").write_bytes(gzip.compress(csv_bytes))
+        with pa.output_stream(str(folder / "file_a.csv.zst"), compression="zstd") as out:
+            out.write(csv_bytes)
+        with zipfile.ZipFile(folder / "file_a.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("readme.txt", "nightly export")
+            archive.write(file_a, "export/File A.xlsx")
+        with zipfile.ZipFile(folder / "file_b.zip", "w") as archive:
+            archive.write(file_b, "File B.xlsx")
+        with zipfile.ZipFile(folder / "file_b_tables.zip", "w") as archive:
+            for sheet in ("Sheet 1", "Sheet 2"):
+                archive.writestr(f"{sheet}.csv", pd.read_excel(file_b, sheet_name=sheet, dtype=str).to_csv(index=False))
+
+        cases = [("file_a.csv.gz", "file_b.zip"), ("file_a.csv.zst", "file_b_tables.zip"), ("file_a.zip", "file_b.zip")]
+        for name_a, name_b in cases:
+            df_a, df_b1, df_b2 = read_input_files(folder / name_a, folder / name_b, cfg)
+            pd.testing.assert_frame_equal(expected, prepare_file_a(df_a, cfg)[0])
+            pd.testing.assert_frame_equal(expected_b1, df_b1)
+            assert df_b2.shape == expected_b2.shape
+            chunked, _ = prepare_file_a_chunked(folder / name_a, cfg, chunk_rows=1)
+            pd.testing.assert_frame_equal(expected, chunked)
+            # Uploads arrive as bytes without a file name
+            from_bytes = read_input_files((folder / name_a).read_bytes(), (folder / name_b).read_bytes(), cfg)[0]
+            pd.testing.assert_frame_equal(df_a, from_bytes)
+            print(f"[CORRECT] {name_a} + {name_b}")
+
+
+def test_member_pattern():
+    """Test selecting the archive member by name pattern"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        file_a, file_b = write_test_files(folder)
+        archive_path = folder / "drop.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.write(file_b, "Promotion Target File B.xlsx")
+            archive.write(file_a, "Promotion Target File A.xlsx")
+
+        cfg.FILE_A_MEMBER_PATTERN = "*File A*"
+        cfg.FILE_B_MEMBER_PATTERN = "*File B*"
+        df_a, df_b1, _ = read_input_files(archive_path, archive_path, cfg)
+        assert "SaSa Net Stock" in df_a.columns
+        assert "SKU Target" in df_b1.columns
+
+        cfg.FILE_A_MEMBER_PATTERN = "*.csv"
+        try:
+            read_input_files(archive_path, file_b, cfg)
+        except ValueError as e:
+            message = str(e)
+        else:
+            raise AssertionError("expected ValueError")
+    print(message)
+    assert "no file matching '*.csv'" in message and "Promotion Target File A.xlsx" in message
+
+
+if __name__ == "__main__":
+    test_detect_compression()
+    test_compressed_matches_plain()
+    test_member_pattern()
@@ -0,0 +1,98 @@
+"""
+測試免複製處理流程 (Config.COPY_FREE_PIPELINE)
+
+測試場景：
+1. 各階段不修改輸入的 DataFrame，結果與完整複製模式相同
+2. copy-on-write 下階段工作表與輸入共用未修改欄位的數據
+3. 匯出時才將表頭底線換成空格，工作表內容與欄名一致
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    _stage_frame,
+    calculate_demand,
+    calculate_demand_sweep,
+    copy_on_write_active,
+    export_to_excel,
+    generate_summary,
+    merge_data,
+    prepare_file_a,
+    prepare_file_b,
+)
+from test_launch_date import _file_a_raw
+
+
+def _file_b_raw():
+    df_b1_raw = pd.DataFrame({"Group No.": ["1"] * 6, "Article": [f"A{i}" for i in range(1, 7)],
+                              "SKU Target": ["60"] * 6, "Promotion Days": ["7"] * 6}, dtype="str")
+    df_b2_raw = pd.DataFrame({"Site": ["HA01"], "Shop Target(HK)": ["1"], "Shop Target(MO)": ["0"],
+                              "Shop Target(ALL)": ["1"]}, dtype="str")
+    return df_b1_raw, df_b2_raw
+
+
+def _run(cfg):
+    df_a_raw = _file_a_raw()
+    df_b1_raw, df_b2_raw = _file_b_raw()
+    inputs = [df.copy(deep=True) for df in (df_a_raw, df_b1_raw, df_b2_raw)]
+    df_a, _ = prepare_file_a(df_a_raw, cfg)
+    df_b1, df_b2, _ = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
+    for before, after in zip(inputs, (df_a_raw, df_b1_raw, df_b2_raw)):
+        pd.testing.assert_frame_equal(before, after)
+
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    merged_before = merged.copy(deep=True)
+    detail = calculate_demand(merged, cfg, lead_time=2)
+    sweep = calculate_demand_sweep(merged, cfg, lead_times=[0, 2])
+    scratch = sweep.detail(2)
+    scratch["Total_Demand"] = -1.0
+    pd.testing.assert_frame_equal(merged_before, merged)
+    pd.testing.assert_frame_equal(detail, sweep.detail(2))
+    return df_a, df_b1, df_b2, detail, generate_summary(detail, cfg)
+
+
+def test_stages_leave_inputs_unchanged():
+    """Test both modes give the same results without modifying stage inputs"""
+    results = {}
+    for copy_free in (True, False):
+        cfg = Config()
+        cfg.COPY_FREE_PIPELINE = copy_free
+        results[copy_free] = _run(cfg)
+    for copy_free_frame, full_copy_frame in zip(results[True], results[False]):
+        pd.testing.assert_frame_equal(copy_free_frame, full_copy_frame)
+    print(f"[CORRECT] {len(results[True][3])} detail rows identical in both modes")
+
+
+def test_stage_frame_shares_columns():
+    """Test the working frame shares unmodified columns with the input"""
+    df = pd.DataFrame({"Qty": np.arange(5.0), "Site": ["HA01"] * 5})
+    shared = _stage_frame(df, copy_free=True)
+    assert np.shares_memory(shared["Qty"].to_numpy(), df["Qty"].to_numpy()) == copy_on_write_active()
+    shared.loc[0, "Qty"] = 99.0
+    shared["Site"] = "HB87"
+    assert df["Qty"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0] and (df["Site"] == "HA01").all()
+    assert not np.shares_memory(_stage_frame(df, copy_free=False)["Qty"].to_numpy(), df["Qty"].to_numpy())
+
+
+def test_export_headers_rewritten():
+    """Test sheet headers replace underscores while the frames keep their names"""
+    df_a, df_b1, df_b2, detail, summary = _run(Config())
+    columns = list(detail.columns)
+    buffer = io.BytesIO()
+    export_to_excel(detail, summary, df_a, df_b1, df_b2, buffer)
+    sheets = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name=None)
+    assert list(detail.columns) == columns
+    assert "Suggested Dispatch Qty" in sheets["Detail_Calculation"].columns
+    assert "Shop Total Stock Available" in sheets["Summary_Report"].columns
+    assert sheets["Detail_Calculation"]["Suggested Dispatch Qty"].tolist() == detail["Suggested_Dispatch_Qty"].tolist()
+    assert not any("_" in str(c) for sheet in sheets.values() for c in sheet.columns)
+
+
+if __name__ == "__main__":
+    test_stages_leave_inputs_unchanged()
+    test_stage_frame_shares_columns()
+    test_export_headers_rewritten()
@@ -0,0 +1,135 @@
+"""
+測試派貨規則表 (Config.DISPATCH_RULES / DEFAULT_DISPATCH_RULES)
+
+測試場景：
+1. 預設規則表與逐行引擎（原 HB87-RF / ND / RF 邏輯）結果一致
+2. 新增特殊店鋪只需加入規則（店鋪樣式、RP Type、條件、公式、備註），先符合的規則優先
+3. 規則可從 CSV / JSON 檔案讀取，Lead Time 批次計算使用相同規則
+4. 未知條件 / 公式、逐行引擎配合自訂規則時提示錯誤
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    DEFAULT_DISPATCH_RULES,
+    Config,
+    calculate_demand,
+    calculate_demand_sweep,
+    compile_dispatch_rules,
+)
+from test_vectorized_dispatch_engine import build_random_detail
+
+HB9X_RULE = {"site": "HB9*", "rp_type": "RF", "condition": "no_target", "formula": "safety_stock_gap",
+             "remark": "HB9X-RF派貨"}
+
+
+def _detail(cfg, df, lead_time=7):
+    return calculate_demand(df, cfg, lead_time=lead_time)
+
+
+def test_default_rules_match_rowwise():
+    """Test the default rule table reproduces the row-wise engine"""
+    df = build_random_detail(3000, seed=7)
+    row_cfg = Config()
+    row_cfg.DISPATCH_ENGINE = "rowwise"
+    expected = _detail(row_cfg, df)
+    cfg = Config()
+    cfg.DISPATCH_RULES = [dict(rule) for rule in DEFAULT_DISPATCH_RULES]
+    got = _detail(cfg, df)
+    for col in ["Suggested_Dispatch_Qty", "Suggested_DN_Qty", "Dispatch_Remark", "Dispatch_Type"]:
+        assert got[col].tolist() == expected[col].tolist(), col
+    print(f"[CORRECT] {len(df)} rows, remarks: {sorted(set(got['Dispatch_Remark']))}")
+
+
+def test_special_store_is_a_rule():
+    """Test adding HB9x stores with the HB87 formula and a rule order change"""
+    df = build_random_detail(3000, seed=8)
+    df["Site"] = df["Site"].replace({"HA01": "HB91", "HC12": "hb95"})
+    default = _detail(Config(), df)
+
+    cfg = Config()
+    cfg.DISPATCH_RULES = [HB9X_RULE] + DEFAULT_DISPATCH_RULES
+    got = _detail(cfg, df)
+    hb9x = df["Site"].str.upper().str.startswith("HB9") & (df["RP_Type"] == "RF")
+    no_target = hb9x & (got["Site_Promo_Demand"] <= 0)
+    assert no_target.any()
+    assert got.loc[~no_target].equals(default.loc[~no_target])
+    assert (got.loc[no_target, "Suggested_DN_Qty"] == 0).all()
+    dispatched = no_target & (got["Suggested_Dispatch_Qty"] > 0)
+    assert dispatched.any() and (got.loc[dispatched, "Dispatch_Remark"] == "HB9X-RF派貨").all()
+    # Same formula as HB87-RF: Mround(Safety Stock - Net Stock - Pending, MOQ), at least one MOQ
+    hb87 = _detail(Config(), df.assign(Site=np.where(hb9x, "HB87", df["Site"])))
+    assert got.loc[no_target, "Suggested_Dispatch_Qty"].tolist() == hb87.loc[no_target, "Suggested_Dispatch_Qty"].tolist()
+
+    # Rules are checked in order: "none" for every ND row of MA sites comes before the ND rule
+    cfg.DISPATCH_RULES = [{"site": "MA*", "rp_type": "ND", "formula": "none"}] + DEFAULT_DISPATCH_RULES
+    got = _detail(cfg, df)
+    ma_nd = df["Site"].str.startswith("MA") & (df["RP_Type"] == "ND")
+    assert (got.loc[ma_nd, ["Suggested_Dispatch_Qty", "Suggested_DN_Qty"]] == 0).all().all()
+    assert (got.loc[ma_nd, "Dispatch_Remark"] == "").all()
+    assert (default.loc[ma_nd, "Suggested_Dispatch_Qty"] > 0).any()
+
+
+def test_rules_from_file_and_sweep():
+    """Test CSV / JSON rule files and the lead-time sweep"""
+    df = build_random_detail(1500, seed=9)
+    df["Site"] = df["Site"].replace({"HA01": "HB91"})
+    rules = [HB9X_RULE] + DEFAULT_DISPATCH_RULES
+    expected_cfg = Config()
+    expected_cfg.DISPATCH_RULES = rules
+    expected = _detail(expected_cfg, df, lead_time=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "rules.csv"
+        pd.DataFrame(rules).to_csv(csv_path, index=False)
+        json_path = Path(tmp) / "rules.json"
+        json_path.write_text(json.dumps(rules, ensure_ascii=False), encoding="utf-8")
+        for path in (csv_path, json_path):
+            cfg = Config()
+            cfg.DISPATCH_RULES = str(path)
+            assert compile_dispatch_rules(cfg)[-1]["rp_type"] == "RF"
+            pd.testing.assert_frame_equal(_detail(cfg, df, lead_time=5), expected)
+            sweep = calculate_demand_sweep(df, cfg, lead_times=[0, 5])
+            pd.testing.assert_frame_equal(sweep.detail(5), expected)
+
+
+def test_invalid_rules():
+    """Test unknown conditions / formulas and the rowwise engine with custom rules"""
+    df = build_random_detail(50, seed=1)
+    cases = [
+        ([{"site": "HB87", "formula": "safety_stock"}], "unknown formula 'safety_stock'"),
+        ([{"formula": "none", "condition": "no_promo"}], "unknown condition 'no_promo'"),
+        ([{"formula": "none", "store": "HB87"}], "unknown fields ['store']"),
+    ]
+    for rules, expected in cases:
+        cfg = Config()
+        cfg.DISPATCH_RULES = rules
+        try:
+            _detail(cfg, df)
+        except ValueError as e:
+            message = str(e)
+        else:
+            raise AssertionError("expected ValueError")
+        print(message)
+        assert message.startswith("Dispatch rule 1:") and expected in message
+
+    cfg = Config()
+    cfg.DISPATCH_ENGINE = "rowwise"
+    cfg.DISPATCH_RULES = DEFAULT_DISPATCH_RULES
+    try:
+        _detail(cfg, df)
+    except ValueError as e:
+        assert "DISPATCH_RULES" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_default_rules_match_rowwise()
+    test_special_store_is_a_rule()
+    test_rules_from_file_and_sweep()
+    test_invalid_rules()
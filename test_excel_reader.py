@@ -0,0 +1,130 @@
+"""
+測試 Excel 讀取層（引擎選擇與 File A 欄位投影）
+
+測試場景：
+1. EXCEL_ENGINE = "auto" 時，未安裝 python-calamine 則使用 openpyxl
+2. PROJECT_FILE_A_COLUMNS = True 時只讀取 COL_A_* 與商品資訊欄位
+3. Article 數字保持為文字格式
+4. 路徑、bytes 及檔案物件輸入結果一致，每個 workbook 只開啟一次
+5. 缺少工作表時列出可用工作表
+"""
+
+import importlib.util
+import io
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import promo_calculator
+from promo_calculator import Config, read_input_files, read_workbook, resolve_excel_engine
+
+
+def write_test_files(folder: Path):
+    file_a = folder / "file_a.xlsx"
+    file_b = folder / "file_b.xlsx"
+    pd.DataFrame({
+        "Article": [123456, "A0002"],
+        "Site": ["HA01", "D001"],
+        "RP Type": ["RF", "RF"],
+        "SaSa Net Stock": [10, 200],
+        "Pending Received": [0, 0],
+        "Safety Stock": [5, 0],
+        "Last Month Sold Qty": [30, 0],
+        "MOQ": [12, 12],
+        "Supply source": [2, 2],
+        "Article Description": ["Lipstick", "Toner"],
+        "Vendor Name": ["V1", "V2"],
+    }).to_excel(file_a, sheet_name="Sheet1", index=False)
+    with pd.ExcelWriter(file_b) as writer:
+        pd.DataFrame({"Group No.": [1], "Article": [123456], "SKU Target": [100]}).to_excel(
+            writer, sheet_name="Sheet 1", index=False
+        )
+        pd.DataFrame({
+            "Site": ["HA01"],
+            "Shop Target(HK)": [0.5],
+            "Shop Target(MO)": [0],
+            "Shop Target(ALL)": [1],
+        }).to_excel(writer, sheet_name="Sheet 2", index=False)
+    return file_a, file_b
+
+
+def test_engine_resolution():
+    """Test auto engine selection"""
+    cfg = Config()
+    expected = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+    assert resolve_excel_engine(cfg) == expected
+    cfg.EXCEL_ENGINE = "openpyxl"
+    assert resolve_excel_engine(cfg) == "openpyxl"
+    print(f"[CORRECT] auto engine → {expected}")
+
+
+def test_file_a_column_projection():
+    """Test File A column projection"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, file_b = write_test_files(Path(tmp))
+        cfg = Config()
+        cfg.INPUT_CACHE_DIR = str(Path(tmp) / "cache")
+        df_a_full, df_b1, _ = read_input_files(file_a, file_b, cfg)
+        cfg.PROJECT_FILE_A_COLUMNS = True
+        df_a_proj, _, _ = read_input_files(file_a, file_b, cfg)
+
+    print(f"Full columns: {list(df_a_full.columns)}")
+    print(f"Projected columns: {list(df_a_proj.columns)}")
+    assert "Vendor Name" in df_a_full.columns
+    assert "Vendor Name" not in df_a_proj.columns
+    assert "Article Description" in df_a_proj.columns
+    assert df_a_proj["Article"].tolist() == ["123456", "A0002"]
+    assert df_b1["Article"].tolist() == ["123456"]
+
+
+def test_bytes_and_file_like_sources():
+    """Test path, bytes and file-like inputs give the same frames, one open per workbook"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    opened = []
+    original_excel_file = promo_calculator.pd.ExcelFile
+
+    def counting_excel_file(*args, **kwargs):
+        opened.append(args[0])
+        return original_excel_file(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, file_b = write_test_files(Path(tmp))
+        from_path = read_input_files(file_a, file_b, cfg)
+        promo_calculator.pd.ExcelFile = counting_excel_file
+        try:
+            from_bytes = read_input_files(file_a.read_bytes(), file_b.read_bytes(), cfg)
+        finally:
+            promo_calculator.pd.ExcelFile = original_excel_file
+        upload = io.BytesIO(file_b.read_bytes())
+        upload.read()  # a consumed upload is rewound before parsing
+        from_file_like = read_input_files(io.BytesIO(file_a.read_bytes()), upload, cfg)
+
+    assert len(opened) == 2
+    for expected, got_bytes, got_file in zip(from_path, from_bytes, from_file_like):
+        pd.testing.assert_frame_equal(expected, got_bytes)
+        pd.testing.assert_frame_equal(expected, got_file)
+    print("[CORRECT] Path / bytes / file-like sources match")
+
+
+def test_missing_sheet_lists_available():
+    """Test missing sheet error names the available sheets"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _, file_b = write_test_files(Path(tmp))
+        try:
+            read_workbook(file_b, ["Sheet 1", "Sheet 3"], Config(), label="File B")
+        except ValueError as e:
+            message = str(e)
+        else:
+            raise AssertionError("expected ValueError")
+    print(message)
+    assert "File B missing required sheet 'Sheet 3'" in message
+    assert "Sheet 2" in message
+
+
+if __name__ == "__main__":
+    test_engine_resolution()
+    test_file_a_column_projection()
+    test_bytes_and_file_like_sources()
+    test_missing_sheet_lists_available()
@@ -0,0 +1,145 @@
+"""
+測試 File A 重複 (Article, Site) 合併 (aggregate_duplicate_keys)
+
+測試場景：
+1. 數量欄位求和，其他欄位保留第一個非空值，所有欄位均保留
+2. 結果與 groupby(sum / first) 一致
+3. 無重複時原樣返回
+4. prepare_file_a 警告附合併鍵清單（Article, Site, Rows）
+5. 合併鍵的原始數量欄位（如 "Pending Received"）與求和後的工作欄位一致，Final Order Report 不會出現兩個不同數值
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    aggregate_duplicate_keys,
+    calculate_demand,
+    export_to_excel,
+    generate_summary,
+    merge_data,
+    prepare_file_a,
+    prepare_file_b,
+)
+
+
+def test_sum_and_first_non_missing():
+    """Test quantities are summed and other columns keep the first non-missing value"""
+    df = pd.DataFrame({
+        "Article": ["A2", "A1", "A2", "A1", "A3"],
+        "Site": ["HA01", "HA01", "HA01", "HA01", "HA01"],
+        "Qty": [1, 2, 3, 4, 5],
+        "Description": [np.nan, "Toner", "Lipstick", "Toner B", np.nan],
+        "Extra": ["x", "y", "z", "w", "v"],
+    })
+    out, merged = aggregate_duplicate_keys(df, ["Article", "Site"], ["Qty"])
+    print(out)
+    assert list(out.columns) == list(df.columns)
+    assert out["Article"].tolist() == ["A1", "A2", "A3"]
+    assert out["Qty"].tolist() == [6, 4, 5]
+    assert out["Description"].tolist()[:2] == ["Toner", "Lipstick"]
+    assert pd.isna(out["Description"].iloc[2])
+    assert out["Extra"].tolist() == ["y", "x", "v"]
+    assert merged.values.tolist() == [["A1", "HA01", 2], ["A2", "HA01", 2]]
+
+
+def test_matches_groupby():
+    """Test the sort-based merge equals groupby sum / first"""
+    rng = np.random.default_rng(7)
+    n = 5000
+    df = pd.DataFrame({
+        "Article": rng.integers(0, 300, n).astype(str),
+        "Site": rng.choice(["HA01", "HA02", "D001"], n),
+        "Qty": rng.integers(0, 50, n),
+        "Sold": rng.integers(0, 50, n).astype("float64"),
+        "Note": np.where(rng.random(n) < 0.3, None, rng.integers(0, 9, n).astype(str)),
+    })
+    out, merged = aggregate_duplicate_keys(df, ["Article", "Site"], ["Qty", "Sold"])
+    expected = df.groupby(["Article", "Site"], as_index=False).agg(
+        {"Qty": "sum", "Sold": "sum", "Note": "first"}
+    )
+    pd.testing.assert_frame_equal(out.astype(object), expected.astype(object), check_dtype=False)
+    assert merged["Rows"].sum() == n - len(out) + len(merged)
+
+
+def test_no_duplicates_unchanged():
+    """Test a frame without duplicate keys is returned as is"""
+    df = pd.DataFrame({"Article": ["B", "A"], "Site": ["HA01", "HA01"], "Qty": [1, 2]})
+    out, merged = aggregate_duplicate_keys(df, ["Article", "Site"], ["Qty"])
+    assert out is df
+    assert merged.empty and list(merged.columns) == ["Article", "Site", "Rows"]
+
+
+def test_prepare_reports_merged_keys():
+    """Test prepare_file_a lists the merged keys"""
+    cfg = Config()
+    df_a_raw = pd.DataFrame({
+        "Article": ["A1", "A1", "A2"],
+        "Site": ["HA01", "HA01", "HA01"],
+        "RP Type": ["RF", "RF", "RF"],
+        "SaSa Net Stock": ["10", "5", "1"],
+        "Pending Received": ["0", "2", "0"],
+        "Safety Stock": ["3", "9", "1"],
+        "Last Month Sold Qty": ["5", "6", "7"],
+        "MOQ": ["12", "24", "6"],
+        "Supply source": ["2", "1", "1"],
+        "Article Description": [None, "Lipstick", "Toner"],
+    }, dtype="str")
+    df_a, warn_a = prepare_file_a(df_a_raw, cfg)
+    print(list(warn_a))
+    assert df_a["SaSa_Net_Stock"].tolist() == [15, 1]
+    assert df_a["Safety_Stock"].tolist() == [3, 1]
+    assert df_a["Article Description"].tolist() == ["Lipstick", "Toner"]
+    assert any(w.startswith("Duplicates found in File A") for w in warn_a)
+    assert warn_a.duplicates.values.tolist() == [["A1", "HA01", 2]]
+
+
+def test_raw_columns_match_merged_quantities():
+    """Test raw quantity columns of a merged key carry the summed values"""
+    cfg = Config()
+    df_a_raw = pd.DataFrame({
+        "Article": ["A1", "A1", "A2"],
+        "Site": ["HA01", "HA01", "HA01"],
+        "RP Type": ["RF", "RF", "RF"],
+        "SaSa Net Stock": ["10", "5", "1"],
+        "Pending Received": ["2", "4", "0"],
+        "Safety Stock": ["3", "9", "1"],
+        "Last Month Sold Qty": ["5", "6.5", "7"],
+        "MOQ": ["12", "24", "6"],
+        "Supply source": ["2", "1", "1"],
+        "Blocked": ["1", "1", "x"],
+    }, dtype="str")
+    df_a, _ = prepare_file_a(df_a_raw, cfg)
+    print(df_a[["Article", "SaSa Net Stock", "SaSa_Net_Stock", "Pending Received", "Pending_Received"]])
+    pairs = [("SaSa Net Stock", "SaSa_Net_Stock"), ("Pending Received", "Pending_Received"),
+             ("Last Month Sold Qty", "Last_Month_Sold_Qty"), ("Blocked", "Blocked")]
+    for raw, working in pairs[:3]:
+        assert pd.to_numeric(df_a[raw]).tolist() == df_a[working].astype(float).tolist(), raw
+    assert df_a["Pending Received"].tolist() == ["6", "0"]
+    assert df_a["Last Month Sold Qty"].tolist() == ["11.5", "7"]
+    assert df_a["Safety Stock"].tolist() == ["3", "1"]  # not a summed quantity
+
+    df_b1, df_b2, _ = prepare_file_b(
+        pd.DataFrame({"Group No.": ["1"], "Article": ["A1"], "SKU Target": ["10"]}, dtype="str"),
+        pd.DataFrame({"Site": ["HA01"], "Shop Target(HK)": ["0"], "Shop Target(MO)": ["0"],
+                      "Shop Target(ALL)": ["1"]}, dtype="str"),
+        cfg,
+    )
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    detail = calculate_demand(merged, cfg, lead_time=0)
+    buffer = io.BytesIO()
+    export_to_excel(detail, generate_summary(detail, cfg), df_a, df_b1, df_b2, buffer)
+    report = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name="Final Order Report")
+    for raw, _ in pairs[:2]:
+        assert report[raw].tolist() == report[f"{raw}.1"].tolist(), raw
+
+
+if __name__ == "__main__":
+    test_sum_and_first_non_missing()
+    test_matches_groupby()
+    test_no_duplicates_unchanged()
+    test_prepare_reports_merged_keys()
+    test_raw_columns_match_merged_quantities()
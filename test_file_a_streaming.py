@@ -0,0 +1,109 @@
+"""
+測試 File A 分塊（串流）準備 (FILE_A_CHUNK_ROWS / prepare_file_a_chunked)
+
+測試場景：
+1. 分塊讀取 XLSX / CSV 結果與整張工作表 prepare_file_a 一致（跨分塊重複 (Article, Site) 合併）
+2. 無重複時保留所有欄位及原始行序
+3. 各分塊警告合併計數（負數、封頂）
+4. 促銷範圍下推：只保留 File B Sheet 1 的 Article
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    iter_workbook_chunks,
+    prepare_file_a,
+    prepare_file_a_chunked,
+    read_input_files,
+)
+from test_excel_reader import write_test_files
+
+
+def _file_a_rows() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Article": ["000123", "A0002", "000123", "A0003", "A0002", "A0004"],
+        "Site": ["HA01", "HA01", "ha01 ", "D001", "HA01", "HA02"],
+        "RP Type": ["RF", "rf", "ND", "RF", "RF", None],
+        "SaSa Net Stock": [10, -5, 3, 200, 1, 0],
+        "Pending Received": [0, 2, 1, 0, 4, 0],
+        "Safety Stock": [5, 6, 7, 0, 8, 2],
+        "Last Month Sold Qty": [30, 200000, 10, 0, -1, 5],
+        "MOQ": [12, 6, 24, 12, 6, None],
+        "Supply source": [2, 1, 2, 2, 1, "N/A"],
+        "Launch Date": ["20240101", None, "", "20231201", None, "NULL"],
+        "Article Description": ["Lipstick", "Toner", "Lipstick", "Mask", "Toner", "Cream"],
+    })
+
+
+def test_chunked_matches_whole_sheet():
+    """Test chunked preparation equals prepare_file_a on the whole sheet"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    cfg.EXCEL_ENGINE = "openpyxl"
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        _, file_b = write_test_files(folder)
+        file_a_xlsx = folder / "file_a.xlsx"
+        file_a_csv = folder / "file_a.csv"
+        _file_a_rows().to_excel(file_a_xlsx, sheet_name="Sheet1", index=False)
+        _file_a_rows().to_csv(file_a_csv, index=False)
+
+        for file_a in (file_a_xlsx, file_a_csv):
+            expected, expected_warnings = prepare_file_a(read_input_files(file_a, file_b, cfg)[0], cfg)
+            for chunk_rows in (1, 2, 4, 100):
+                got, warnings = prepare_file_a_chunked(file_a, cfg, chunk_rows=chunk_rows)
+                pd.testing.assert_frame_equal(expected, got)
+                assert sorted(warnings) == sorted(expected_warnings), warnings
+            print(f"[CORRECT] {file_a.suffix}: {len(got)} rows, warnings {warnings}")
+
+    assert "SaSa Net Stock: 1 negative values set to 0" in warnings
+    assert "Last Month Sold Qty: 1 negative values set to 0" in warnings
+    assert "Last Month Sold Qty: 1 values capped at 100000" in warnings
+    assert len(got) == 4
+
+
+def test_chunked_without_duplicates_keeps_columns():
+    """Test all columns and the sheet order are kept when nothing is merged"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    rows = _file_a_rows().drop_duplicates(["Article"]).iloc[::-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a = Path(tmp) / "file_a.xlsx"
+        rows.to_excel(file_a, sheet_name="Sheet1", index=False)
+        chunks = list(iter_workbook_chunks(file_a, "Sheet1", 2))
+        got, warnings = prepare_file_a_chunked(file_a, cfg, chunk_rows=2)
+
+    print(got[["Article", "Site", "Launch_Date"]])
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    assert chunks[0]["Supply source"].isna().tolist() == [True, False]
+    assert got["Article"].tolist() == ["A0004", "A0003", "A0002", "000123"]
+    assert "Article Description" in got.columns and "Launch_Date" in got.columns
+    assert got["Launch_Date"].tolist()[:2] == ["", "20231201"]
+    assert not any("Duplicates" in w for w in warnings)
+
+
+def test_promo_scope_pushdown():
+    """Test rows of Articles outside File B Sheet 1 are dropped before preparation"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a = Path(tmp) / "file_a.csv"
+        _file_a_rows().to_csv(file_a, index=False)
+        got, warnings = prepare_file_a_chunked(file_a, cfg, promo_articles=[" 000123", "A0004"], chunk_rows=2)
+
+    print(got[["Article", "Site", "SaSa_Net_Stock"]])
+    assert got["Article"].tolist() == ["000123", "A0004"]
+    assert got["SaSa_Net_Stock"].tolist() == [13, 0]
+    assert not any("negative" in w for w in warnings)
+    assert np.array_equal(got["MOQ"].to_numpy(), [12, 0])
+
+
+if __name__ == "__main__":
+    test_chunked_matches_whole_sheet()
+    test_chunked_without_duplicates_keeps_columns()
+    test_promo_scope_pushdown()
@@ -0,0 +1,89 @@
+"""
+測試 File A 工作表及表頭行偵測 (locate_header / HEADER_PROBE_ROWS)
+
+測試場景：
+1. 工作表名稱不是 "Sheet1"，表頭上方有 SAP 標題行：找出工作表及表頭行
+2. 偵測結果與 "Sheet1" 標準格式讀取後準備結果一致（整張讀取及分塊讀取）
+3. 沒有工作表包含必需列時提示可用工作表
+4. HEADER_PROBE_ROWS = 0 時維持只讀取 "Sheet1"
+"""
+
+import tempfile
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    file_a_required_columns,
+    locate_header,
+    prepare_file_a,
+    prepare_file_a_chunked,
+    read_input_files,
+)
+from test_excel_reader import write_test_files
+
+
+def _write_sap_export(path: Path, file_a: Path) -> None:
+    """Copy File A's Sheet1 below two title rows on a sheet named like the SAP report."""
+    rows = list(openpyxl.load_workbook(file_a)["Sheet1"].iter_rows(values_only=True))
+    book = openpyxl.Workbook()
+    book.active.title = "Notes"
+    book.active.append(["Exported from SAP"])
+    sheet = book.create_sheet("ZRPMM0015_S")
+    sheet.append(["ZRPMM0015_S Stock Report"])
+    sheet.append([None, "Run date", "2024-01-31"])
+    for row in rows:
+        sheet.append(row)
+    book.save(path)
+
+
+def test_locate_sap_export():
+    """Test sheet and header row are found below title rows"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        file_a, file_b = write_test_files(folder)
+        sap_file = folder / "sap_export.xlsx"
+        _write_sap_export(sap_file, file_a)
+
+        location = locate_header(sap_file, file_a_required_columns(cfg), cfg, "Sheet1", label="File A")
+        print(location)
+        assert location == ("ZRPMM0015_S", 2)
+        assert locate_header(file_a, file_a_required_columns(cfg), cfg, "Sheet1") == ("Sheet1", 0)
+
+        expected, _ = prepare_file_a(read_input_files(file_a, file_b, cfg)[0], cfg)
+        for engine in ("openpyxl", "auto"):
+            cfg.EXCEL_ENGINE = engine
+            got, _ = prepare_file_a(read_input_files(sap_file, file_b, cfg)[0], cfg)
+            pd.testing.assert_frame_equal(expected, got)
+        chunked, _ = prepare_file_a_chunked(sap_file, cfg, chunk_rows=3)
+        pd.testing.assert_frame_equal(expected, chunked)
+        print(f"[CORRECT] {len(got)} rows read from the SAP export")
+
+
+def test_missing_header_reports_sheets():
+    """Test error message when no sheet holds the File A header"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        _, file_b = write_test_files(folder)
+        for probe_rows in (20, 0):
+            cfg.HEADER_PROBE_ROWS = probe_rows
+            try:
+                read_input_files(file_b, file_b, cfg)
+            except ValueError as e:
+                message = str(e)
+            else:
+                raise AssertionError("expected ValueError")
+            print(message)
+            assert "missing required sheet 'Sheet1'" in message
+            assert "Sheet 1" in message and "Sheet 2" in message
+
+
+if __name__ == "__main__":
+    test_locate_sap_export()
+    test_missing_header_reports_sheets()
@@ -0,0 +1,97 @@
+"""
+測試已解析輸入檔案快取 (input_cache)
+
+測試場景：
+1. 第二次讀取相同檔案時使用快取，結果與直接解析一致
+2. 只修改 File B 時，File A 仍使用快取
+3. 超過容量上限時刪除最久未使用的快取
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import promo_calculator
+from input_cache import ParsedInputCache, content_digest
+from promo_calculator import Config, read_input_files
+from test_excel_reader import write_test_files
+
+
+def test_cached_read_matches_parse():
+    """Test cache hit returns identical frames without re-parsing File A"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        file_a, file_b = write_test_files(folder)
+        cfg = Config()
+        cfg.INPUT_CACHE_DIR = str(folder / "cache")
+
+        first = read_input_files(file_a, file_b, cfg)
+
+        parse_calls = []
+        original_read_file_a = promo_calculator._read_file_a
+
+        def counting_read_file_a(path, config):
+            parse_calls.append(path)
+            return original_read_file_a(path, config)
+
+        promo_calculator._read_file_a = counting_read_file_a
+        try:
+            second = read_input_files(file_a, file_b, cfg)
+            # Correct File B only: File A must still come from the cache
+            df_b1 = pd.read_excel(file_b, sheet_name="Sheet 1")
+            df_b2 = pd.read_excel(file_b, sheet_name="Sheet 2")
+            df_b1["SKU Target"] = 200
+            with pd.ExcelWriter(file_b) as writer:
+                df_b1.to_excel(writer, sheet_name="Sheet 1", index=False)
+                df_b2.to_excel(writer, sheet_name="Sheet 2", index=False)
+            third = read_input_files(file_a, file_b, cfg)
+        finally:
+            promo_calculator._read_file_a = original_read_file_a
+
+    for df_first, df_second in zip(first, second):
+        pd.testing.assert_frame_equal(df_first, df_second)
+    assert parse_calls == []
+    assert third[1]["SKU Target"].tolist() == ["200"]
+    print("[CORRECT] Cached frames identical; File A not re-parsed")
+
+
+def test_lru_eviction():
+    """Test size-bounded LRU eviction"""
+    with tempfile.TemporaryDirectory() as tmp:
+        df = pd.DataFrame({"Article": [f"A{i:06d}" for i in range(2000)]})
+        cache = ParsedInputCache(Path(tmp), max_bytes=10 ** 9)
+        cache.put("old", df)
+        cache.put("recent", df)
+        entry_size = (Path(tmp) / "old.parquet").stat().st_size
+
+        # Make "old" the least recently used, then touch "recent"
+        os.utime(Path(tmp) / "old.parquet", (time.time() - 100, time.time() - 100))
+        assert cache.get("recent") is not None
+
+        cache.max_bytes = entry_size * 2
+        cache.put("new", df)
+        remaining = sorted(p.stem for p in Path(tmp).glob("*.parquet"))
+    print(f"Remaining cache entries: {remaining}")
+    assert remaining == ["new", "recent"]
+
+
+def test_content_digest_sources():
+    """Test digest is the same for path, bytes and file-like input"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, _ = write_test_files(Path(tmp))
+        data = file_a.read_bytes()
+        with open(file_a, "rb") as fh:
+            fh.read(10)
+            fh.seek(0)
+            from_handle = content_digest(fh)
+            assert fh.tell() == 0
+        assert content_digest(file_a) == content_digest(data) == from_handle
+
+
+if __name__ == "__main__":
+    test_cached_read_matches_parse()
+    test_lru_eviction()
+    test_content_digest_sources()
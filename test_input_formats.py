@@ -0,0 +1,113 @@
+"""
+測試 CSV / Parquet / Arrow 輸入格式 (input_formats)
+
+測試場景：
+1. 以副檔名或檔頭 magic bytes 判斷格式
+2. CSV 的 Article 保留前置零，空白值為 NaN
+3. File B 資料夾（Sheet 1 / Sheet 2）與 Excel 讀取後計算結果一致
+4. File B 資料夾缺少 Sheet 2 時提示找到的檔案
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from input_formats import detect_input_format, read_tabular_file
+from promo_calculator import (
+    Config,
+    merge_data,
+    prepare_file_a,
+    prepare_file_b,
+    read_input_files,
+)
+from test_excel_reader import write_test_files
+
+
+def _write_tables(folder: Path, fmt: str, frames: dict) -> None:
+    folder.mkdir()
+    for name, df in frames.items():
+        path = folder / f"{name}.{fmt}"
+        if fmt == "csv":
+            df.to_csv(path, index=False)
+        elif fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            feather.write_feather(df, path)
+
+
+def test_detect_input_format():
+    """Test format detection by extension and magic bytes"""
+    assert detect_input_format("report.XLSX") == "excel"
+    assert detect_input_format(Path("report.csv")) == "csv"
+    assert detect_input_format("report.feather") == "arrow"
+    assert detect_input_format(b"PK\x03\x04rest") == "excel"
+    assert detect_input_format(b"PAR1....") == "parquet"
+    assert detect_input_format(b"ARROW1\x00\x00") == "arrow"
+    assert detect_input_format(b"Article,Site\n") == "csv"
+
+
+def test_csv_keeps_article_text():
+    """Test CSV columns are read as text"""
+    data = "Article,Site,MOQ,Launch Date\n000123,HA01,12,\nA0002,D001,,20240101\n".encode("utf-8-sig")
+    df = read_tabular_file(data, "csv")
+    print(df)
+    assert df["Article"].tolist() == ["000123", "A0002"]
+    assert df["MOQ"].tolist()[0] == "12"
+    assert df["MOQ"].isna().tolist() == [False, True]
+    assert df["Launch Date"].isna().tolist() == [True, False]
+    projected = read_tabular_file(data, "csv", columns=["Article", "Missing"])
+    assert list(projected.columns) == ["Article"]
+
+
+def test_table_formats_match_excel():
+    """Test CSV / Parquet / Arrow inputs give the same prepared and merged data as XLSX"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+
+    def prepared(df_a_raw, df_b1_raw, df_b2_raw):
+        df_a, _ = prepare_file_a(df_a_raw, cfg)
+        df_b1, df_b2, _ = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
+        merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+        return merged
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        file_a, file_b = write_test_files(folder)
+        expected = prepared(*read_input_files(file_a, file_b, cfg))
+        frames = {
+            "A": pd.read_excel(file_a, sheet_name="Sheet1", dtype=str),
+            "Sheet 1": pd.read_excel(file_b, sheet_name="Sheet 1", dtype=str),
+            "Sheet 2": pd.read_excel(file_b, sheet_name="Sheet 2"),
+        }
+        for fmt in ("csv", "parquet", "arrow"):
+            table_dir = folder / fmt
+            _write_tables(table_dir, fmt, frames)
+            got = prepared(*read_input_files(table_dir / f"A.{fmt}", table_dir, cfg))
+            pd.testing.assert_frame_equal(expected, got)
+            print(f"[CORRECT] {fmt} input matches XLSX")
+
+
+def test_file_b_folder_missing_sheet():
+    """Test File B folder without Sheet 2"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "file_b"
+        _write_tables(folder, "csv", {"Sheet 1": pd.DataFrame({"Article": ["A1"]})})
+        try:
+            read_input_files(b"Article,Site\nA1,HA01\n", folder, cfg)
+        except ValueError as e:
+            message = str(e)
+        else:
+            raise AssertionError("expected ValueError")
+    print(message)
+    assert "Sheet 2" in message and "Sheet 1.csv" in message
+
+
+if __name__ == "__main__":
+    test_detect_input_format()
+    test_csv_keeps_article_text()
+    test_table_formats_match_excel()
+    test_file_b_folder_missing_sheet()
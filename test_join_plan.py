@@ -0,0 +1,106 @@
+"""
+測試 merge_data 的整數編碼連接及一對多擴張偵測 (plan_left_join / indexed_left_join)
+
+測試場景：
+1. 連接結果與 DataFrame.merge(how="left") 一致（重複鍵、空值鍵、缺少匹配、不同欄位型別）
+2. 連接前已知輸出行數，一對多擴張記錄於警告及 fanout 表
+3. JOIN_FANOUT_POLICY = "error" 時在建立連接結果前停止
+"""
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    StageWarnings,
+    indexed_left_join,
+    merge_data,
+    plan_left_join,
+    prepare_file_a,
+    prepare_file_b,
+)
+
+
+def test_matches_pandas_merge():
+    """Test indexed_left_join against DataFrame.merge on random frames"""
+    rng = np.random.default_rng(11)
+    keys = np.array(["A", "B", "C", "D", None], dtype=object)
+    for trial in range(20):
+        n, m = rng.integers(0, 200), rng.integers(0, 12)
+        left = pd.DataFrame({
+            "Key": pd.Series(rng.choice(keys, n), dtype="str"),
+            "Qty": rng.integers(0, 9, n),
+            "Flag": rng.random(n) < 0.5,
+        })
+        right = pd.DataFrame({
+            "Key": pd.Series(rng.choice(keys, m), dtype="str"),
+            "Value": rng.integers(0, 9, m).astype("int32"),
+            "Type": pd.Series(rng.choice(["HK", "MO"], m)).astype("category"),
+            "Qty": rng.random(m),
+        })
+        expected = left.merge(right, on="Key", how="left")
+        got = indexed_left_join(left, right, "Key", Config(), "Right", StageWarnings())
+        pd.testing.assert_frame_equal(expected, got)
+    print(f"[CORRECT] {trial + 1} random joins match DataFrame.merge")
+
+
+def test_plan_reports_fanout():
+    """Test output size and fan-out keys are known from the plan"""
+    left_rows, right_rows, fanout = plan_left_join(
+        pd.Series(["A1", "A2", "A1", "A3"]), pd.Series(["A1", "A2", "A1", "A1"])
+    )
+    assert left_rows.tolist() == [0, 0, 0, 1, 2, 2, 2, 3]
+    assert right_rows.tolist() == [0, 2, 3, 1, 0, 2, 3, -1]
+    assert fanout.values.tolist() == [["A1", 2, 3]]
+
+
+def _inputs():
+    cfg = Config()
+    df_a, _ = prepare_file_a(pd.DataFrame({
+        "Article": ["A1", "A1", "A2"],
+        "Site": ["HA01", "HA02", "HA01"],
+        "RP Type": ["RF"] * 3,
+        "SaSa Net Stock": ["1"] * 3,
+        "Pending Received": ["0"] * 3,
+        "Safety Stock": ["0"] * 3,
+        "Last Month Sold Qty": ["30"] * 3,
+        "MOQ": ["1"] * 3,
+        "Supply source": ["2"] * 3,
+    }, dtype="str"), cfg)
+    df_b1, df_b2, _ = prepare_file_b(
+        pd.DataFrame({"Group No.": ["1", "2", "1"], "Article": ["A1", "A1", "A2"],
+                      "SKU Target": ["10", "20", "30"]}, dtype="str"),
+        pd.DataFrame({"Site": ["HA01", "HA02"], "Shop Target(HK)": ["0"] * 2, "Shop Target(MO)": ["0"] * 2,
+                      "Shop Target(ALL)": ["0.5"] * 2}, dtype="str"),
+        cfg,
+    )
+    return df_a, df_b1, df_b2, cfg
+
+
+def test_merge_data_fanout_policy():
+    """Test the fan-out warning and the "error" policy"""
+    df_a, df_b1, df_b2, cfg = _inputs()
+    merged, warnings = merge_data(df_a, df_b1, df_b2, cfg)
+    print(list(warnings))
+    assert len(merged) == 5
+    assert merged["Group_No"].astype(str).tolist() == ["001", "002", "001", "002", "001"]
+    assert any(w.startswith("Join fan-out on Article") and "3 rows become 5 rows" in w for w in warnings)
+    assert warnings.fanout.values.tolist() == [["Article (File B Sheet1)", "A1", 2, 2]]
+
+    cfg.JOIN_FANOUT_POLICY = "error"
+    try:
+        merge_data(df_a, df_b1, df_b2, cfg)
+    except ValueError as e:
+        message = str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    assert "JOIN_FANOUT_POLICY" in message
+
+    merged, warnings = merge_data(df_a, df_b1.drop_duplicates("Article"), df_b2, cfg)
+    assert len(merged) == 3 and warnings.fanout.empty
+
+
+if __name__ == "__main__":
+    test_matches_pandas_merge()
+    test_plan_reports_fanout()
+    test_merge_data_fanout_policy()
@@ -0,0 +1,131 @@
+"""
+測試 Launch Date 解析及新SKU標記 (parse_launch_dates / Is_New_SKU)
+
+測試場景：
+1. SAP 日期格式（YYYYMMDD、DD.MM.YYYY 等）及 Excel 日期序號解析為日期
+2. 空白 / NULL 為新SKU，無法識別的值為空日期但不是新SKU
+3. launched_within_days 查詢近 N 日內上市
+4. 派貨類型使用預先計算的 Is_New_SKU，結果與逐行規則一致
+5. Final Order Report 不包含 Launch_Date_Parsed / Is_New_SKU，表頭與原版相同
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    calculate_demand,
+    export_to_excel,
+    generate_summary,
+    launched_within_days,
+    merge_data,
+    parse_launch_dates,
+    prepare_file_a,
+    prepare_file_b,
+)
+
+
+def _file_a_raw() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Article": ["A1", "A2", "A3", "A4", "A5", "A6"],
+        "Site": ["HA01"] * 6,
+        "RP Type": ["RF"] * 6,
+        "SaSa Net Stock": ["0"] * 6,
+        "Pending Received": ["0"] * 6,
+        "Safety Stock": ["10"] * 6,
+        "Last Month Sold Qty": ["30"] * 6,
+        "MOQ": ["1"] * 6,
+        "Supply source": ["2"] * 6,
+        "Launch Date": ["20240101", "45300", "15.01.2024", " ", "NULL", "TBC"],
+    }, dtype="str")
+
+
+# Final Order Report header of the original version for _file_a_raw (no duplicate keys)
+BASELINE_REPORT_HEADER = [
+    "Article", "Site", "RP Type", "SaSa Net Stock", "Pending Received", "Safety Stock",
+    "Last Month Sold Qty", "MOQ", "Supply source", "Launch Date", "SaSa Net Stock.1",
+    "Pending Received.1", "Safety Stock.1", "Last Month Sold Qty.1", "Supply source.1",
+    "In Quality Insp", "Blocked", "Launch Date.1", "Last Month Sold Qty capped", "RP Type.1",
+    "Suggested Dispatch Qty", "Suggested DN Qty", "Dispatch Type", "SKU Target", "Site Target %",
+    "Total Demand",
+]
+
+
+def _file_b_raw():
+    return (
+        pd.DataFrame({"Group No.": ["1"] * 6, "Article": [f"A{i}" for i in range(1, 7)],
+                      "SKU Target": ["60"] * 6, "Promotion Days": ["7"] * 6}, dtype="str"),
+        pd.DataFrame({"Site": ["HA01"], "Shop Target(HK)": ["1"], "Shop Target(MO)": ["0"],
+                      "Shop Target(ALL)": ["1"]}, dtype="str"),
+    )
+
+
+def test_parse_formats():
+    """Test SAP formats and Excel serials"""
+    values = pd.Series(
+        ["20240101", "45292", "45292.5", "2024-01-05 00:00:00", "2024-01-06", "07.01.2024",
+         "2024/01/08", "09/01/2024", "", None, "abc", "20241399"],
+        dtype="str",
+    )
+    parsed = parse_launch_dates(values)
+    print(parsed.tolist())
+    assert parsed.dtype == "datetime64[ns]"
+    expected = ["2024-01-01", "2024-01-01", "2024-01-01", "2024-01-05", "2024-01-06", "2024-01-07",
+                "2024-01-08", "2024-01-09"]
+    assert parsed.iloc[:8].tolist() == [pd.Timestamp(d) for d in expected]
+    assert parsed.iloc[8:].isna().all()
+
+
+def test_prepare_flags_new_sku():
+    """Test prepare_file_a adds Launch_Date_Parsed and Is_New_SKU"""
+    df_a, _ = prepare_file_a(_file_a_raw(), Config())
+    print(df_a[["Article", "Launch_Date", "Launch_Date_Parsed", "Is_New_SKU"]])
+    assert df_a["Is_New_SKU"].tolist() == [False, False, False, True, True, False]
+    assert df_a["Launch_Date_Parsed"].iloc[1] == pd.Timestamp("2024-01-09")
+    assert df_a["Launch_Date_Parsed"].iloc[3:].isna().all()
+
+    recent = launched_within_days(df_a, 7, as_of="2024-01-15")
+    assert recent.tolist() == [False, True, True, False, False, False]
+    text_only = df_a[["Launch_Date"]]
+    assert np.array_equal(launched_within_days(text_only, 7, as_of="2024-01-15"), recent)
+
+
+def test_dispatch_uses_flag():
+    """Test both dispatch engines flag new SKUs from Is_New_SKU"""
+    cfg = Config()
+    df_a, _ = prepare_file_a(_file_a_raw(), cfg)
+    df_b1, df_b2, _ = prepare_file_b(*_file_b_raw(), cfg)
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    results = {}
+    for engine in ("vectorized", "rowwise"):
+        cfg.DISPATCH_ENGINE = engine
+        results[engine] = calculate_demand(merged, cfg, lead_time=2)
+    detail = results["vectorized"]
+    print(detail[["Article", "Is_New_SKU", "Suggested_DN_Qty", "Dispatch_Type"]])
+    assert detail["Dispatch_Type"].tolist() == results["rowwise"]["Dispatch_Type"].tolist()
+    new_sku = detail["Dispatch_Type"] == "新SKU必須由Buyer首次派貨"
+    assert new_sku.tolist() == (detail["Is_New_SKU"] & (detail["Suggested_DN_Qty"] > 0)).tolist()
+    assert new_sku.any()
+
+
+def test_report_header_unchanged():
+    """Test the Final Order Report leaves out the launch date working columns"""
+    cfg = Config()
+    df_a, _ = prepare_file_a(_file_a_raw(), cfg)
+    df_b1, df_b2, _ = prepare_file_b(*_file_b_raw(), cfg)
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    detail = calculate_demand(merged, cfg, lead_time=2)
+    buffer = io.BytesIO()
+    export_to_excel(detail, generate_summary(detail, cfg), df_a, df_b1, df_b2, buffer)
+    report = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name="Final Order Report")
+    assert report.columns.tolist() == BASELINE_REPORT_HEADER
+    assert "Is_New_SKU" in df_a.columns
+
+
+if __name__ == "__main__":
+    test_parse_formats()
+    test_prepare_flags_new_sku()
+    test_dispatch_uses_flag()
+    test_report_header_unchanged()
@@ -0,0 +1,77 @@
+"""
+測試 Lead Time 掃描 (calculate_demand_sweep)
+
+測試場景：
+1. 每個 Lead Time 的切片與 calculate_demand 結果完全一致
+2. Lead_Time_Comparison 的 D001 缺貨 SKU 數與 generate_summary 一致
+3. 不在掃描範圍內的 Lead Time 會報錯
+4. 命令列 Lead Time 為負數時，讀取檔案前即提示錯誤
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import Config, calculate_demand, calculate_demand_sweep, generate_summary, main
+from test_vectorized_dispatch_engine import build_random_detail
+
+
+def build_sweep_input() -> pd.DataFrame:
+    df = build_random_detail(n_rows=1500, seed=11)
+    df["Group_No"] = np.random.default_rng(11).choice(["001", "002", "003"], len(df))
+    df["In_Quality_Insp"] = 0
+    df["Blocked"] = 0
+    return df
+
+
+def test_sweep_slices_match_calculate_demand():
+    """Test every sweep slice equals calculate_demand for that lead time"""
+    cfg = Config()
+    df = build_sweep_input()
+    sweep = calculate_demand_sweep(df, cfg)
+    assert sweep.lead_times == list(range(cfg.MAX_LEAD_TIME + 1))
+    for lead in sweep.lead_times:
+        pd.testing.assert_frame_equal(sweep.detail(lead), calculate_demand(df, cfg, lead_time=lead))
+    print(f"[CORRECT] {len(sweep.lead_times)} lead times identical to calculate_demand")
+
+
+def test_sweep_comparison_matches_summary():
+    """Test comparison totals against generate_summary per lead time"""
+    cfg = Config()
+    df = build_sweep_input()
+    sweep = calculate_demand_sweep(df, cfg, lead_times=[0, 7, 14])
+    comparison = sweep.comparison(cfg)
+    print(comparison)
+    for i, lead in enumerate([0, 7, 14]):
+        detail = calculate_demand(df, cfg, lead_time=lead)
+        summary = generate_summary(detail, cfg)
+        non_dc = detail[detail["Site"] != cfg.DC_SITE_CODE]
+        assert comparison.loc[i, "Total_Dispatch"] == non_dc["Suggested_Dispatch_Qty"].sum()
+        assert comparison.loc[i, "D001_Shortage_SKUs"] == (summary["D001_Stock_Shortage_Alert"] != "").sum()
+
+    try:
+        sweep.detail(3)
+        raise AssertionError("Expected ValueError for lead time outside the sweep")
+    except ValueError as e:
+        print(f"[CORRECT] {e}")
+
+
+def test_negative_cli_lead_time():
+    """Test a negative lead time on the command line is rejected up front"""
+    argv = sys.argv
+    sys.argv = ["promo_calculator.py", "missing_a.xlsx", "missing_b.xlsx", "-3", "--lead-time-sweep"]
+    try:
+        main()
+        raise AssertionError("Expected ValueError for a negative lead time")
+    except ValueError as e:
+        assert str(e) == "Lead time must be 0 or more days, got -3"
+        print(f"[CORRECT] {e}")
+    finally:
+        sys.argv = argv
+
+
+if __name__ == "__main__":
+    test_sweep_slices_match_calculate_demand()
+    test_sweep_comparison_matches_summary()
+    test_negative_cli_lead_time()
@@ -0,0 +1,54 @@
+"""
+測試 MOQ 向量化取整核心 (moq_kernels)
+
+測試場景：
+1. mround_array 與 Excel MROUND / 標量 mround() 一致（0.5 向上）
+2. MOQ 為 0 / 負數 / NaN 時回傳 fill
+3. ceil / floor / 50 件上限規則
+"""
+
+import numpy as np
+
+from moq_kernels import capped_multiple, ceil_to_multiple, floor_to_multiple, mround_array
+from promo_calculator import mround
+
+
+def test_mround_array_matches_scalar():
+    """Test mround_array against scalar mround (half-up)"""
+    values = np.array([0, 5, 6, 7, 18, 30, 35, 17.5, 123.4])
+    multiples = np.array([12, 12, 12, 12, 12, 12, 12, 5, 0.7])
+    expected = [mround(v, m) for v, m in zip(values, multiples)]
+    result = mround_array(values, multiples)
+    print(f"mround_array: {result.tolist()}")
+    assert result.tolist() == expected
+    # 6/12 = 0.5 → rounds up to 12 (Python round() would give 0)
+    assert mround_array(6, 12).item() == 12
+
+
+def test_invalid_multiple_uses_fill():
+    """Test zero / negative / NaN MOQ handling"""
+    values = np.array([10.0, 10.0, 10.0, np.nan])
+    multiples = np.array([0.0, -6.0, np.nan, 6.0])
+    for kernel in (mround_array, ceil_to_multiple, floor_to_multiple):
+        assert kernel(values, multiples).tolist() == [0.0, 0.0, 0.0, 0.0]
+    passthrough = ceil_to_multiple(values, multiples, fill=values)
+    assert passthrough[:3].tolist() == [10.0, 10.0, 10.0]
+    print("[CORRECT] Invalid MOQ returns fill")
+
+
+def test_ceil_floor_and_cap():
+    """Test ceil / floor to multiple and the 50-unit cap rule"""
+    moq = np.array([12.0, 12.0, 12.0, 12.0, 6.0])
+    qty = np.array([0.0, 12.0, 13.0, 49.0, 120.0])
+    assert ceil_to_multiple(qty, moq).tolist() == [0.0, 12.0, 24.0, 60.0, 120.0]
+    assert ceil_to_multiple(qty, moq, use_remainder=True).tolist() == [0.0, 12.0, 24.0, 60.0, 120.0]
+    assert floor_to_multiple(qty, moq).tolist() == [0.0, 12.0, 12.0, 48.0, 120.0]
+    # <= 50: round up (49 → 60), > 50: largest multiple <= 50
+    assert capped_multiple(qty, moq, cap=50).tolist() == [0.0, 12.0, 24.0, 60.0, 48.0]
+    print("[CORRECT] ceil / floor / capped multiples")
+
+
+if __name__ == "__main__":
+    test_mround_array_matches_scalar()
+    test_invalid_multiple_uses_fill()
+    test_ceil_floor_and_cap()
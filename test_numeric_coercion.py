@@ -0,0 +1,130 @@
+"""
+測試批次數值轉換 (coerce_numeric_columns / NumericCoercionReport)
+
+測試場景：
+1. 文字欄位一次解析結果與逐欄 pd.to_numeric 一致（空白、科學記號、千位分隔符、非數字）
+2. 每欄統計非數字、負數及封頂數量，並保留非數字例子
+3. prepare_file_a / prepare_file_b 警告包含結構化統計表
+4. 分塊準備 File A 時各塊統計合併
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    NumericCoercionReport,
+    coerce_numeric_columns,
+    prepare_file_a,
+    prepare_file_a_chunked,
+    prepare_file_b,
+)
+
+
+def test_batch_matches_to_numeric():
+    """Test the one-pass text parser against pd.to_numeric"""
+    tokens = [" 12 ", "1e3", "+5", "-3.5", ".5", "5.", "00012", "1,000", "x", "12abc", "", "  ", None, "-0", "7"]
+    df = pd.DataFrame({
+        "A": pd.Series(tokens, dtype="str"),
+        "B": pd.Series(tokens[::-1], dtype="str"),
+        "C": pd.Series(range(len(tokens)), dtype="int64") - 3,
+    })
+    report = NumericCoercionReport()
+    result = coerce_numeric_columns(df, {"a": "A", "b": "B", "c": "C", "d": "Missing"}, report)
+
+    assert set(result) == {"a", "b", "c"}
+    for out, src in [("a", "A"), ("b", "B"), ("c", "C")]:
+        expected = pd.to_numeric(df[src], errors="coerce").fillna(0).clip(lower=0).to_numpy(dtype="float64")
+        assert np.array_equal(result[out].astype("float64"), expected), out
+    assert result["c"].dtype == np.int64
+    assert result["a"].dtype == np.float64
+
+    table = report.to_frame().set_index("Column")
+    print(table)
+    assert table.loc["A", "Non_Numeric"] == 3
+    assert table.loc["A", "Examples"] == "1,000, x, 12abc"
+    assert table.loc["A", "Negatives"] == 1
+    assert table.loc["C", "Negatives"] == 3
+    assert table.loc["C", "Non_Numeric"] == 0
+
+
+def test_caps_and_quiet_negatives():
+    """Test capping and columns whose negatives are clipped silently"""
+    df = pd.DataFrame({"Sold": ["5", "250", "-1"], "Supply": ["-2", "1", "2"]}, dtype="str")
+    report = NumericCoercionReport()
+    result = coerce_numeric_columns(
+        df, {"sold": "Sold", "supply": "Supply"}, report, quiet_negatives=("supply",), caps={"sold": 100}
+    )
+    assert result["sold"].tolist() == [5, 100, 0]
+    assert result["supply"].tolist() == [0, 1, 2]
+    print(report.messages())
+    assert report.messages() == ["Sold: 1 negative values set to 0", "Sold: 1 values capped at 100"]
+
+
+def test_prepare_stage_warnings():
+    """Test prepare_file_a / prepare_file_b warnings carry the structured table"""
+    cfg = Config()
+    df_a_raw = pd.DataFrame({
+        "Article": ["A1", "A2"],
+        "Site": ["HA01", "HA02"],
+        "RP Type": ["RF", "RF"],
+        "SaSa Net Stock": ["10", "N/A?"],
+        "Pending Received": ["0", "0"],
+        "Safety Stock": ["1", "1"],
+        "Last Month Sold Qty": ["5", "-6"],
+        "MOQ": ["12", "6"],
+        "Supply source": ["2", "1"],
+    }, dtype="str")
+    df_a, warn_a = prepare_file_a(df_a_raw, cfg)
+    print(list(warn_a))
+    assert "Last Month Sold Qty: 1 negative values set to 0" in warn_a
+    assert "SaSa Net Stock: 1 non-numeric values set to 0 (e.g. ['N/A?'])" in warn_a
+    assert warn_a.numeric.to_frame()["Column"].tolist() == ["SaSa Net Stock", "Last Month Sold Qty"]
+    assert df_a["SaSa_Net_Stock"].tolist() == [10, 0]
+
+    df_b1_raw = pd.DataFrame({"Group No.": ["1", "2"], "Article": ["A1", "A2"], "SKU Target": ["abc", "-4"],
+                              "Promotion Days": ["0", "7"]}, dtype="str")
+    df_b2_raw = pd.DataFrame({"Site": ["HA01"], "Shop Target(HK)": ["0.5"], "Shop Target(MO)": ["0"],
+                              "Shop Target(ALL)": ["1"]}, dtype="str")
+    df_b1, _, warn_b = prepare_file_b(df_b1_raw, df_b2_raw, cfg)
+    assert df_b1["SKU_Target"].tolist() == [0, 0]
+    assert df_b1["Promotion_Days"].tolist() == [0, 7]
+    assert df_b1["Promo_Target_Cover_Days"].tolist() == [0, 0]
+    assert warn_b.numeric.to_frame().iloc[0].tolist() == ["SKU Target", 1, 1, 0, "abc"]
+
+
+def test_chunk_reports_merged():
+    """Test chunked File A sums the per-chunk counts"""
+    cfg = Config()
+    df_a_raw = pd.DataFrame({
+        "Article": [f"A{i}" for i in range(6)],
+        "Site": ["HA01"] * 6,
+        "RP Type": ["RF"] * 6,
+        "SaSa Net Stock": ["x", "1", "y", "-1", "x", "2"],
+        "Pending Received": ["0"] * 6,
+        "Safety Stock": ["0"] * 6,
+        "Last Month Sold Qty": ["0"] * 6,
+        "MOQ": ["1"] * 6,
+        "Supply source": ["1"] * 6,
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a = Path(tmp) / "file_a.csv"
+        df_a_raw.to_csv(file_a, index=False)
+        _, warnings = prepare_file_a_chunked(file_a, cfg, chunk_rows=2)
+
+    print(list(warnings))
+    assert warnings == [
+        "SaSa Net Stock: 1 negative values set to 0",
+        "SaSa Net Stock: 3 non-numeric values set to 0 (e.g. ['x', 'y'])",
+    ]
+    assert warnings.numeric.to_frame().loc[0, "Non_Numeric"] == 3
+
+
+if __name__ == "__main__":
+    test_batch_matches_to_numeric()
+    test_caps_and_quiet_negatives()
+    test_prepare_stage_warnings()
+    test_chunk_reports_merged()
@@ -0,0 +1,56 @@
+"""
+測試平行讀取 File A / File B (PARALLEL_READ)
+
+測試場景：
+1. 兩個工作程序解析結果（Arrow IPC 傳回）與順序讀取一致
+2. 檔案物件輸入先轉為 bytes 再傳給工作程序
+3. Arrow IPC 往返保持 Article 文字及空白值
+"""
+
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import (
+    Config,
+    _arrow_to_frame,
+    _frame_to_arrow,
+    _read_files_parallel,
+    read_input_files,
+)
+from test_excel_reader import write_test_files
+
+
+def test_parallel_matches_sequential():
+    """Test worker-process parsing returns the same frames"""
+    cfg = Config()
+    cfg.INPUT_CACHE_DIR = None
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, file_b = write_test_files(Path(tmp))
+        sequential = read_input_files(file_a, file_b, cfg)
+        parallel = _read_files_parallel(file_a, file_b, cfg)
+        from_uploads = _read_files_parallel(
+            io.BytesIO(file_a.read_bytes()), io.BytesIO(file_b.read_bytes()), cfg
+        )
+
+    for expected, got, got_upload in zip(sequential, parallel, from_uploads):
+        pd.testing.assert_frame_equal(expected, got)
+        pd.testing.assert_frame_equal(expected, got_upload)
+    print(f"[CORRECT] Parallel read matches: {[len(df) for df in parallel]} rows")
+
+
+def test_arrow_round_trip():
+    """Test Arrow IPC buffer round trip of a text sheet"""
+    df = pd.DataFrame({"Article": ["000123", "A1", np.nan], "MOQ": ["12", np.nan, "6"]}).astype(str)
+    df = df.where(df != "nan", np.nan)
+    back = _arrow_to_frame(_frame_to_arrow(df))
+    pd.testing.assert_frame_equal(df, back)
+    assert back["Article"].tolist()[:2] == ["000123", "A1"]
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_arrow_round_trip()
@@ -0,0 +1,104 @@
+"""
+測試促銷範圍下推 (PROMO_SCOPE_ONLY / split_promo_scope)
+
+測試場景：
+1. 只保留 File B Sheet 1 Article 的 File A 行（比對前去除空格，空白 Article 不在範圍內）
+2. 範圍內 Article 的計算明細及匯總與完整計算一致
+3. Final Order Report 仍包含範圍外的行（計算欄位留空）
+4. PROMO_SCOPE_PASSTHROUGH = False 時不保留範圍外的行
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import as_raw_text, generate_file_a, generate_file_b
+from promo_calculator import (
+    Config,
+    calculate_demand,
+    export_to_excel,
+    generate_summary,
+    merge_data,
+    prepare_file_a,
+    prepare_file_b,
+    split_promo_scope,
+)
+
+
+def _run(df_a_raw, df_b1, df_b2, cfg):
+    df_a, _ = prepare_file_a(df_a_raw, cfg)
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    detail = calculate_demand(merged, cfg, lead_time=2)
+    return df_a, detail, generate_summary(detail, cfg)
+
+
+def test_split_keeps_promo_articles():
+    """Test rows of File B Sheet 1 Articles are kept"""
+    cfg = Config()
+    df_a_raw = pd.DataFrame({
+        "Article": [" 000123", "A0002", "000123", np.nan],
+        "Site": ["ha01", "HA01", "D001", "HA01"],
+        "RP Type": ["RF", "RF", "RF", "RF"],
+        "SaSa Net Stock": ["10", "x", "3", "1"],
+        "Pending Received": ["0", "0", "0", "0"],
+        "Safety Stock": ["1", "1", "1", "1"],
+        "Last Month Sold Qty": ["5", "6", "7", "8"],
+        "MOQ": ["12", "6", "12", "6"],
+        "Supply source": ["2", "1", "2", "1"],
+    })
+    in_scope, passthrough, warnings = split_promo_scope(df_a_raw, pd.Series(["000123 "]), cfg)
+    print(warnings)
+    assert in_scope.index.tolist() == [0, 2]
+    assert passthrough["Article"].tolist()[0] == "A0002"
+    assert passthrough["Site"].tolist() == ["HA01", "HA01"]
+    assert passthrough["SaSa_Net_Stock"].isna().tolist() == [True, False]
+    assert "2 of 4 File A rows" in warnings[0]
+
+    cfg.PROMO_SCOPE_PASSTHROUGH = False
+    _, passthrough, warnings = split_promo_scope(df_a_raw, ["000123"], cfg)
+    assert passthrough is None
+    assert warnings[0].endswith("skipped.")
+
+
+def test_scope_matches_full_run():
+    """Test promo Articles get the same detail / summary, and the report keeps every row"""
+    cfg = Config()
+    df_a = generate_file_a(3000, n_sites=20, seed=3, duplicate_ratio=0.0)
+    df_b1_raw, df_b2_raw = generate_file_b(df_a, n_groups=4, seed=3)
+    df_a_raw = as_raw_text(df_a)
+    df_b1, df_b2, _ = prepare_file_b(as_raw_text(df_b1_raw), as_raw_text(df_b2_raw), cfg)
+
+    _, full_detail, full_summary = _run(df_a_raw, df_b1, df_b2, cfg)
+    in_scope, passthrough, _ = split_promo_scope(df_a_raw, df_b1["Article"], cfg)
+    scope_a, scope_detail, scope_summary = _run(in_scope, df_b1, df_b2, cfg)
+
+    print(f"Full: {len(full_detail)} rows, in scope: {len(scope_detail)} rows")
+    assert len(scope_detail) < len(full_detail)
+    expected = full_detail[full_detail["Article"].isin(df_b1["Article"])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        expected.astype(object), scope_detail.reset_index(drop=True).astype(object), check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        full_summary.reset_index(drop=True).astype(object),
+        scope_summary.reset_index(drop=True).astype(object),
+        check_dtype=False,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "scope.xlsx"
+        export_to_excel(
+            scope_detail, scope_summary, scope_a, df_b1, df_b2, output, df_a_passthrough=passthrough
+        )
+        report = pd.read_excel(output, sheet_name="Final Order Report", dtype={"Article": str})
+
+    assert len(report) == len(df_a_raw)
+    out_rows = report[~report["Article"].isin(df_b1["Article"])]
+    assert out_rows["Suggested Dispatch Qty"].isna().all()
+    assert out_rows["SaSa Net Stock"].notna().all()
+
+
+if __name__ == "__main__":
+    test_split_keeps_promo_articles()
+    test_scope_matches_full_run()
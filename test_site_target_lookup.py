@@ -0,0 +1,63 @@
+"""
+測試 Site_Target_% 向量化查找 (site_target_pct / target_type_columns)
+
+測試場景：
+1. HK / MO / ALL 按 Target Type 取對應百分比，大小寫不同、空白、未知類型使用 ALL
+2. Sheet 2 沒有的 Site 為空值（Is_Promo_SKU 為 False）
+3. Sheet 2 額外的 "Shop Target(XXX)" 欄位自動成為新的 Target Type
+"""
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import Config, merge_data, prepare_file_a, prepare_file_b, target_type_columns
+
+
+def _prepared(target_types, sheet2: dict):
+    cfg = Config()
+    n = len(target_types)
+    df_a, _ = prepare_file_a(pd.DataFrame({
+        "Article": [f"A{i}" for i in range(n)] + ["A0"],
+        "Site": ["HA01"] * n + ["ZZ99"],
+        "RP Type": ["RF"] * (n + 1),
+        "SaSa Net Stock": ["0"] * (n + 1),
+        "Pending Received": ["0"] * (n + 1),
+        "Safety Stock": ["0"] * (n + 1),
+        "Last Month Sold Qty": ["0"] * (n + 1),
+        "MOQ": ["1"] * (n + 1),
+        "Supply source": ["2"] * (n + 1),
+    }, dtype="str"), cfg)
+    df_b1, df_b2, _ = prepare_file_b(
+        pd.DataFrame({"Group No.": ["1"] * n, "Article": [f"A{i}" for i in range(n)],
+                      "SKU Target": ["10"] * n, "Target Type": target_types}, dtype="str"),
+        pd.DataFrame(sheet2, dtype="str"),
+        cfg,
+    )
+    merged, _ = merge_data(df_a, df_b1, df_b2, cfg)
+    return merged, df_b2
+
+
+def test_default_types():
+    """Test HK / MO / ALL and the default-to-ALL rule"""
+    sheet2 = {"Site": ["HA01"], "Shop Target(HK)": ["0.5"], "Shop Target(MO)": ["25"], "Shop Target(ALL)": ["0.125"]}
+    merged, _ = _prepared(["HK", "mo", "ALL", "XX", None], sheet2)
+    print(merged[["Article", "Site", "Target_Type", "Site_Target_%", "Is_Promo_SKU"]])
+    pct = merged["Site_Target_%"].to_numpy(dtype="float64")
+    assert pct[:5].tolist() == [0.5, 0.25, 0.125, 0.125, 0.125]
+    assert np.isnan(pct[5])
+    assert merged["Is_Promo_SKU"].tolist() == [True] * 5 + [False]
+
+
+def test_extra_target_type():
+    """Test a per-region Sheet 2 column adds a target type"""
+    sheet2 = {"Site": ["HA01"], "Shop Target(HK)": ["0.5"], "Shop Target(MO)": ["0"], "Shop Target(ALL)": ["1"],
+              "Shop Target(KLN)": ["0.75"]}
+    assert target_type_columns(sheet2.keys(), Config())["KLN"] == "Shop Target(KLN)"
+    merged, df_b2 = _prepared(["KLN", "kln", "HK", "NT"], sheet2)
+    assert "Pct_KLN" in df_b2.columns
+    assert merged["Site_Target_%"].tolist()[:4] == [0.75, 0.75, 0.5, 1.0]
+
+
+if __name__ == "__main__":
+    test_default_types()
+    test_extra_target_type()
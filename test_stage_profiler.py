@@ -0,0 +1,76 @@
+"""
+測試各階段計時及記憶體記錄 (stage_profiler)
+
+測試場景：
+1. 停用時不記錄任何階段（共用空操作 context）
+2. 啟用時記錄 Wall / CPU 時間、峰值記憶體 (RSS) 及輸出行數、欄數
+3. 裝飾器形式記錄函數回傳的 DataFrame
+4. cProfile 統計輸出最慢階段的 pstats 檔案
+"""
+
+import pstats
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from stage_profiler import StageProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    """Test disabled profiler is a no-op"""
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage("merge_data") as stage:
+        stage.set_output(pd.DataFrame({"a": [1]}))
+    assert profiler.stage("a") is profiler.stage("b")
+    assert profiler.records == []
+    assert profiler.report().empty
+
+
+def test_enabled_profiler_records_stages():
+    """Test wall / CPU time and output shape per stage"""
+    profiler = StageProfiler(enabled=True)
+    with profiler.stage("prepare_file_a") as stage:
+        time.sleep(0.02)
+        stage.set_output((pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]}), ["warning"]))
+
+    @profiler.profiled()
+    def generate_summary(n):
+        return pd.DataFrame({"x": range(n)})
+
+    assert len(generate_summary(5)) == 5
+
+    report = profiler.report()
+    print(report)
+    assert report["Stage"].tolist() == ["prepare_file_a", "generate_summary"]
+    assert report.loc[0, "Wall_s"] >= 0.02
+    assert report.loc[0, "CPU_s"] < report.loc[0, "Wall_s"]
+    assert (report.loc[0, "Rows"], report.loc[0, "Columns"]) == (3, 2)
+    if sys.platform != "win32":
+        assert report.loc[1, "Peak_RSS_MB"] >= report.loc[0, "Peak_RSS_MB"] > 0
+    assert (report.loc[1, "Rows"], report.loc[1, "Columns"]) == (5, 1)
+    assert profiler.slowest_stage() == "prepare_file_a"
+
+
+def test_cprofile_dump_slowest_stage():
+    """Test pstats file for the slowest stage"""
+    profiler = StageProfiler(enabled=True, cprofile=True)
+    with profiler.stage("fast"):
+        sum(range(10))
+    with profiler.stage("slow"):
+        time.sleep(0.02)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = profiler.dump_slowest(Path(tmp) / "slow.pstats")
+        stats = pstats.Stats(str(path))
+        functions = [func[2] for func in stats.stats]
+    print(f"Profiled functions: {functions}")
+    assert any("sleep" in name for name in functions)
+    assert StageProfiler(enabled=True).dump_slowest(Path("unused.pstats")) is None
+
+
+if __name__ == "__main__":
+    test_disabled_profiler_records_nothing()
+    test_enabled_profiler_records_stages()
+    test_cprofile_dump_slowest_stage()
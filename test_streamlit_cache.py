@@ -0,0 +1,61 @@
+"""
+測試 Streamlit 解析 / 準備 / 合併階段的 st.cache_data 快取
+
+測試場景：
+1. 相同上載檔案與 Config 第二次呼叫不會重新執行 prepare_file_a
+2. Config 改變時快取失效
+3. 輸入快取寫入臨時資料夾，不會在工作目錄建立快取
+"""
+
+import tempfile
+from pathlib import Path
+
+import streamlit_app
+from promo_calculator import Config
+from test_excel_reader import write_test_files
+
+
+def test_load_prepare_merge_cached():
+    """Test parse/prepare/merge is memoized on upload digests + Config"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_a, file_b = write_test_files(Path(tmp))
+        file_a_bytes = file_a.read_bytes()
+        file_b_bytes = file_b.read_bytes()
+
+        streamlit_app.load_prepare_merge.clear()
+        calls = []
+        original_prepare_file_a = streamlit_app.prepare_file_a
+
+        def counting_prepare_file_a(df, cfg):
+            calls.append(1)
+            return original_prepare_file_a(df, cfg)
+
+        cfg = Config()
+        cfg.INPUT_CACHE_DIR = str(Path(tmp) / "cache")
+        streamlit_app.prepare_file_a = counting_prepare_file_a
+        try:
+            args = ("digest-a", "digest-b")
+            first = streamlit_app.load_prepare_merge(
+                *args, streamlit_app._config_key(cfg), file_a_bytes, file_b_bytes, cfg
+            )
+            second = streamlit_app.load_prepare_merge(
+                *args, streamlit_app._config_key(cfg), file_a_bytes, file_b_bytes, cfg
+            )
+            assert len(calls) == 1
+
+            cfg.LAST_MONTH_SOLD_CAP = 10
+            streamlit_app.load_prepare_merge(
+                *args, streamlit_app._config_key(cfg), file_a_bytes, file_b_bytes, cfg
+            )
+            assert len(calls) == 2
+        finally:
+            streamlit_app.prepare_file_a = original_prepare_file_a
+            streamlit_app.load_prepare_merge.clear()
+        assert any((Path(tmp) / "cache").iterdir())
+
+        assert first[3].equals(second[3])
+        print(f"[CORRECT] prepare_file_a called {len(calls)} times for 3 loads")
+
+
+if __name__ == "__main__":
+    test_load_prepare_merge_cached()
@@ -0,0 +1,55 @@
+"""
+測試 generate_summary 的每 Article 一次性匯總（H-site 庫存 / 新SKU提示）
+
+測試場景：
+1. 同一 Article 出現在兩個 Group 時，有效庫存使用該 Article 全部 H-site 庫存
+2. 非 H[ABCD] 開頭店鋪不計入有效庫存
+3. 任一店鋪 Launch Date 空白且 Suggested_DN_Qty > 0 時，該 Article 所有 Group 顯示新SKU提示
+"""
+
+import pandas as pd
+
+from promo_calculator import Config, generate_summary
+
+
+def build_detail() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Group_No": ["001", "001", "002", "001", "003", "003"],
+        "Article": ["SKU1", "SKU1", "SKU1", "SKU1", "SKU2", "SKU2"],
+        "Site": ["D001", "HA01", "HB02", "ME01", "D001", "HC03"],
+        "RP_Type": ["RF", "RF", "ND", "RF", "RF", "RF"],
+        "Supply_source": [2, 2, 2, 2, 1, 1],
+        "SaSa_Net_Stock": [150.0, 40.0, 30.0, 999.0, 0.0, 5.0],
+        "Pending_Received": [0.0, 10.0, 20.0, 999.0, 0.0, 1.0],
+        "In_Quality_Insp": [0, 0, 0, 0, 0, 0],
+        "Blocked": [0, 0, 0, 0, 0, 0],
+        "Total_Demand": [0.0, 100.0, 50.0, 10.0, 0.0, 20.0],
+        "Suggested_Dispatch_Qty": [0, 12, 24, 0, 0, 6],
+        "Suggested_DN_Qty": [0, 12, 24, 0, 0, 6],
+        "Target_Dispatch": [0, 0, 0, 0, 0, 0],
+        "SKU_Target": [200.0, 200.0, 200.0, 200.0, 10.0, 10.0],
+        "Launch_Date": ["20240101", "20240101", "", "20240101", "20240101", "20240101"],
+    })
+
+
+def test_summary_article_lookup():
+    """Test per-Article H-site totals and New SKU alert"""
+    summary = generate_summary(build_detail(), Config()).set_index(["Group_No", "Article"])
+    print(summary[["Effective_Inventory", "Enhanced_Inventory_Status", "New_SKU_Alert"]])
+
+    # SKU1: D001 150 + H-sites (40+10) + (30+20) = 250 in both groups; ME01 excluded
+    assert summary.loc[("001", "SKU1"), "Effective_Inventory"] == 250
+    assert summary.loc[("002", "SKU1"), "Effective_Inventory"] == 250
+    assert summary.loc[("001", "SKU1"), "New_SKU_Alert"] == "新SKU必須由Buyer首次派貨"
+    assert summary.loc[("002", "SKU1"), "New_SKU_Alert"] == "新SKU必須由Buyer首次派貨"
+    assert summary.loc[("001", "SKU1"), "Enhanced_Inventory_Status"].startswith("新SKU必須由Buyer首次派貨, 庫存足夠")
+
+    # SKU2: Supply source 1 → H-site 6 < SKU_Target 10
+    assert summary.loc[("003", "SKU2"), "Effective_Inventory"] == 6
+    assert summary.loc[("003", "SKU2"), "New_SKU_Alert"] == ""
+    assert summary.loc[("003", "SKU2"), "Enhanced_Inventory_Status"] == "庫存現時不足, 因為是行貨, 需要Buyer open PO"
+    print("[CORRECT] Per-Article summary lookups")
+
+
+if __name__ == "__main__":
+    test_summary_article_lookup()
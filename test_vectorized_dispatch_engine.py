@@ -0,0 +1,118 @@
+"""
+測試向量化派貨引擎 (DISPATCH_ENGINE = "vectorized") 與逐行參考實作 ("rowwise") 結果一致
+
+覆蓋場景：
+1. HB87-RF 無 Target 的 Safety Stock 公式
+2. ND / RF 站點、Promotion Days > 4 的 50 件上限
+3. MOQ 為 0 / 小數、Net Demand 為 NaN（File B 未匹配）
+4. Launch Date 空白 / "nan" / "None" 的新 SKU 判斷
+"""
+
+import numpy as np
+import pandas as pd
+
+from promo_calculator import Config, calculate_demand
+
+
+DISPATCH_COLS = [
+    "Suggested_Dispatch_Qty",
+    "Target_Dispatch",
+    "Suggested_DN_Qty",
+    "Dispatch_Remark",
+    "Dispatch_Type",
+]
+
+
+def build_random_detail(n_rows: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """創建隨機測試數據（merge_data 之後的欄位）"""
+    rng = np.random.default_rng(seed)
+    sites = np.array(["HB87", "D001", "HA01", "HC12", "ND01", "MA03"])
+    rp_types = np.array(["RF", "ND", "", "XX"])
+    moq_choices = np.array([0, 0.7, 1, 1.5, 3.3, 6, 12, 24, 60])
+    promo_days = rng.choice([0, 3, 4, 5, 14, np.nan], n_rows)
+    target_cover = rng.choice([0, 7, 10, np.nan], n_rows)
+
+    return pd.DataFrame({
+        "Article": [f"A{i % 97:04d}" for i in range(n_rows)],
+        "Site": rng.choice(sites, n_rows),
+        "RP_Type": rng.choice(rp_types, n_rows),
+        "SaSa_Net_Stock": rng.integers(0, 80, n_rows).astype(float),
+        "Pending_Received": rng.integers(0, 20, n_rows).astype(float),
+        "Safety_Stock": rng.integers(0, 120, n_rows).astype(float),
+        "Last_Month_Sold_Qty_capped": rng.integers(0, 600, n_rows).astype(float),
+        "MOQ": rng.choice(moq_choices, n_rows),
+        "Supply_source": rng.choice([0, 1, 2, 4, 2.7], n_rows),
+        "Launch_Date": rng.choice(["", "20240101", "nan", "None", " null ", np.nan], n_rows),
+        "SKU_Target": rng.choice([0, 50, 100, 1000], n_rows).astype(float),
+        "Site_Target_%": rng.choice([0, 0.1, 0.5, 1.0], n_rows),
+        "Is_Promo_SKU": rng.choice([True, False], n_rows),
+        "Promo_Target_Cover_Days": target_cover,
+        "Promotion_Days": promo_days,
+    })
+
+
+def run_both_engines(df: pd.DataFrame, lead_time: int = 7):
+    cfg_vec = Config()
+    cfg_vec.DISPATCH_ENGINE = "vectorized"
+    cfg_row = Config()
+    cfg_row.DISPATCH_ENGINE = "rowwise"
+    return (
+        calculate_demand(df, cfg_vec, lead_time=lead_time),
+        calculate_demand(df, cfg_row, lead_time=lead_time),
+    )
+
+
+def test_vectorized_matches_rowwise_random():
+    """Test vectorized engine against row-wise reference on random data"""
+    for seed in (1, 2, 3):
+        df = build_random_detail(seed=seed)
+        vec, row = run_both_engines(df)
+        for col in DISPATCH_COLS:
+            mismatches = int((vec[col] != row[col]).sum())
+            print(f"seed={seed} {col}: {mismatches} mismatches")
+            assert mismatches == 0
+        assert (vec["Suggested_Dispatch_Qty"].dtype == row["Suggested_Dispatch_Qty"].dtype)
+
+
+def test_vectorized_missing_optional_columns():
+    """Test engine equality when Launch_Date / Supply_source / Safety_Stock are absent"""
+    df = build_random_detail(n_rows=300, seed=7).drop(
+        columns=["Launch_Date", "Supply_source", "Safety_Stock"]
+    )
+    vec, row = run_both_engines(df, lead_time=0)
+    for col in DISPATCH_COLS:
+        assert vec[col].tolist() == row[col].tolist(), col
+    print("[CORRECT] Missing optional columns handled identically")
+
+
+def test_hb87_rf_vectorized_formula():
+    """Test HB87-RF Safety Stock formula with the vectorized engine"""
+    df = pd.DataFrame({
+        "Article": ["T1", "T2"],
+        "Site": ["HB87", "HB87"],
+        "RP_Type": ["RF", "RF"],
+        "SaSa_Net_Stock": [10.0, 20.0],
+        "Pending_Received": [5.0, 10.0],
+        "Safety_Stock": [50.0, 60.0],
+        "Last_Month_Sold_Qty_capped": [0.0, 0.0],
+        "MOQ": [12.0, 12.0],
+        "Supply_source": [2, 2],
+        "Launch_Date": ["20240101", "20240101"],
+        "SKU_Target": [0.0, 0.0],
+        "Site_Target_%": [0.0, 0.0],
+        "Is_Promo_SKU": [False, False],
+        "Promo_Target_Cover_Days": [0.0, 0.0],
+        "Promotion_Days": [5.0, 5.0],
+    })
+    result = calculate_demand(df, Config(), lead_time=7)
+    # Mround(50-10-5=35, 12) = 36 ; Mround(60-20-10=30, 12) = 36 (half-up)
+    print(result[["Site", "Suggested_Dispatch_Qty", "Suggested_DN_Qty", "Dispatch_Remark"]])
+    assert result["Suggested_Dispatch_Qty"].tolist() == [36, 36]
+    assert result["Suggested_DN_Qty"].tolist() == [0, 0]
+    assert result["Dispatch_Remark"].tolist() == ["HB87-RF派貨", "HB87-RF派貨"]
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_rowwise_random()
+    test_vectorized_missing_optional_columns()
+    test_hb87_rf_vectorized_formula()